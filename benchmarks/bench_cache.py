@@ -0,0 +1,170 @@
+"""Microbenchmarks for the cache decorator: key building, serialization and the hit and miss paths.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cache --number 20000 --repeat 5
+
+Runs offline against an in-process fakeredis. Times, for the `read_time_logs` endpoint's key template
+and keyword arguments (a session and the current user included, as FastAPI passes them):
+
+- `key_build`: building the cache key with a regex and a dict on every call, as the decorator used
+  to, and with the template compiled when the endpoint is decorated.
+- `resource_id`: inferring the resource ID by looping over the keyword arguments on every call, as
+  the decorator used to, and looking up the parameter picked when the endpoint is decorated.
+- `serialize` and `deserialize`: encoding a page of `--items` time logs for Redis and decoding it.
+- `endpoint_bypass`, `endpoint_hit` and `endpoint_miss`: a call to the decorated endpoint without
+  a Redis client, with its response cached and with a key that is not cached yet.
+
+Prints one JSON object per case and mode with the best of `--repeat` runs in microseconds per call.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import re
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from fakeredis import FakeAsyncRedis
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+
+from src.app.core.utils import cache
+from src.app.core.utils.cache import _KeyTemplate, _resource_id_name
+from src.app.models.timelog import TimeLogRead
+
+KEY_PREFIX = "user_{user_id}_time_logs:page_{page}:items_per_page:{items_per_page}"
+
+
+def _legacy_key(prefix: str, kwargs: dict[str, Any], resource_id_name: str) -> str:
+    # What `_format_prefix` did on every call.
+    data_dict = {key: kwargs[key] for key in re.findall(r"{(.*?)}", prefix)}
+    return f"{prefix.format(**data_dict)}:{kwargs[resource_id_name]}"
+
+
+def _legacy_resource_id(kwargs: dict[str, Any], resource_id_type: type) -> int | str:
+    # What `_infer_resource_id` did on every call.
+    resource_id = None
+    for arg_name, arg_value in kwargs.items():
+        if isinstance(arg_value, resource_id_type):
+            if resource_id_type is int and "id" in arg_name:
+                resource_id = arg_value
+            elif resource_id_type is str:
+                resource_id = arg_value
+    return resource_id
+
+
+def _page(items: int) -> dict:
+    start = datetime(2025, 1, 1)
+    data = [
+        TimeLogRead(
+            id=i + 1,
+            task=f"Task {i}",
+            description="Planning session for Q4 roadmap",
+            start_time=start + timedelta(hours=i),
+            end_time=start + timedelta(hours=i, minutes=45),
+            source="manual",
+            creator_id="id_1",
+            created_at=datetime.now(UTC),
+        )
+        for i in range(items)
+    ]
+    return {"data": data, "total_count": 1000, "has_more": True, "page": 1, "items_per_page": items}
+
+
+def _time(func: Callable[[], Any], number: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - started)
+    return best / number * 1e6
+
+
+async def _time_async(func: Callable[[int], Awaitable[Any]], number: int, repeat: int) -> float:
+    best = float("inf")
+    for run in range(repeat):
+        started = time.perf_counter()
+        for i in range(number):
+            await func(run * number + i)
+        best = min(best, time.perf_counter() - started)
+    return best / number * 1e6
+
+
+def _result(case: str, mode: str, us_per_call: float) -> dict:
+    return {"benchmark": "cache", "case": case, "mode": mode, "us_per_call": round(us_per_call, 3)}
+
+
+async def _endpoint_results(response: dict, number: int, repeat: int) -> list[dict]:
+    @cache.cache(KEY_PREFIX, resource_id_name="user_id", expiration=60, tags=["user_{user_id}"])
+    async def cached(
+        request: Request, user_id: str, current_user: dict, db: Any, page: int = 1, items_per_page: int = 10
+    ) -> dict:
+        return response
+
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    kwargs = {"user_id": "id_1", "current_user": {"id": "id_1"}, "db": object(), "items_per_page": 10}
+
+    results = []
+    cache.client = None
+    us = await _time_async(lambda i: cached(request, page=1, **kwargs), number, repeat)
+    results.append(_result("endpoint_bypass", "no_client", us))
+
+    cache.client = FakeAsyncRedis()
+    await cached(request, page=1, **kwargs)
+    us = await _time_async(lambda i: cached(request, page=1, **kwargs), number, repeat)
+    results.append(_result("endpoint_hit", "fakeredis", us))
+
+    # Every call asks for a page that is not cached yet.
+    us = await _time_async(lambda i: cached(request, page=i + 2, **kwargs), number, repeat)
+    results.append(_result("endpoint_miss", "fakeredis", us))
+    await cache.client.aclose()
+    cache.client = None
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timed run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs; the best one is reported")
+    parser.add_argument("--items", type=int, default=10, help="Time logs in the serialized page")
+    args = parser.parse_args()
+
+    kwargs = {
+        "request": object(),
+        "user_id": "id_1",
+        "current_user": {"id": "id_1", "email": "jane@example.com"},
+        "db": object(),
+        "page": 3,
+        "items_per_page": 10,
+    }
+    parameters = {name: inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY) for name in kwargs}
+    parameters["user_id"] = parameters["user_id"].replace(annotation=str)
+    template = _KeyTemplate(KEY_PREFIX, parameters)
+    id_name = _resource_id_name(parameters, str)
+
+    def compiled_key() -> str:
+        return f"{template.render(kwargs)}:{kwargs[id_name]}"
+
+    assert _legacy_key(KEY_PREFIX, kwargs, "user_id") == compiled_key()
+    page = _page(args.items)
+    serialized = json.dumps(jsonable_encoder(page)).encode()
+    cases: list[tuple[str, str, Callable[[], Any], int]] = [
+        ("key_build", "regex_per_call", lambda: _legacy_key(KEY_PREFIX, kwargs, "user_id"), args.number),
+        ("key_build", "compiled", compiled_key, args.number),
+        ("resource_id", "inferred_per_call", lambda: _legacy_resource_id(kwargs, str), args.number),
+        ("resource_id", "bound_at_decoration", lambda: kwargs[id_name], args.number),
+        ("serialize", f"{args.items}_items", lambda: json.dumps(jsonable_encoder(page)), args.number // 10),
+        ("deserialize", f"{args.items}_items", lambda: json.loads(serialized), args.number),
+    ]
+    results = [_result(case, mode, _time(func, number, args.repeat)) for case, mode, func, number in cases]
+    results.extend(asyncio.run(_endpoint_results(page, args.number // 10, args.repeat)))
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
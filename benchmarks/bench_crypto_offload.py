@@ -0,0 +1,101 @@
+"""Measure the latency of unrelated requests while logins hash passwords, with bcrypt on and off the loop.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_crypto_offload --logins 4 --duration 5
+
+Serves a FastAPI app in-process through httpx's ASGI transport. `--logins` clients keep posting to a
+login route that checks a bcrypt hash with `--rounds` rounds, while one client requests a route
+that does no work every `--interval` seconds. Logins check the password either inline, as
+`verify_password` used to, or through `core.security.verify_password` on the crypto pool. Prints
+one JSON object per mode with the p50/p99/max latency of the cheap requests, counted from when each
+was due, and the logins per second.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+import bcrypt
+import httpx
+from fastapi import FastAPI
+
+from src.app.core.security import crypto_executor, verify_password
+
+
+def _app(hashed: str, offload: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login")
+    async def login() -> dict:
+        if offload:
+            correct = await verify_password("secret", hashed)
+        else:
+            correct = bcrypt.checkpw(b"secret", hashed.encode())
+        return {"ok": correct}
+
+    @app.get("/ping")
+    async def ping() -> dict:
+        return {}
+
+    return app
+
+
+async def _run(offload: bool, hashed: str, logins: int, duration: float, interval: float) -> dict:
+    transport = httpx.ASGITransport(app=_app(hashed, offload))
+    deadline = time.perf_counter() + duration
+    latencies: list[float] = []
+    completed_logins = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def log_in() -> None:
+            nonlocal completed_logins
+            while time.perf_counter() < deadline:
+                (await client.post("/login")).raise_for_status()
+                completed_logins += 1
+
+        async def probe() -> None:
+            # Latency counts from when a request was due, so a stalled loop is not hidden by sending less.
+            due = time.perf_counter()
+            while due < deadline:
+                await asyncio.sleep(max(due - time.perf_counter(), 0.0))
+                (await client.get("/ping")).raise_for_status()
+                latencies.append(time.perf_counter() - due)
+                due += interval
+
+        await asyncio.gather(probe(), *(log_in() for _ in range(logins)))
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "benchmark": "crypto_offload",
+        "mode": "executor" if offload else "inline",
+        "concurrent_logins": logins,
+        "crypto_workers": crypto_executor._max_workers,
+        "logins_per_s": round(completed_logins / duration, 1),
+        "requests": len(latencies_ms),
+        "p50_ms": round(statistics.median(latencies_ms), 2),
+        "p99_ms": round(latencies_ms[max(int(len(latencies_ms) * 0.99) - 1, 0)], 2),
+        "max_ms": round(latencies_ms[-1], 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=4, help="Clients logging in concurrently")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between two cheap requests")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor of the stored hash")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    hashed = bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=args.rounds)).decode()
+    for offload in (False, True):
+        print(json.dumps(asyncio.run(_run(offload, hashed, args.logins, args.duration, args.interval))))
+    crypto_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark the cold import of the application, i.e. what every worker pays on boot.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import_time --repeat 5 --top 15
+
+Imports `--module` in fresh interpreters with `-X importtime` and prints one JSON object with the
+best and median total import time, the slowest top-level packages of the fastest run and which of
+the `--lazy` packages were loaded although they should only be imported by the routes using them.
+Exits with status 1 when a lazy package was loaded or the best time exceeds `--max-ms`.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+LAZY_PACKAGES = ["autogen_agentchat", "autogen_ext", "openai", "github", "pydriller", "langchain_community"]
+
+
+def _import_times(module: str) -> dict[str, float]:
+    """Self time in milliseconds of every module imported by `module`, in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    times: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(self_us) / 1000
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="src.app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--lazy", nargs="*", default=LAZY_PACKAGES, help="Packages that must not load on import")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail when the best total exceeds this")
+    args = parser.parse_args()
+
+    runs = [_import_times(args.module) for _ in range(args.repeat)]
+    totals = [sum(run.values()) for run in runs]
+    fastest = runs[totals.index(min(totals))]
+
+    packages: dict[str, float] = {}
+    for name, self_ms in fastest.items():
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_ms
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]
+    loaded_lazy = sorted(package for package in args.lazy if package in packages)
+
+    print(
+        json.dumps(
+            {
+                "benchmark": "import_time",
+                "module": args.module,
+                "modules_imported": len(fastest),
+                "best_ms": round(min(totals), 1),
+                "median_ms": round(statistics.median(totals), 1),
+                "slowest_packages_ms": {package: round(self_ms, 1) for package, self_ms in slowest},
+                "loaded_lazy_packages": loaded_lazy,
+            }
+        )
+    )
+    if loaded_lazy or (args.max_ms is not None and min(totals) > args.max_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Measure how long logging blocks the event loop with a synchronous file handler and with the queue.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_logging --records 20000 --fsync
+
+Logs `--records` records from a coroutine, once through a `RotatingFileHandler` attached directly to
+the logger, as the application used to, and once through `core.logger`'s queue handler, whose
+listener thread writes them to the same kind of file. `--fsync` flushes every record to disk, which
+is what a slow or contended disk looks like. While logging, a ticker task measures how late the
+loop wakes it up. Prints one JSON object per mode with the per-call p50/p99/max in microseconds and
+the worst loop lag.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import statistics
+import tempfile
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+
+from src.app.core.logger import JsonFormatter, RequestIdFilter, _QueueHandler, request_id, stop_logging
+
+
+class _FsyncFileHandler(RotatingFileHandler):
+    def flush(self) -> None:
+        super().flush()
+        if self.stream is not None:
+            os.fsync(self.stream.fileno())
+
+
+def _file_handler(path: str, fsync: bool) -> logging.Handler:
+    handler_class = _FsyncFileHandler if fsync else RotatingFileHandler
+    handler = handler_class(path, maxBytes=10485760, backupCount=5)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+async def _ticker(interval: float, lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def _log(logger: logging.Logger, records: int, batch: int) -> tuple[list[float], list[float]]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(0.001, lags, stop))
+    await asyncio.sleep(0)
+    calls = []
+    request_id.set("bench")
+    for i in range(records):
+        started = time.perf_counter()
+        logger.info("Handled request %d", i, extra={"path": "/api/v1/time_logs", "status": 200})
+        calls.append(time.perf_counter() - started)
+        if i % batch == 0:
+            # Let the ticker run, as a server yields between requests.
+            await asyncio.sleep(0)
+    stop.set()
+    await ticker
+    return calls, lags
+
+
+def _summary(mode: str, calls: list[float], lags: list[float], wall: float) -> dict:
+    calls_us = sorted(call * 1e6 for call in calls)
+    return {
+        "benchmark": "logging",
+        "mode": mode,
+        "records": len(calls),
+        "wall_s": round(wall, 3),
+        "call_p50_us": round(statistics.median(calls_us), 1),
+        "call_p99_us": round(calls_us[int(len(calls_us) * 0.99) - 1], 1),
+        "call_max_us": round(calls_us[-1], 1),
+        "loop_lag_max_ms": round(max(lags, default=0.0) * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=20, help="Records logged between two yields to the loop")
+    parser.add_argument("--fsync", action="store_true", help="Flush every record to disk")
+    args = parser.parse_args()
+
+    # Keep the application's own output handlers out of the measurement.
+    stop_logging()
+    logging.getLogger("").handlers.clear()
+
+    with tempfile.TemporaryDirectory() as directory:
+        logger = logging.getLogger("bench.sync")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addFilter(RequestIdFilter())
+        handler = _file_handler(os.path.join(directory, "sync.log"), args.fsync)
+        logger.addHandler(handler)
+        started = time.perf_counter()
+        calls, lags = asyncio.run(_log(logger, args.records, args.batch))
+        print(json.dumps(_summary("sync_file_handler", calls, lags, time.perf_counter() - started)))
+        handler.close()
+
+        logger = logging.getLogger("bench.queue")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = _QueueHandler(queue.SimpleQueue())
+        handler.addFilter(RequestIdFilter())
+        output = _file_handler(os.path.join(directory, "queue.log"), args.fsync)
+        listener = QueueListener(handler.queue, output, respect_handler_level=True)
+        logger.addHandler(handler)
+        listener.start()
+        started = time.perf_counter()
+        calls, lags = asyncio.run(_log(logger, args.records, args.batch))
+        # The wall time includes draining the queue, i.e. when the last record is on disk.
+        listener.stop()
+        print(json.dumps(_summary("queue_handler", calls, lags, time.perf_counter() - started)))
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
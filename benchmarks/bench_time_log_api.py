@@ -0,0 +1,282 @@
+"""Load test the time log API in-process at several data scales, with the response cache on and off.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_time_log_api --rows 1000 100000 1000000 --output results.json
+
+For every `--rows` scale, seeds `--users` users and that many time logs spread evenly over them into
+a fresh SQLite file, or into `--database-url` (its `user` and `timelog` tables are dropped and
+recreated, never point it at a database you care about). The application from `create_app()` is
+then driven through httpx's ASGI transport by `--concurrency` clients, a single one for the writes
+when the database is SQLite, with Clerk token verification stubbed so a bearer token is the Clerk
+id of the user it authenticates. Every request still goes through the middleware, the user lookup
+and the CRUD layer.
+
+Each scale runs once per `--cache` mode: `off` bypasses the cache decorator, `on` uses the Redis at
+`--redis-url`, flushed first, or an in-process fakeredis when it is `fake`. Every endpoint gets
+`--requests` requests, in this order so the writes do not change what the reads measure:
+`read_time_logs` (random user and page), `read_time_log` (random log of a random user),
+`write_time_log`, the batch upsert of `--batch-size` new logs and, once per user, the batch delete
+of the logs written during the run.
+
+Prints one JSON object per scale, cache mode and endpoint with the throughput, the p50/p95/p99 and
+max latency and the number of non-2xx responses. `--output` also writes them, with the commit and
+the options, to one JSON file for comparing runs.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import httpx
+from fakeredis import FakeAsyncRedis
+from redis.asyncio import Redis
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+from src.app.core import security
+from src.app.core.db.database import async_get_db
+from src.app.core.utils import cache
+from src.app.main import create_app
+from src.app.models.timelog import TimeLog
+from src.app.models.user import User
+
+SEED_CHUNK = 50000
+EPOCH = datetime(2025, 1, 1, tzinfo=UTC)
+
+# A request to send: method, path and keyword arguments for `httpx.AsyncClient.request`.
+Call = tuple[str, str, dict[str, Any]]
+
+
+async def _claim(token: str) -> dict[str, str]:
+    # Stands in for Clerk: the token is the Clerk id of the user.
+    return {"id": token, "email": f"{token}@bench.local"}
+
+
+def _user(i: int) -> dict[str, Any]:
+    return {
+        "id": f"id_{i}",
+        "uuid": f"user_{i}",
+        "name": f"Bench User {i}",
+        "username": f"bench{i}",
+        "email": f"user_{i}@bench.local",
+        "profile_image_url": "https://www.profileimageurl.com",
+        "is_superuser": False,
+        "is_deleted": False,
+        "created_at": EPOCH,
+    }
+
+
+def _time_log(i: int, users: int) -> dict[str, Any]:
+    # Log `i` has id i + 1 and belongs to user i % users. Logs go back from EPOCH, so none of them is
+    # created after a run starts and removed by its batch delete.
+    start = EPOCH - timedelta(minutes=30 * (i + 1))
+    return {
+        "task": f"Task {i}",
+        "description": "Seeded by bench_time_log_api",
+        "start_time": start.replace(tzinfo=None),
+        "end_time": (start + timedelta(minutes=25)).replace(tzinfo=None),
+        "source": "manual",
+        "creator_id": f"id_{i % users}",
+        "created_at": start,
+    }
+
+
+async def _seed(engine: AsyncEngine, rows: int, users: int) -> float:
+    started = time.perf_counter()
+    tables = [User.__table__, TimeLog.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all, tables=tables)
+        await conn.run_sync(SQLModel.metadata.create_all, tables=tables)
+        await conn.execute(insert(User.__table__), [_user(i) for i in range(users)])
+        for offset in range(0, rows, SEED_CHUNK):
+            chunk = [_time_log(i, users) for i in range(offset, min(offset + SEED_CHUNK, rows))]
+            await conn.execute(insert(TimeLog.__table__), chunk)
+    return time.perf_counter() - started
+
+
+def _auth(user: int) -> dict[str, str]:
+    return {"Authorization": f"Bearer user_{user}"}
+
+
+def _new_time_log(rng: random.Random) -> dict[str, str]:
+    start = EPOCH + timedelta(minutes=rng.randrange(500000))
+    return {
+        "task": "Benchmark write",
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=30)).isoformat(),
+        "source": "manual",
+    }
+
+
+def _workloads(rows: int, users: int, requests: int, batch_size: int, since: str) -> dict[str, Callable[[int], Call]]:
+    rng = random.Random(0)
+    logs_per_user = max(rows // users, 1)
+
+    def read_time_logs(_: int) -> Call:
+        user = rng.randrange(users)
+        page = rng.randint(1, max(min(logs_per_user // 10, 5), 1))
+        return "GET", f"/api/v1/user/id_{user}/time_logs?page={page}", {"headers": _auth(user)}
+
+    def read_time_log(_: int) -> Call:
+        log_id = rng.randrange(rows) + 1
+        user = (log_id - 1) % users
+        return "GET", f"/api/v1/user/id_{user}/time_log/{log_id}", {"headers": _auth(user)}
+
+    def write_time_log(_: int) -> Call:
+        user = rng.randrange(users)
+        return "POST", f"/api/v1/user/id_{user}/time_log", {"headers": _auth(user), "json": _new_time_log(rng)}
+
+    def upsert_time_log_batch(request: int) -> Call:
+        # Round robin, so every user has logs for the batch delete to remove.
+        user = request % users
+        batch = {"timelogs": [_new_time_log(rng) for _ in range(batch_size)]}
+        return "POST", "/api/v1/user/time_logs/batch", {"headers": _auth(user), "json": batch}
+
+    def erase_time_logs_batch(request: int) -> Call:
+        user = request % users
+        body = json.dumps({"start_date": since})
+        headers = {**_auth(user), "Content-Type": "application/json"}
+        return "DELETE", f"/api/v1/user/id_{user}/time_logs/batch", {"headers": headers, "content": body}
+
+    return {
+        "read_time_logs": read_time_logs,
+        "read_time_log": read_time_log,
+        "write_time_log": write_time_log,
+        "upsert_time_log_batch": upsert_time_log_batch,
+        "erase_time_logs_batch": erase_time_logs_batch,
+    }
+
+
+async def _drive(client: httpx.AsyncClient, calls: list[Call], concurrency: int) -> tuple[list[float], int, float]:
+    pending = iter(calls)
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        for method, path, kwargs in pending:
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if not response.is_success:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def _percentile(sorted_values: list[float], share: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * share), len(sorted_values) - 1)]
+
+
+async def _run_scale(args: argparse.Namespace, rows: int, database_url: str) -> list[dict]:
+    engine = create_async_engine(database_url)
+    # SQLite has one writer at a time and fails writers that race to upgrade their lock, so writes go one by one.
+    write_concurrency = 1 if engine.dialect.name == "sqlite" else args.concurrency
+    seed_s = await _seed(engine, rows, args.users)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_db() -> AsyncSession:
+        async with session_factory() as db:
+            yield db
+
+    app = create_app()
+    app.dependency_overrides[async_get_db] = get_db
+    results = []
+    for mode in args.cache:
+        if mode == "on":
+            cache.client = FakeAsyncRedis() if args.redis_url == "fake" else Redis.from_url(args.redis_url)
+            await cache.client.flushdb()
+        else:
+            cache.client = None
+
+        # The batch delete removes what this run wrote: logs created from now on.
+        since = datetime.now(UTC).isoformat()
+        workloads = _workloads(rows, args.users, args.requests, args.batch_size, since)
+        # Unhandled errors become 500s and count as errors instead of ending the run.
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for endpoint, make_call in workloads.items():
+                # A batch delete with nothing left to remove fails, so it runs once per user.
+                count = args.users if endpoint == "erase_time_logs_batch" else args.requests
+                calls = [make_call(i) for i in range(count)]
+                concurrency = args.concurrency if endpoint.startswith("read") else write_concurrency
+                latencies, errors, wall = await _drive(client, calls, concurrency)
+                latencies_ms = sorted(latency * 1000 for latency in latencies)
+                result = {
+                    "benchmark": "time_log_api",
+                    "endpoint": endpoint,
+                    "rows": rows,
+                    "users": args.users,
+                    "cache": mode,
+                    "database": engine.dialect.name,
+                    "requests": len(latencies_ms),
+                    "errors": errors,
+                    "concurrency": concurrency,
+                    "throughput_rps": round(len(latencies_ms) / wall, 1),
+                    "p50_ms": round(statistics.median(latencies_ms), 2),
+                    "p95_ms": round(_percentile(latencies_ms, 0.95), 2),
+                    "p99_ms": round(_percentile(latencies_ms, 0.99), 2),
+                    "max_ms": round(latencies_ms[-1], 2),
+                    "seed_s": round(seed_s, 1),
+                }
+                print(json.dumps(result), flush=True)
+                results.append(result)
+
+        if cache.client is not None:
+            await cache.client.aclose()
+            cache.client = None
+
+    await engine.dispose()
+    return results
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000], help="Time logs to seed")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=50, help="Time logs per batch upsert")
+    parser.add_argument("--cache", nargs="+", choices=["off", "on"], default=["off", "on"])
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15", help="`fake` for an in-process fakeredis")
+    parser.add_argument("--database-url", default=None, help="Async SQLAlchemy URL; a temporary SQLite file if unset")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    security.jwt_claim = _claim
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(directory, f'bench_{rows}.db')}"
+            results.extend(asyncio.run(_run_scale(args, rows, database_url)))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"commit": _commit(), "options": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark the rule-based time log estimator over growing commit sets.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_time_log_estimator --sizes 1000 10000 100000
+
+Prints one JSON object per size with the best and median wall time of `estimate_time_logs`.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.app.ai.teams.time_log_estimator import CalendarInput, CommitInput, estimate_time_logs
+
+
+def _generate(size: int, seed: int = 0) -> tuple[list[CommitInput], list[CalendarInput]]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    # Commits land on random days of the year, mostly during the day, with some late-evening work.
+    commits = [
+        CommitInput(
+            date=start + timedelta(days=rng.randrange(365), minutes=rng.randint(8 * 60, 22 * 60)),
+            message=f"commit {i}",
+        )
+        for i in range(size)
+    ]
+    events = []
+    for day in range(365):
+        meeting = start + timedelta(days=day, hours=rng.randint(9, 16))
+        events.append(CalendarInput(title="Meeting", start_date=meeting, end_date=meeting + timedelta(hours=1)))
+    return commits, events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        commits, events = _generate(size)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            estimate = estimate_time_logs(commits, events)
+            timings.append(time.perf_counter() - started)
+        print(
+            json.dumps(
+                {
+                    "benchmark": "estimate_time_logs",
+                    "commits": size,
+                    "events": len(events),
+                    "timelogs": len(estimate.timelogs),
+                    "ambiguous": len(estimate.ambiguous),
+                    "best_s": round(min(timings), 6),
+                    "median_s": round(statistics.median(timings), 6),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
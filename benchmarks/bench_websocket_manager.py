@@ -0,0 +1,75 @@
+"""Load test `ConnectionManager` fan-out with simulated local WebSocket clients.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_websocket_manager --clients 1000 10000 --slow 0.01
+
+Every simulated client takes a random send latency of up to `--latency` seconds and a `--slow`
+share of them never finish, so each broadcast has to hit the send timeout. Prints one JSON object
+per client count with the broadcast wall time and the number of sockets dropped.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from starlette.websockets import WebSocketState
+
+from src.app.api.websocket_manager import ConnectionManager
+
+
+class SimulatedWebSocket:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.client_state = WebSocketState.CONNECTING
+
+    async def accept(self) -> None:
+        self.client_state = WebSocketState.CONNECTED
+
+    async def send_text(self, message: str) -> None:
+        await asyncio.sleep(self.latency)
+
+    async def close(self) -> None:
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+async def _run(clients: int, latency: float, slow: float, timeout: float, repeat: int) -> dict:
+    rng = random.Random(0)
+    timings = []
+    dropped = 0
+    for _ in range(repeat):
+        manager = ConnectionManager(send_timeout=timeout)
+        for i in range(clients):
+            delay = 3600.0 if rng.random() < slow else rng.uniform(0, latency)
+            await manager.connect(SimulatedWebSocket(delay), user_id=f"user{i % 1000}", rooms=[f"room{i % 100}"])
+        started = time.perf_counter()
+        delivered = await manager.broadcast("tick")
+        timings.append(time.perf_counter() - started)
+        dropped = clients - delivered
+    return {
+        "benchmark": "websocket_broadcast",
+        "clients": clients,
+        "dropped": dropped,
+        "send_timeout_s": timeout,
+        "best_s": round(min(timings), 6),
+        "median_s": round(statistics.median(timings), 6),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1_000, 5_000, 10_000])
+    parser.add_argument("--latency", type=float, default=0.05, help="Maximum send latency of a healthy client")
+    parser.add_argument("--slow", type=float, default=0.01, help="Share of clients that never accept a message")
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for clients in args.clients:
+        print(json.dumps(asyncio.run(_run(clients, args.latency, args.slow, args.timeout, args.repeat))))
+
+
+if __name__ == "__main__":
+    main()
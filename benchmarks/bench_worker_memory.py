@@ -0,0 +1,114 @@
+"""Measure gunicorn worker boot time and memory with and without `--preload`.
+
+Run from the repository root (Linux only, memory is read from `/proc/<pid>/smaps_rollup`):
+
+    python -m benchmarks.bench_worker_memory --workers 4 --requests 200
+
+Starts gunicorn with `src/gunicorn_conf.py` against a throwaway SQLite database, as the production
+image does, once per mode. Boot time runs until every worker has finished its lifespan startup.
+Memory is read after `--requests` warm-up requests. Prints one JSON object per mode with the boot
+time, the master's RSS and the workers' mean RSS, mean USS (private memory) and total PSS.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+
+def _memory_kb(pid: int) -> dict[str, int]:
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _children(pid: int) -> list[int]:
+    children = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # The command name is in parentheses and may contain spaces; the parent pid follows it.
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    return children
+
+
+def _run(workers: int, preload: bool, port: int, requests: int, timeout: float) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "PYTHONPATH": "src",
+            "ENVIRONMENT": "local",
+            "SQLITE_URI": str(Path(directory) / "bench.db"),
+            "WEB_CONCURRENCY": str(workers),
+            "GUNICORN_BIND": f"127.0.0.1:{port}",
+            "GUNICORN_PRELOAD": str(preload).lower(),
+        }
+        command = [sys.executable, "-m", "gunicorn", "-c", "python:gunicorn_conf", "app.main:app"]
+        started = time.perf_counter()
+        server = subprocess.Popen(command, env=env, stderr=subprocess.PIPE, text=True)
+        try:
+            booted = 0
+            assert server.stderr is not None
+            deadline = started + timeout
+            for line in server.stderr:
+                if "Application startup complete" in line:
+                    booted += 1
+                    if booted == workers:
+                        break
+                if time.perf_counter() > deadline:
+                    raise TimeoutError(f"{booted}/{workers} workers booted within {timeout}s")
+            boot_s = time.perf_counter() - started
+            # Keep draining the log so the workers never block on a full pipe.
+            threading.Thread(target=server.stderr.read, daemon=True).start()
+
+            for _ in range(requests):
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                    response.read()
+
+            worker_memory = [_memory_kb(pid) for pid in _children(server.pid)]
+            master = _memory_kb(server.pid)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+    return {
+        "benchmark": "worker_memory",
+        "preload": preload,
+        "workers": len(worker_memory),
+        "boot_s": round(boot_s, 3),
+        "master_rss_mb": round(master["rss"] / 1024, 1),
+        "worker_rss_mb": round(sum(m["rss"] for m in worker_memory) / len(worker_memory) / 1024, 1),
+        "worker_uss_mb": round(sum(m["uss"] for m in worker_memory) / len(worker_memory) / 1024, 1),
+        "workers_pss_total_mb": round(sum(m["pss"] for m in worker_memory) / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    for preload in (False, True):
+        print(json.dumps(_run(args.workers, preload, args.port, args.requests, args.timeout)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
-# Create an OpenAI model client.
+import json
 from datetime import datetime
 from typing import List
 
 from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 from pydantic import BaseModel
 
-from ...core.config import AISettings
+from ...core.logger import logging
+from ..connectors import calendar
+from ..connectors.calendar import CalendarClient, CalendarConnector
+from ..connectors.collector import TimeEventCollector
+from ..history import history_context
+from ..model_clients import get_model_client
+
+logger = logging.getLogger(__name__)
 
 
 class Event(BaseModel):
@@ -19,23 +25,40 @@ class AgentResponse(BaseModel):
     thoughts: str
     response: List[Event]
 
-model_client = OpenAIChatCompletionClient(
-    model="gpt-4o",
-    api_key=AISettings().OPENAI_API_KEY,
-    response_format=AgentResponse, # type: ignore
-)
-
 class CalendarAgent:
-    def __init__(self, calendar_config: dict):
-        self.config = calendar_config
-        # Set up calendar client here
-
-    async def get_calendar_events(self, username: str) -> dict:
-        # Retrieve and process calendar events for the user.
-        return {"calendar_events": [{"name": "Meeting", "iso-datetime": "2021-10-01T13:00:00Z"}]}
-
-    assistant = AssistantAgent(
-        "calendar",
-        model_client=model_client,
-        system_message="You are a calendar expert. Provide insights on events from the calendar.",
-    )
+    """The `calendar` agent, with a tool reading the calendar when one is configured.
+
+    Parameters
+    ----------
+    client: CalendarClient | None, optional
+        The calendar to read. Without one the agent has no tools.
+    agent_name: str, optional
+        Name of the agent.
+    """
+
+    def __init__(self, client: CalendarClient | None = None, agent_name: str = "calendar"):
+        self.connector = CalendarConnector(client) if client is not None else None
+        self.assistant = AssistantAgent(
+            agent_name,
+            model_client=get_model_client("calendar", AgentResponse),
+            tools=[self.get_calendar_events] if self.connector is not None else None,
+            system_message="You are a calendar expert. Provide insights on events from the calendar.",
+            model_context=history_context(agent_name),
+        )
+
+    async def get_calendar_events(self, since: datetime | None = None, until: datetime | None = None) -> str:
+        """List the calendar events between `since` and `until` as JSON, oldest first."""
+        if self.connector is None:
+            return json.dumps({"calendar_events": [], "error": "No calendar is configured"})
+        result = await TimeEventCollector([self.connector]).collect(since, until, incremental=False)
+        events = [event.model_dump(mode="json") for event in result.events]
+        return json.dumps({"calendar_events": events, "error": result.errors.get(self.connector.name)})
+
+
+def calendar_assistant() -> AssistantAgent:
+    """A new `calendar` agent, reading the configured calendar `client`.
+
+    Agents hold the state and model context of the team they run in, so every connection or run
+    builds its own; only the model client is shared.
+    """
+    return CalendarAgent(calendar.client).assistant
@@ -3,6 +3,9 @@ import autogen
 from typing import Dict, Any
 
 from ...core.config import AISettings
+from ...core.logger import logging
+
+logger = logging.getLogger(__name__)
 
 
 class AgentChatManager:
@@ -47,14 +50,13 @@ class AgentChatManager:
 
     async def initiate_basic_chat(self, message: str):
         try:
-            print("Initiating basic chat...")
+            logger.debug("Initiating basic chat, waiting for response from outgoing queue")
             agent  = self.assistant
-            print("Waiting for response from outgoing queue...")
             final_response = await self.outgoing_queue.get()
-            print('Final response:', final_response)
+            logger.debug(f"Basic chat response: {final_response}")
             return {"type": "basic", "response": final_response}
         except Exception as e:
-            print(f"Error in basic chat: {str(e)}")
+            logger.warning(f"Error in basic chat: {str(e)}")
             return {"type": "error", "message": str(e)}
 
     async def initiate_code_chat(self, message: str):
@@ -67,7 +69,7 @@ class AgentChatManager:
             final_response = await self.outgoing_queue.get()
             return {"type": "code", "response": final_response}
         except Exception as e:
-            print(f"Error in code chat: {str(e)}")
+            logger.warning(f"Error in code chat: {str(e)}")
             return {"type": "error", "message": str(e)}
 
     async def initiate_math_chat(self, message: str):
@@ -80,5 +82,5 @@ class AgentChatManager:
             final_response = await self.outgoing_queue.get()
             return {"type": "math", "response": final_response}
         except Exception as e:
-            print(f"Error in math chat: {str(e)}")
+            logger.warning(f"Error in math chat: {str(e)}")
             return {"type": "error", "message": str(e)}
@@ -1,28 +1,36 @@
-from datetime import datetime
+import json
+from datetime import date, datetime
 from typing import List
 from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 from github import Github, Auth
 from pydantic import BaseModel
-from pydriller import Repository
-from ...core.config import AISettings
+from ...core.config import settings
+from ...core.logger import logging
+from ..history import history_context
+from ..model_clients import get_model_client
+from ..stores.commit_store import CommitStore
+
+logger = logging.getLogger(__name__)
 
 class Commit(BaseModel):
     hash: str
     message: str
     date: datetime
     author_name: str
+class CommitList(BaseModel):
+    commits: List[Commit]
+    total: int
+    truncated: bool
+class CommitActivity(BaseModel):
+    day: date
+    author_name: str
+    commit_count: int
+    first_commit_at: datetime
+    last_commit_at: datetime
 class AgentResponse(BaseModel):
     thoughts: str
     response: List[Commit]
 
-# Create an OpenAI model client.
-model_client = OpenAIChatCompletionClient(
-    model="gpt-4o",
-    api_key=AISettings().OPENAI_API_KEY,
-    # response_format=AgentResponse, # type: ignore
-)
-
 class GitHubAgent:
     def __init__(self, github_token: str,  agent_name: str = "github"):
         self.github_token = github_token
@@ -32,42 +40,79 @@ class GitHubAgent:
 
         # First create a Github instance:
         self.g = Github(auth=auth)
+        self.commit_store = CommitStore(self.g)
 
         # Initialize the AssistantAgent
         self.assistant = AssistantAgent(
             self.agent_name,
-            model_client=model_client,
-            tools=[self.get_commits, self.search_repo],
+            model_client=get_model_client("github"),
+            tools=[self.get_commit_activity, self.get_commits, self.search_repo],
             system_message="Use tools to provide insights on commits from repository.",
+            model_context=history_context(self.agent_name),
         )
 
-    async def get_commits(self, repository: str) -> List[Commit]:
-        g = self.g
-        # Then play with your GitHub objects:
-        commits: List[Commit] = []
-
-        repo = g.get_repo(repository)
-        since_date = datetime.strptime('2021-01-01T00:00:00Z', '%Y-%m-%dT%H:%M:%SZ')
-        until_date = datetime.strptime('2025-01-31T23:59:59Z', '%Y-%m-%dT%H:%M:%SZ')
-        repo_commits = repo.get_commits(since=since_date, until=until_date)
-        for i, commit in enumerate(repo_commits):
-            print(i, commit.commit.author.date, commit.commit.author.name, commit.commit.message)
-            commits.append(Commit(
+    async def get_commits(
+        self,
+        repository: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        author: str | None = None,
+        max_items: int = settings.COMMIT_TOOL_MAX_ITEMS,
+    ) -> str:
+        """List the newest `max_items` commits of a repository as JSON, oldest first, optionally filtered by date
+        range and author. `total` counts every commit in the range; `truncated` is true when older ones were left
+        out."""
+        # Only commits newer than the last sync are fetched from GitHub, the range is read from the store.
+        await self.commit_store.sync(repository)
+        max_items = max(1, min(max_items, settings.COMMIT_TOOL_MAX_ITEMS))
+        stored_commits = await self.commit_store.get_commits(
+            repository, since=since, until=until, author=author, limit=max_items, newest_first=True
+        )
+        total = len(stored_commits)
+        if total == max_items:
+            total = await self.commit_store.count_commits(repository, since=since, until=until, author=author)
+        commits = [
+            Commit(
                 hash=commit.sha,
-                message=commit.commit.message,
-                date=commit.commit.author.date,
-                author_name=commit.commit.author.name
-            ))
+                message=commit.message,
+                date=commit.authored_at,
+                author_name=commit.author_name or "",
+            )
+            for commit in reversed(stored_commits)
+        ]
+        # Tool results reach the model as strings, JSON keeps the dates serializable and the listing parseable.
+        return CommitList(commits=commits, total=total, truncated=total > len(commits)).model_dump_json()
 
-        # To close connections after use
-        return commits
+    async def get_commit_activity(
+        self,
+        repository: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        author: str | None = None,
+    ) -> str:
+        """Summarise commits per day and author as a JSON list: commit count and first/last commit time. Prefer this
+        for time logs."""
+        await self.commit_store.sync(repository)
+        activity = await self.commit_store.get_daily_activity(repository, since=since, until=until, author=author)
+        return json.dumps(
+            [
+                CommitActivity(
+                    day=row["day"],
+                    author_name=row["author_name"] or "",
+                    commit_count=row["commit_count"],
+                    first_commit_at=row["first_commit_at"],
+                    last_commit_at=row["last_commit_at"],
+                ).model_dump(mode="json")
+                for row in activity
+            ]
+        )
 
     async def search_repo(self, repo_name: str) -> List[str]:
         g = self.g
         repo = g.search_repositories(query=repo_name)
         repo_names = []
-        for i, r in enumerate(repo):
-            print(i, r.full_name)
+        for r in repo:
             repo_names.append(r.full_name)
+        logger.debug(f"Repository search for {repo_name!r} found {len(repo_names)} repositories")
 
         return repo_names
\ No newline at end of file
@@ -0,0 +1 @@
+"""Time-source connectors."""
@@ -0,0 +1,69 @@
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class TimeEvent(BaseModel):
+    """One piece of tracked work, normalized across time sources.
+
+    Point-in-time events such as commits have `start == end`.
+    """
+
+    source: str
+    external_id: str
+    title: str
+    start: datetime
+    end: datetime
+    author: str | None = None
+    url: str | None = None
+    metadata: dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.source}:{self.external_id}"
+
+
+class TimeEventPage(BaseModel):
+    """A batch of events and the cursor to resume from once the batch has been handled."""
+
+    events: list[TimeEvent] = Field(default_factory=list)
+    cursor: str | None = None
+
+
+class TimeSourceConnector(ABC):
+    """A source of `TimeEvent`s, read incrementally.
+
+    Connectors yield pages in order; each page carries the opaque cursor to resume from after it, so a
+    sync that fails halfway keeps the progress of the pages it completed. Resuming from a cursor may
+    repeat the events at the cursor's position, consumers deduplicate by `TimeEvent.key`.
+
+    Attributes
+    ----------
+    name: str
+        Unique name of the connector instance, the key its cursor is stored under.
+    """
+
+    name: str
+
+    @abstractmethod
+    def pages(
+        self, since: datetime | None = None, until: datetime | None = None, cursor: str | None = None
+    ) -> AsyncIterator[TimeEventPage]:
+        """Yield the events in `[since, until]` that changed after `cursor`, oldest first."""
+        ...
+
+    async def events(
+        self, since: datetime | None = None, until: datetime | None = None, cursor: str | None = None
+    ) -> AsyncIterator[TimeEvent]:
+        async for page in self.pages(since, until, cursor):
+            for event in page.events:
+                yield event
@@ -0,0 +1,164 @@
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any, Protocol
+from urllib.parse import quote
+
+import httpx
+from pydantic import BaseModel, Field
+
+from ...core.config import settings
+from .base import TimeEvent, TimeEventPage, TimeSourceConnector, as_utc
+
+
+class CalendarPage(BaseModel):
+    """One page of a calendar listing.
+
+    Follows the sync-token model of calendar APIs such as Google Calendar: `next_page_token` is set
+    while more pages follow and `next_sync_token` on the last page.
+    """
+
+    items: list[dict[str, Any]] = Field(default_factory=list)
+    next_page_token: str | None = None
+    next_sync_token: str | None = None
+
+
+class CalendarClient(Protocol):
+    """Access to one calendar, implemented per calendar provider; any object with `list_events` will do."""
+
+    async def list_events(
+        self,
+        since: datetime | None,
+        until: datetime | None,
+        sync_token: str | None = None,
+        page_token: str | None = None,
+    ) -> CalendarPage:
+        """List events in `[since, until]`, or the events changed since `sync_token` when it is given."""
+        ...
+
+
+class GoogleCalendarClient:
+    """`CalendarClient` over the Google Calendar API, on one pooled `httpx.AsyncClient`.
+
+    Recurring events are expanded into their occurrences. A sync token is sent without the time range,
+    which the API does not accept alongside it.
+
+    Parameters
+    ----------
+    calendar_id: str
+        The calendar to read, e.g. `primary` or a calendar's email address.
+    token: str | None, optional
+        OAuth access token. Defaults to `CALENDAR_ACCESS_TOKEN`.
+    base_url: str, optional
+        Root of the Calendar API.
+    page_size: int, optional
+        Number of events per page.
+    transport: httpx.AsyncBaseTransport | None, optional
+        Transport override, e.g. `httpx.MockTransport` in tests.
+    """
+
+    def __init__(
+        self,
+        calendar_id: str,
+        token: str | None = settings.CALENDAR_ACCESS_TOKEN,
+        base_url: str = settings.CALENDAR_API_URL,
+        page_size: int = settings.CONNECTOR_PAGE_SIZE,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.calendar_id = calendar_id
+        self.page_size = page_size
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.http = httpx.AsyncClient(
+            base_url=base_url, headers=headers, timeout=settings.CONNECTOR_TIMEOUT, transport=transport
+        )
+
+    async def list_events(
+        self,
+        since: datetime | None,
+        until: datetime | None,
+        sync_token: str | None = None,
+        page_token: str | None = None,
+    ) -> CalendarPage:
+        params: dict[str, Any] = {"singleEvents": "true", "maxResults": self.page_size}
+        if sync_token is not None:
+            params["syncToken"] = sync_token
+        else:
+            if since is not None:
+                params["timeMin"] = as_utc(since).isoformat()
+            if until is not None:
+                params["timeMax"] = as_utc(until).isoformat()
+        if page_token is not None:
+            params["pageToken"] = page_token
+        response = await self.http.get(f"/calendars/{quote(self.calendar_id, safe='')}/events", params=params)
+        response.raise_for_status()
+        data = response.json()
+        return CalendarPage(
+            items=data.get("items", []),
+            next_page_token=data.get("nextPageToken"),
+            next_sync_token=data.get("nextSyncToken"),
+        )
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+
+def _parse_time(value: Any) -> datetime:
+    # Calendar APIs give either a timestamp or `{"dateTime": ...}` / `{"date": ...}` for all-day events.
+    if isinstance(value, dict):
+        value = value.get("dateTime") or value.get("date")
+    if isinstance(value, datetime):
+        return as_utc(value)
+    return as_utc(datetime.fromisoformat(str(value)))
+
+
+class CalendarConnector(TimeSourceConnector):
+    """Events of a calendar; the cursor is the calendar's sync token.
+
+    Cancelled events are skipped.
+
+    Parameters
+    ----------
+    client: CalendarClient
+        The calendar to read.
+    name: str, optional
+        Name of the connector, e.g. `calendar:<calendar id>`.
+    """
+
+    def __init__(self, client: CalendarClient, name: str = "calendar") -> None:
+        self.client = client
+        self.name = name
+
+    @staticmethod
+    def _to_event(item: dict[str, Any]) -> TimeEvent:
+        organizer = item.get("organizer") or {}
+        return TimeEvent(
+            source="calendar",
+            external_id=str(item["id"]),
+            title=item.get("summary") or item.get("title") or "",
+            start=_parse_time(item["start"]),
+            end=_parse_time(item["end"]),
+            author=organizer.get("email") if isinstance(organizer, dict) else organizer,
+            url=item.get("htmlLink"),
+            metadata={"timezone": item.get("timezone")} if item.get("timezone") else {},
+        )
+
+    async def pages(
+        self, since: datetime | None = None, until: datetime | None = None, cursor: str | None = None
+    ) -> AsyncIterator[TimeEventPage]:
+        page_token = None
+        while True:
+            page = await self.client.list_events(since, until, sync_token=cursor, page_token=page_token)
+            events = [self._to_event(item) for item in page.items if item.get("status") != "cancelled"]
+            # Intermediate pages have no sync token yet, the previous cursor stays in effect until the last.
+            yield TimeEventPage(events=events, cursor=page.next_sync_token)
+            page_token = page.next_page_token
+            if page_token is None:
+                return
+
+
+# The calendar time logs are estimated against; set at startup when `CALENDAR_ID` is configured.
+client: CalendarClient | None = None
+
+
+def get_calendar_connector() -> CalendarConnector | None:
+    """Return a connector over the configured calendar `client`, or None when there is none."""
+    return CalendarConnector(client) if client is not None else None
@@ -0,0 +1,158 @@
+import asyncio
+from collections.abc import Callable, Sequence
+from datetime import datetime, timezone
+
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.config import settings
+from ...core.db.database import local_session
+from ...core.logger import logging
+from ...crud.crud_connector_cursors import crud_connector_cursors
+from ...models.connector import ConnectorCursor, ConnectorCursorCreateInternal
+from .base import TimeEvent, TimeSourceConnector
+
+logger = logging.getLogger(__name__)
+
+
+class CollectResult(BaseModel):
+    events: list[TimeEvent] = Field(default_factory=list)
+    cursors: dict[str, str | None] = Field(default_factory=dict)
+    errors: dict[str, str] = Field(default_factory=dict)
+    duplicates: int = 0
+
+
+class _Drained(BaseModel):
+    events: list[TimeEvent] = Field(default_factory=list)
+    cursor: str | None = None
+    error: str | None = None
+
+
+def _overlap_key(event: TimeEvent) -> tuple[str, datetime, datetime]:
+    # The same piece of work reported by two sources, e.g. a meeting that was also logged by hand.
+    return (
+        " ".join(event.title.casefold().split()),
+        event.start.replace(second=0, microsecond=0),
+        event.end.replace(second=0, microsecond=0),
+    )
+
+
+class TimeEventCollector:
+    """Collect events from several connectors concurrently, deduplicated and synced incrementally.
+
+    An incremental collect of the whole history resumes every connector from the cursor stored under
+    its name in `ConnectorCursor` and stores the cursors it reaches; collects of a time range read the
+    range again and leave the stored cursors alone. Connectors run concurrently, each bounded by
+    `timeout`; one that fails or times out is reported in `CollectResult.errors` and keeps the events
+    and cursor of the pages it completed, the others are not affected. Events are deduplicated by
+    `TimeEvent.key`, and events of different sources with the same title and start/end minute are
+    reduced to the one from the connector listed first.
+
+    Parameters
+    ----------
+    connectors: Sequence[TimeSourceConnector]
+        The connectors to read, highest priority first.
+    session_factory: Callable[[], AsyncSession], optional
+        Factory for database sessions. Defaults to the application's `local_session`.
+    timeout: float, optional
+        Seconds one connector may take.
+    """
+
+    def __init__(
+        self,
+        connectors: Sequence[TimeSourceConnector],
+        session_factory: Callable[[], AsyncSession] = local_session,
+        timeout: float = settings.CONNECTOR_TIMEOUT,
+    ) -> None:
+        names = [connector.name for connector in connectors]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Connector names must be unique: {names}")
+        self.connectors = list(connectors)
+        self.session_factory = session_factory
+        self.timeout = timeout
+
+    async def load_cursors(self) -> dict[str, str | None]:
+        names = [connector.name for connector in self.connectors]
+        async with self.session_factory() as db:
+            result = await db.execute(select(ConnectorCursor).where(ConnectorCursor.name.in_(names)))
+            return {row.name: row.cursor for row in result.scalars()}
+
+    async def save_cursors(self, cursors: dict[str, str | None]) -> None:
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            await crud_connector_cursors.upsert_multi(
+                db=db,
+                instances=[
+                    ConnectorCursorCreateInternal(name=name, cursor=cursor, synced_at=now)
+                    for name, cursor in cursors.items()
+                ],
+                commit=True,
+            )
+
+    async def _drain(
+        self, connector: TimeSourceConnector, since: datetime | None, until: datetime | None, cursor: str | None
+    ) -> _Drained:
+        drained = _Drained(cursor=cursor)
+        try:
+            async with asyncio.timeout(self.timeout):
+                async for page in connector.pages(since, until, cursor):
+                    drained.events.extend(page.events)
+                    if page.cursor is not None:
+                        drained.cursor = page.cursor
+        except TimeoutError:
+            drained.error = f"timed out after {self.timeout}s"
+        except Exception as e:
+            drained.error = repr(e)
+        if drained.error is not None:
+            logger.warning(f"Connector {connector.name} failed after {len(drained.events)} events: {drained.error}")
+        return drained
+
+    async def collect(
+        self, since: datetime | None = None, until: datetime | None = None, incremental: bool = True
+    ) -> CollectResult:
+        """Read every connector and return the merged events, oldest first.
+
+        Parameters
+        ----------
+        since: datetime | None, optional
+            Start of the time range.
+        until: datetime | None, optional
+            End of the time range.
+        incremental: bool, optional
+            Resume every connector from its stored cursor and store the cursors reached. Only applies
+            when neither `since` nor `until` is given: the cursor of a range does not cover the events
+            outside it, and a full re-read must not move the cursors back.
+        """
+        incremental = incremental and since is None and until is None
+        stored = await self.load_cursors() if incremental else {}
+        drained = await asyncio.gather(
+            *(self._drain(connector, since, until, stored.get(connector.name)) for connector in self.connectors)
+        )
+
+        result = CollectResult()
+        seen_keys: set[str] = set()
+        seen_overlaps: dict[tuple[str, datetime, datetime], str] = {}
+        for connector, connector_result in zip(self.connectors, drained):
+            result.cursors[connector.name] = connector_result.cursor
+            if connector_result.error is not None:
+                result.errors[connector.name] = connector_result.error
+            for event in connector_result.events:
+                overlap_key = _overlap_key(event)
+                if event.key in seen_keys or seen_overlaps.get(overlap_key, event.source) != event.source:
+                    result.duplicates += 1
+                    continue
+                seen_keys.add(event.key)
+                seen_overlaps.setdefault(overlap_key, event.source)
+                result.events.append(event)
+        result.events.sort(key=lambda event: (event.start, event.key))
+
+        if incremental:
+            changed = {
+                name: cursor
+                for name, cursor in result.cursors.items()
+                if cursor is not None and cursor != stored.get(name)
+            }
+            if changed:
+                await self.save_cursors(changed)
+        return result
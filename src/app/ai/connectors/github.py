@@ -0,0 +1,69 @@
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from ...core.config import settings
+from ..stores.commit_store import CommitStore
+from .base import TimeEvent, TimeEventPage, TimeSourceConnector, as_utc
+
+
+class GitHubCommitConnector(TimeSourceConnector):
+    """Commits of one repository as point-in-time events, read from the local `CommitStore`.
+
+    The repository is synced before it is read. Commits are yielded in the order they were stored and
+    the cursor is the `sync_sequence` of the last one, so commits a later sync stores with older dates
+    are still picked up.
+
+    Parameters
+    ----------
+    commit_store: CommitStore
+        The store the repository's commits are synced into.
+    repository: str
+        Full name of the repository, e.g. `owner/repo`.
+    author: str | None, optional
+        Only yield commits of this author name or email.
+    page_size: int, optional
+        Number of commits per page.
+    """
+
+    def __init__(
+        self,
+        commit_store: CommitStore,
+        repository: str,
+        author: str | None = None,
+        page_size: int = settings.CONNECTOR_PAGE_SIZE,
+    ) -> None:
+        self.commit_store = commit_store
+        self.repository = repository
+        self.author = author
+        self.page_size = page_size
+        self.name = f"github:{repository}"
+
+    async def pages(
+        self, since: datetime | None = None, until: datetime | None = None, cursor: str | None = None
+    ) -> AsyncIterator[TimeEventPage]:
+        await self.commit_store.sync(self.repository)
+        # Cursors saved before commits had a sync sequence are author dates; those start over.
+        after = int(cursor) if cursor is not None and cursor.isdigit() else 0
+        while True:
+            batch = await self.commit_store.get_synced_commits(
+                self.repository, after=after, limit=self.page_size, since=since, until=until, author=self.author
+            )
+            if not batch:
+                return
+            events = [
+                TimeEvent(
+                    source="github",
+                    external_id=f"{self.repository}@{commit.sha}",
+                    title=commit.message.split("\n", 1)[0],
+                    start=as_utc(commit.authored_at),
+                    end=as_utc(commit.authored_at),
+                    author=commit.author_name,
+                    url=f"https://github.com/{self.repository}/commit/{commit.sha}",
+                    metadata={"repository": self.repository, "sha": commit.sha},
+                )
+                for commit in batch
+            ]
+            after = batch[-1].sync_sequence
+            yield TimeEventPage(events=events, cursor=str(after))
+            if len(batch) < self.page_size:
+                return
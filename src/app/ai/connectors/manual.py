@@ -0,0 +1,78 @@
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.config import settings
+from ...core.db.database import local_session
+from ...models.timelog import TimeLog
+from .base import TimeEvent, TimeEventPage, TimeSourceConnector, as_utc
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Time log start and end times are stored as naive UTC.
+    return as_utc(value).replace(tzinfo=None)
+
+
+class ManualEntryConnector(TimeSourceConnector):
+    """Time logs a user entered by hand (`source == "manual"`).
+
+    The cursor is the time of the last change (update or creation) of the entries yielded, so edited
+    entries are picked up again.
+
+    Parameters
+    ----------
+    user_id: str
+        The user whose entries are read.
+    session_factory: Callable[[], AsyncSession], optional
+        Factory for database sessions. Defaults to the application's `local_session`.
+    page_size: int, optional
+        Number of entries per page.
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        session_factory: Callable[[], AsyncSession] = local_session,
+        page_size: int = settings.CONNECTOR_PAGE_SIZE,
+    ) -> None:
+        self.user_id = user_id
+        self.session_factory = session_factory
+        self.page_size = page_size
+        self.name = f"manual:{user_id}"
+
+    async def pages(
+        self, since: datetime | None = None, until: datetime | None = None, cursor: str | None = None
+    ) -> AsyncIterator[TimeEventPage]:
+        changed_at = func.coalesce(TimeLog.updated_at, TimeLog.created_at)
+        stmt = select(TimeLog, changed_at.label("changed_at")).where(
+            TimeLog.creator_id == self.user_id, TimeLog.source == "manual"
+        )
+        if since is not None:
+            stmt = stmt.where(TimeLog.end_time >= _naive_utc(since))
+        if until is not None:
+            stmt = stmt.where(TimeLog.start_time <= _naive_utc(until))
+        if cursor is not None:
+            stmt = stmt.where(changed_at >= datetime.fromisoformat(cursor))
+        stmt = stmt.order_by(changed_at, TimeLog.id)
+
+        async with self.session_factory() as db:
+            result = await db.stream(stmt.execution_options(yield_per=self.page_size))
+            async for rows in result.partitions():
+                events = [
+                    TimeEvent(
+                        source="manual",
+                        external_id=str(timelog.id),
+                        title=timelog.task,
+                        start=as_utc(timelog.start_time),
+                        end=as_utc(timelog.end_time),
+                        author=self.user_id,
+                        metadata={"description": timelog.description} if timelog.description else {},
+                    )
+                    for timelog, _ in rows
+                ]
+                last_changed_at = rows[-1][1]
+                if isinstance(last_changed_at, str):
+                    last_changed_at = datetime.fromisoformat(last_changed_at)
+                yield TimeEventPage(events=events, cursor=as_utc(last_changed_at).isoformat())
@@ -0,0 +1,210 @@
+"""Context-window budgeting for the time-log team's agents.
+
+Every agent keeps its own model context. `TeamHistoryContext` bounds it: large tool outputs are
+compacted into digests when they are added, and once the history no longer fits `max_tokens` the
+oldest messages are folded into a rolling summary that is sent ahead of the remaining window.
+"""
+import functools
+import json
+from collections.abc import Callable, Mapping
+from typing import Any
+
+import tiktoken
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import (
+    FunctionExecutionResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    SystemMessage,
+)
+from pydantic import BaseModel
+
+from ..core.config import settings
+from ..core.logger import logging
+
+logger = logging.getLogger(__name__)
+
+_SUMMARY_LINE_CHARS = 200
+
+
+class HistoryLimits(BaseModel):
+    max_tokens: int = settings.TIMELOG_CONTEXT_MAX_TOKENS
+    tool_output_tokens: int = settings.TIMELOG_TOOL_OUTPUT_MAX_TOKENS
+    summary_tokens: int = settings.TIMELOG_SUMMARY_MAX_TOKENS
+
+
+@functools.cache
+def _encoding() -> tiktoken.Encoding | None:
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The encoding is downloaded on first use; without it, fall back to an estimate.
+        logger.warning(f"Token encoding unavailable, estimating token counts: {e!r}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(message: LLMMessage, counter: Callable[[str], int] = count_tokens) -> int:
+    content = message.content
+    if isinstance(content, str):
+        return counter(content)
+    return counter(json.dumps([getattr(item, "__dict__", None) or str(item) for item in content], default=str))
+
+
+def _truncate(text: str, max_tokens: int, counter: Callable[[str], int]) -> str:
+    tokens = counter(text)
+    if tokens <= max_tokens:
+        return text
+    # Keep the head and the tail, which usually hold the newest and oldest items of a listing.
+    keep = max(len(text) * max_tokens // tokens // 2, 1)
+    return f"{text[:keep]}\n... [{tokens - max_tokens} tokens omitted] ...\n{text[-keep:]}"
+
+
+def _leading_items(items: list[Any], budget: int, counter: Callable[[str], int]) -> tuple[list[Any], int]:
+    kept: list[Any] = []
+    for item in items:
+        cost = counter(json.dumps(item, default=str)) + 1
+        if cost > budget:
+            break
+        kept.append(item)
+        budget -= cost
+    return kept, budget
+
+
+def digest_tool_output(content: str, max_tokens: int, counter: Callable[[str], int] = count_tokens) -> str:
+    """Shrink a tool result to about `max_tokens`.
+
+    JSON lists, and the list fields of JSON objects such as `get_commits`'s `commits`, keep as many
+    leading items as fit and report how many were left out; anything else keeps its head and tail.
+    """
+    if counter(content) <= max_tokens:
+        return content
+    try:
+        data = json.loads(content)
+    except ValueError:
+        data = None
+    if isinstance(data, list):
+        budget = max_tokens - counter('{"total_items": 0, "omitted_items": 0, "items": []}')
+        kept, _ = _leading_items(data, budget, counter)
+        return json.dumps({"total_items": len(data), "omitted_items": len(data) - len(kept), "items": kept})
+    if isinstance(data, dict) and any(isinstance(value, list) for value in data.values()):
+        lists = {key: value for key, value in data.items() if isinstance(value, list)}
+        # The other fields are kept whole; the lists share what is left of the budget, in order.
+        omitted = {key: len(value) for key, value in lists.items()}
+        digest = {**data, **{key: [] for key in lists}, "omitted_items": omitted}
+        budget = max_tokens - counter(json.dumps(digest, default=str))
+        for key, items in lists.items():
+            digest[key], budget = _leading_items(items, budget, counter)
+            omitted[key] = len(items) - len(digest[key])
+        return json.dumps(digest, default=str)
+    return _truncate(content, max_tokens, counter)
+
+
+def _summary_line(message: LLMMessage) -> str:
+    if isinstance(message, FunctionExecutionResultMessage):
+        return f"tool results: {len(message.content)} call(s) answered"
+    source = getattr(message, "source", "system")
+    if isinstance(message.content, str):
+        text = " ".join(message.content.split())
+    else:
+        calls = [f"{call.name}({call.arguments})" for call in message.content if hasattr(call, "name")]
+        text = f"called {', '.join(calls)}" if calls else f"sent {len(message.content)} item(s)"
+    if len(text) > _SUMMARY_LINE_CHARS:
+        text = f"{text[:_SUMMARY_LINE_CHARS]}..."
+    return f"{source}: {text}"
+
+
+class TeamHistoryContext(ChatCompletionContext):
+    """Model context bounded to a token budget: a sliding window plus a rolling summary.
+
+    Parameters
+    ----------
+    limits: HistoryLimits | None, optional
+        Token limits of the agent. Defaults to the `TIMELOG_*` settings.
+    initial_messages: list[LLMMessage] | None, optional
+        Messages to start with.
+    counter: Callable[[str], int], optional
+        Token counter. Defaults to the `o200k_base` encoding used by `gpt-4o`.
+    """
+
+    def __init__(
+        self,
+        limits: HistoryLimits | None = None,
+        initial_messages: list[LLMMessage] | None = None,
+        counter: Callable[[str], int] = count_tokens,
+    ) -> None:
+        super().__init__()
+        self.limits = limits or HistoryLimits()
+        self.counter = counter
+        self.summary: list[str] = []
+        self._token_counts: list[int] = []
+        for message in initial_messages or []:
+            self._append(message)
+        self._compact()
+
+    @property
+    def tokens(self) -> int:
+        return sum(self._token_counts) + self.counter("\n".join(self.summary))
+
+    def _append(self, message: LLMMessage) -> None:
+        if isinstance(message, FunctionExecutionResultMessage):
+            message = FunctionExecutionResultMessage(
+                content=[
+                    FunctionExecutionResult(
+                        content=digest_tool_output(result.content, self.limits.tool_output_tokens, self.counter),
+                        call_id=result.call_id,
+                        is_error=result.is_error,
+                    )
+                    for result in message.content
+                ]
+            )
+        self._messages.append(message)
+        self._token_counts.append(message_tokens(message, self.counter))
+
+    def _compact(self) -> None:
+        # Fold the oldest messages into the summary until the window fits. A window never starts
+        # with tool results whose tool calls are gone, and the latest tool exchange is always kept.
+        keep = 2 if self._messages and isinstance(self._messages[-1], FunctionExecutionResultMessage) else 1
+        while len(self._messages) > keep and (
+            sum(self._token_counts) > self.limits.max_tokens
+            or isinstance(self._messages[0], FunctionExecutionResultMessage)
+        ):
+            self.summary.append(_summary_line(self._messages.pop(0)))
+            self._token_counts.pop(0)
+        while len(self.summary) > 1 and self.counter("\n".join(self.summary)) > self.limits.summary_tokens:
+            self.summary.pop(0)
+
+    async def add_message(self, message: LLMMessage) -> None:
+        self._append(message)
+        self._compact()
+
+    async def get_messages(self) -> list[LLMMessage]:
+        if not self.summary:
+            return list(self._messages)
+        summary = SystemMessage(content="Summary of the earlier conversation:\n" + "\n".join(self.summary))
+        return [summary, *self._messages]
+
+    async def clear(self) -> None:
+        self._messages = []
+        self._token_counts = []
+        self.summary = []
+
+    async def save_state(self) -> Mapping[str, Any]:
+        return {**await super().save_state(), "summary": self.summary}
+
+    async def load_state(self, state: Mapping[str, Any]) -> None:
+        await super().load_state(state)
+        self.summary = list(state.get("summary", []))
+        self._token_counts = [message_tokens(message, self.counter) for message in self._messages]
+        self._compact()
+
+
+def history_context(agent_name: str) -> TeamHistoryContext:
+    """Model context for `agent_name`, with its `TIMELOG_CONTEXT_LIMITS` overrides applied."""
+    return TeamHistoryContext(HistoryLimits(**settings.TIMELOG_CONTEXT_LIMITS.get(agent_name, {})))
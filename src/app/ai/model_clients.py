@@ -0,0 +1,29 @@
+"""Model clients of the agents.
+
+Clients are built on first use and then shared by every agent of the same name, so importing the
+agents costs nothing until a route actually runs one.
+"""
+import functools
+
+from autogen_core.models import ChatCompletionClient
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+from pydantic import BaseModel
+
+from ..core.config import settings
+from .stores.response_cache import cached_model_client
+
+
+@functools.cache
+def get_model_client(name: str, response_format: type[BaseModel] | None = None) -> ChatCompletionClient:
+    """The `gpt-4o` client of the agent `name`, wrapped in the response cache.
+
+    Parameters
+    ----------
+    name: str
+        Name of the agent, also the client's name in `response_cache_stats()`.
+    response_format: type[BaseModel] | None, optional
+        Structured output the model has to answer with.
+    """
+    create_args = {} if response_format is None else {"response_format": response_format}
+    client = OpenAIChatCompletionClient(model="gpt-4o", api_key=settings.OPENAI_API_KEY, **create_args)
+    return cached_model_client(client, name=name)
@@ -0,0 +1,165 @@
+import asyncio
+import time
+import uuid as uuid_pkg
+from collections.abc import Callable
+from datetime import UTC, datetime
+from types import TracebackType
+from typing import Any
+
+from autogen_agentchat.base import TaskResult
+from autogen_agentchat.messages import BaseChatMessage, ToolCallExecutionEvent, ToolCallRequestEvent
+from prometheus_client import Counter, Histogram
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.db.database import local_session
+from ..core.logger import logging
+from ..crud.crud_agent_runs import crud_agent_runs
+from ..models.agent_run import AgentRunCreateInternal
+
+logger = logging.getLogger(__name__)
+
+AGENT_TOKENS = Counter("agent_tokens_total", "Model tokens used by agents", ["agent", "kind"])
+AGENT_TURN_SECONDS = Histogram("agent_turn_seconds", "Wall time of one agent turn", ["agent"])
+AGENT_TOOL_SECONDS = Histogram("agent_tool_seconds", "Wall time of one tool call", ["tool"])
+AGENT_RUNS = Counter("agent_runs_total", "Finished agent runs", ["source", "status"])
+AGENT_RUN_SECONDS = Histogram(
+    "agent_run_seconds", "Wall time of one agent run", ["source"], buckets=(1, 5, 10, 30, 60, 120, 300, 600)
+)
+
+
+class UsageTotals(BaseModel):
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0
+
+
+class RunUsageTracker:
+    """Token and latency accounting for one agent or team run, built from the messages it streams.
+
+    A turn ends with every chat message (as opposed to an event); its latency is the time since the
+    previous turn of the same lane ended and is charged to the message's source. Tool latency is the
+    time between a `ToolCallRequestEvent` and the `ToolCallExecutionEvent` carrying the call's
+    result. Tokens are taken from the `models_usage` of every message.
+
+    Used as an async context manager, the tracker persists an `AgentRun` summary on exit with a
+    status of `completed`, `cancelled` or `failed`.
+
+    Parameters
+    ----------
+    source: str
+        What started the run, e.g. `ws` or `timelog`.
+    user_id: str | None, optional
+        The user the run belongs to.
+    session_id: str | None, optional
+        The chat session the run belongs to.
+    session_factory: Callable[[], AsyncSession], optional
+        Factory for database sessions. Defaults to the application's `local_session`.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        user_id: str | None = None,
+        session_id: str | None = None,
+        session_factory: Callable[[], AsyncSession] = local_session,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.run_id = uuid_pkg.uuid4().hex
+        self.source = source
+        self.user_id = user_id
+        self.session_id = session_id
+        self.session_factory = session_factory
+        self.clock = clock
+        self.started_at = datetime.now(UTC)
+        self.turns = 0
+        self.agents: dict[str, UsageTotals] = {}
+        self.tools: dict[str, UsageTotals] = {}
+        self._started = clock()
+        self._turn_started: dict[str, float] = {}
+        self._pending_tools: dict[str, tuple[str, float]] = {}
+
+    def observe(self, message: Any, lane: str = "") -> None:
+        """Account for one message of the run's stream.
+
+        Agents that run concurrently pass their own `lane` so each one's turns are timed separately.
+        """
+        if isinstance(message, TaskResult):
+            return
+        now = self.clock()
+        source = getattr(message, "source", "unknown")
+        agent = self.agents.setdefault(source, UsageTotals())
+
+        usage = getattr(message, "models_usage", None)
+        if usage is not None:
+            agent.prompt_tokens += usage.prompt_tokens
+            agent.completion_tokens += usage.completion_tokens
+            AGENT_TOKENS.labels(agent=source, kind="prompt").inc(usage.prompt_tokens)
+            AGENT_TOKENS.labels(agent=source, kind="completion").inc(usage.completion_tokens)
+
+        if isinstance(message, ToolCallRequestEvent):
+            for call in message.content:
+                self._pending_tools[call.id] = (call.name, now)
+        elif isinstance(message, ToolCallExecutionEvent):
+            for result in message.content:
+                pending = self._pending_tools.pop(result.call_id, None)
+                if pending is None:
+                    continue
+                name, requested = pending
+                tool = self.tools.setdefault(name, UsageTotals())
+                tool.calls += 1
+                tool.latency_ms += (now - requested) * 1000
+                AGENT_TOOL_SECONDS.labels(tool=name).observe(now - requested)
+        elif isinstance(message, BaseChatMessage):
+            latency = now - self._turn_started.get(lane, self._started)
+            agent.calls += 1
+            agent.latency_ms += latency * 1000
+            AGENT_TURN_SECONDS.labels(agent=source).observe(latency)
+            self.turns += 1
+            self._turn_started[lane] = now
+
+    def summary(self, status: str) -> AgentRunCreateInternal:
+        return AgentRunCreateInternal(
+            id=self.run_id,
+            user_id=self.user_id,
+            session_id=self.session_id,
+            source=self.source,
+            status=status,
+            turns=self.turns,
+            prompt_tokens=sum(agent.prompt_tokens for agent in self.agents.values()),
+            completion_tokens=sum(agent.completion_tokens for agent in self.agents.values()),
+            duration_ms=round((self.clock() - self._started) * 1000),
+            agents={name: totals.model_dump() for name, totals in self.agents.items()},
+            tools={name: totals.model_dump() for name, totals in self.tools.items()},
+            started_at=self.started_at,
+        )
+
+    async def finish(self, status: str) -> AgentRunCreateInternal:
+        """Record the run in the metrics and persist its summary."""
+        summary = self.summary(status)
+        AGENT_RUNS.labels(source=self.source, status=status).inc()
+        AGENT_RUN_SECONDS.labels(source=self.source).observe(summary.duration_ms / 1000)
+        try:
+            async with self.session_factory() as db:
+                await crud_agent_runs.create(db=db, object=summary)
+        except Exception as e:
+            logger.error(f"Failed to persist usage of agent run {self.run_id}: {e!r}")
+        return summary
+
+    async def __aenter__(self) -> "RunUsageTracker":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            status = "completed"
+        elif issubclass(exc_type, asyncio.CancelledError | TimeoutError):
+            status = "cancelled"
+        else:
+            status = "failed"
+        await self.finish(status)
@@ -0,0 +1,262 @@
+import asyncio
+import itertools
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from typing import Any
+
+from github import Github
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.config import settings
+from ...core.db.database import local_session
+from ...core.logger import logging
+from ...crud.crud_commits import crud_repo_commits, crud_repo_sync_states
+from ...models.commit import RepoCommit, RepoCommitCreateInternal, RepoSyncStateCreateInternal, RepoSyncStateUpdate
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class CommitStore:
+    """Local store of GitHub commit history, synced incrementally per repository.
+
+    Every repository has a high-water mark (the newest committer date seen so far) in `RepoSyncState`.
+    A sync only asks GitHub for commits at or after that mark, and range queries are answered from
+    the `RepoCommit` table instead of crawling the API again. Every stored commit also gets the next
+    `sync_sequence` of its repository, so readers can follow new commits in the order they were stored
+    whatever their dates.
+
+    Parameters
+    ----------
+    github: Github
+        An authenticated PyGithub client.
+    session_factory: Callable[[], AsyncSession], optional
+        Factory for database sessions. Defaults to the application's `local_session`.
+    sync_interval: int, optional
+        Minimum number of seconds between two syncs of the same repository.
+    batch_size: int, optional
+        Number of commits written per upsert statement.
+    """
+
+    def __init__(
+        self,
+        github: Github,
+        session_factory: Callable[[], AsyncSession] = local_session,
+        sync_interval: int = settings.COMMIT_STORE_SYNC_INTERVAL,
+        batch_size: int = settings.COMMIT_STORE_BATCH_SIZE,
+    ) -> None:
+        self.github = github
+        self.session_factory = session_factory
+        self.sync_interval = sync_interval
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _to_row(repository: str, commit: Any) -> dict[str, Any]:
+        git_commit = commit.commit
+        return {
+            "repository": repository,
+            "sha": commit.sha,
+            "message": git_commit.message,
+            "author_name": git_commit.author.name,
+            "author_email": git_commit.author.email,
+            "authored_at": _as_utc(git_commit.author.date),
+            "committed_at": _as_utc(git_commit.committer.date),
+        }
+
+    def _open_pages(self, repository: str, since: datetime | None) -> Iterator[Any]:
+        repo = self.github.get_repo(repository)
+        repo_commits = repo.get_commits(since=since) if since else repo.get_commits()
+        # GitHub lists the newest commits first; walking the pages backwards stores the oldest first,
+        # so the high-water mark can be saved after every batch.
+        return iter(repo_commits.reversed)
+
+    def _next_batch(self, repository: str, pages: Iterator[Any]) -> list[dict[str, Any]]:
+        # PyGithub pages lazily and blocks, so each batch is pulled in a worker thread and
+        # written before the next one is requested; memory stays bounded by `batch_size`.
+        return [self._to_row(repository, commit) for commit in itertools.islice(pages, self.batch_size)]
+
+    async def _save(
+        self, repository: str, state_exists: bool, batch: list[dict[str, Any]], values: RepoSyncStateUpdate
+    ) -> None:
+        async with self.session_factory() as db:
+            if batch:
+                await crud_repo_commits.upsert_multi(
+                    db=db, instances=[RepoCommitCreateInternal(**commit) for commit in batch]
+                )
+            if state_exists:
+                await crud_repo_sync_states.update(db=db, object=values, repository=repository, commit=False)
+            else:
+                await crud_repo_sync_states.create(
+                    db=db,
+                    object=RepoSyncStateCreateInternal(repository=repository, **values.model_dump()),
+                    commit=False,
+                )
+            await db.commit()
+
+    async def sync(self, repository: str, force: bool = False) -> int:
+        """Fetch commits newer than the repository's high-water mark and store them.
+
+        Every batch is written, with the high-water mark it reaches, in its own transaction and no
+        connection is held while GitHub is paged, so a crawl failing half-way keeps what it stored
+        and the next sync resumes from there.
+
+        Parameters
+        ----------
+        repository: str
+            Full name of the repository, e.g. `owner/repo`.
+        force: bool, optional
+            Sync even when the last sync is more recent than `sync_interval`.
+
+        Returns
+        -------
+        int
+            The number of commits fetched from GitHub.
+        """
+        async with self.session_factory() as db:
+            state = await crud_repo_sync_states.get(db=db, repository=repository)
+        now = datetime.now(timezone.utc)
+        since = None
+        sequence = 0
+        if state is not None:
+            sequence = state["last_sync_sequence"] or 0
+            last_synced_at = state["last_synced_at"]
+            if (
+                not force
+                and last_synced_at is not None
+                and (now - _as_utc(last_synced_at)).total_seconds() < self.sync_interval
+            ):
+                return 0
+            if state["last_committed_at"] is not None:
+                since = _as_utc(state["last_committed_at"])
+
+        pages = await asyncio.to_thread(self._open_pages, repository, since)
+        fetched = 0
+        high_water_mark = since
+        state_exists = state is not None
+        while batch := await asyncio.to_thread(self._next_batch, repository, pages):
+            fetched += len(batch)
+            for commit in batch:
+                sequence += 1
+                commit["sync_sequence"] = sequence
+            newest = max(commit["committed_at"] for commit in batch)
+            if high_water_mark is None or newest > high_water_mark:
+                high_water_mark = newest
+            # `last_synced_at` only moves once the crawl is complete, so a failed one is retried.
+            values = RepoSyncStateUpdate(last_committed_at=high_water_mark, last_sync_sequence=sequence)
+            await self._save(repository, state_exists, batch, values)
+            state_exists = True
+
+        values = RepoSyncStateUpdate(last_committed_at=high_water_mark, last_sync_sequence=sequence, last_synced_at=now)
+        await self._save(repository, state_exists, [], values)
+        logger.info(f"Synced {fetched} commits for {repository} (since={since})")
+        return fetched
+
+    @staticmethod
+    def _filter(
+        stmt: Select, repository: str, since: datetime | None, until: datetime | None, author: str | None
+    ) -> Select:
+        stmt = stmt.where(RepoCommit.repository == repository)
+        if since is not None:
+            stmt = stmt.where(RepoCommit.authored_at >= _as_utc(since))
+        if until is not None:
+            stmt = stmt.where(RepoCommit.authored_at <= _as_utc(until))
+        if author:
+            author = author.lower()
+            stmt = stmt.where(
+                or_(func.lower(RepoCommit.author_name) == author, func.lower(RepoCommit.author_email) == author)
+            )
+        return stmt
+
+    async def get_commits(
+        self,
+        repository: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        author: str | None = None,
+        limit: int | None = None,
+        newest_first: bool = False,
+    ) -> list[RepoCommit]:
+        """Return stored commits for a repository whose author date falls in `[since, until]`, oldest first.
+
+        `author` matches the author name or email case-insensitively and `limit` caps the number of
+        rows read from the database. With `newest_first` the newest commits come first, so a `limit`
+        keeps the most recent ones.
+        """
+        order = RepoCommit.authored_at.desc() if newest_first else RepoCommit.authored_at
+        stmt = self._filter(select(RepoCommit), repository, since, until, author).order_by(order)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        async with self.session_factory() as db:
+            result = await db.execute(stmt)
+            return list(result.scalars().all())
+
+    async def get_synced_commits(
+        self,
+        repository: str,
+        after: int = 0,
+        limit: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        author: str | None = None,
+    ) -> list[RepoCommit]:
+        """Return stored commits with a `sync_sequence` above `after`, in the order they were stored.
+
+        Filters are those of `get_commits`. A commit fetched again by a later sync moves to the end.
+        """
+        stmt = self._filter(select(RepoCommit), repository, since, until, author)
+        stmt = stmt.where(RepoCommit.sync_sequence > after).order_by(RepoCommit.sync_sequence)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        async with self.session_factory() as db:
+            result = await db.execute(stmt)
+            return list(result.scalars().all())
+
+    async def count_commits(
+        self,
+        repository: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        author: str | None = None,
+    ) -> int:
+        """Count the stored commits `get_commits` would return without a `limit`."""
+        stmt = self._filter(select(func.count()).select_from(RepoCommit), repository, since, until, author)
+        async with self.session_factory() as db:
+            return (await db.execute(stmt)).scalar_one()
+
+    async def get_daily_activity(
+        self,
+        repository: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        author: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Aggregate stored commits per day and author.
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            One row per (day, author) with `day`, `author_name`, `commit_count`, `first_commit_at`
+            and `last_commit_at`, ordered by day.
+        """
+        day = func.date(RepoCommit.authored_at).label("day")
+        stmt = select(
+            day,
+            RepoCommit.author_name,
+            func.count().label("commit_count"),
+            func.min(RepoCommit.authored_at).label("first_commit_at"),
+            func.max(RepoCommit.authored_at).label("last_commit_at"),
+        )
+        stmt = self._filter(stmt, repository, since, until, author)
+        stmt = stmt.group_by(day, RepoCommit.author_name).order_by(day, RepoCommit.author_name)
+
+        async with self.session_factory() as db:
+            result = await db.execute(stmt)
+            return [dict(row._mapping) for row in result]
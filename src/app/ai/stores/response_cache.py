@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import json
+import warnings
+from abc import ABC, abstractmethod
+from collections.abc import AsyncGenerator, Mapping, Sequence
+from typing import Any
+
+from autogen_core import CancellationToken
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    LLMMessage,
+    ModelCapabilities,
+    ModelInfo,
+    RequestUsage,
+)
+from autogen_core.tools import Tool, ToolSchema
+from diskcache import Cache
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from ...core.config import settings
+from ...core.logger import logging
+from ...core.utils import cache
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCacheStore(ABC):
+    """Storage of serialized model responses by cache key, entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl: int = settings.LLM_CACHE_TTL) -> None:
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str) -> None:
+        ...
+
+
+class RedisResponseCacheStore(ResponseCacheStore):
+    def __init__(self, client: Redis, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.client = client
+
+    async def get(self, key: str) -> str | None:
+        value = await self.client.get(f"llm_cache:{key}")
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str) -> None:
+        await self.client.set(f"llm_cache:{key}", value, ex=self.ttl)
+
+
+class DiskResponseCacheStore(ResponseCacheStore):
+    """Response store in a local `diskcache` directory, used when Redis is not configured."""
+
+    def __init__(self, directory: str = settings.LLM_CACHE_DIR, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.cache = Cache(directory)
+
+    async def get(self, key: str) -> str | None:
+        value: str | None = await asyncio.to_thread(self.cache.get, key)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.cache.set, key, value, expire=self.ttl)
+
+
+_disk_store: DiskResponseCacheStore | None = None
+
+
+def get_response_cache_store() -> ResponseCacheStore:
+    """Return a Redis-backed store when the cache client is initialized, the on-disk store otherwise."""
+    global _disk_store
+    if cache.client is not None:
+        return RedisResponseCacheStore(cache.client)
+    if _disk_store is None:
+        _disk_store = DiskResponseCacheStore()
+    return _disk_store
+
+
+class ResponseCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _schema(value: Any) -> Any:
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return value.model_json_schema()
+    return value
+
+
+class CachedChatCompletionClient(ChatCompletionClient):
+    """Chat completion client that answers repeated requests from a response cache.
+
+    The cache key hashes everything that determines the response: the wrapped client's model and
+    create arguments (e.g. `response_format`), the messages, the tool schemas and the per-call
+    arguments. Hits are returned with `cached=True` and do not count towards the wrapped client's
+    usage.
+
+    Parameters
+    ----------
+    client: ChatCompletionClient
+        The client requests are forwarded to on a miss.
+    store: ResponseCacheStore | None, optional
+        Where responses are kept. Defaults to `get_response_cache_store()`, resolved on every call
+        so module-level clients pick up the Redis pool once the application has started.
+    """
+
+    def __init__(self, client: ChatCompletionClient, store: ResponseCacheStore | None = None) -> None:
+        self.client = client
+        self.store = store
+        self.stats = ResponseCacheStats()
+        # OpenAI clients keep the model and default create arguments (e.g. `response_format`) here.
+        create_args = getattr(client, "_create_args", {})
+        self._client_args = {name: _schema(value) for name, value in create_args.items()}
+
+    def _store(self) -> ResponseCacheStore:
+        return self.store or get_response_cache_store()
+
+    def cache_key(
+        self,
+        messages: Sequence[LLMMessage],
+        tools: Sequence[Tool | ToolSchema],
+        json_output: bool | None,
+        extra_create_args: Mapping[str, Any],
+    ) -> str:
+        data = {
+            "client": self._client_args,
+            "messages": [message.model_dump() for message in messages],
+            "tools": [tool.schema if isinstance(tool, Tool) else tool for tool in tools],
+            "json_output": json_output,
+            "extra_create_args": {name: _schema(value) for name, value in extra_create_args.items()},
+        }
+        serialized = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    async def _lookup(self, key: str) -> CreateResult | None:
+        try:
+            cached = await self._store().get(key)
+        except Exception as e:
+            logger.warning(f"LLM response cache read failed: {e!r}")
+            cached = None
+        if cached is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        result = CreateResult.model_validate_json(cached)
+        result.cached = True
+        # Nothing was spent on a hit, keep usage accounting to what the model actually billed.
+        result.usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        return result
+
+    async def _save(self, key: str, result: CreateResult) -> None:
+        try:
+            await self._store().set(key, result.model_dump_json())
+        except Exception as e:
+            logger.warning(f"LLM response cache write failed: {e!r}")
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: bool | None = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: CancellationToken | None = None,
+    ) -> CreateResult:
+        key = self.cache_key(messages, tools, json_output, extra_create_args)
+        cached = await self._lookup(key)
+        if cached is not None:
+            return cached
+        result = await self.client.create(
+            messages,
+            tools=tools,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        )
+        await self._save(key, result)
+        return result
+
+    def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: bool | None = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: CancellationToken | None = None,
+    ) -> AsyncGenerator[str | CreateResult, None]:
+        async def _generator() -> AsyncGenerator[str | CreateResult, None]:
+            key = self.cache_key(messages, tools, json_output, extra_create_args)
+            cached = await self._lookup(key)
+            if cached is not None:
+                # A hit replays the whole response as a single chunk followed by the result.
+                if isinstance(cached.content, str):
+                    yield cached.content
+                yield cached
+                return
+            async for chunk in self.client.create_stream(
+                messages,
+                tools=tools,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            ):
+                if isinstance(chunk, CreateResult):
+                    await self._save(key, chunk)
+                yield chunk
+
+        return _generator()
+
+    def actual_usage(self) -> RequestUsage:
+        return self.client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self.client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore[valid-type]
+        warnings.warn("capabilities is deprecated, use model_info instead", DeprecationWarning, stacklevel=2)
+        return self.client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self.client.model_info
+
+
+_cached_clients: dict[str, CachedChatCompletionClient] = {}
+
+
+def cached_model_client(client: ChatCompletionClient, name: str) -> ChatCompletionClient:
+    """Wrap `client` in the response cache unless `LLM_CACHE_ENABLED` is off.
+
+    `name` identifies the client in `response_cache_stats()`.
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        return client
+    cached_client = _cached_clients[name] = CachedChatCompletionClient(client)
+    return cached_client
+
+
+def response_cache_stats() -> dict[str, dict[str, Any]]:
+    """Hits, misses and hit rate of every cached model client in this process."""
+    return {
+        name: {**client.stats.model_dump(), "hit_rate": client.stats.hit_rate}
+        for name, client in _cached_clients.items()
+    }
@@ -0,0 +1,152 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+
+from redis.asyncio import Redis
+
+from ...core.config import settings
+from ...core.utils import cache
+
+
+class TeamSessionStore(ABC):
+    """Team state and chat history of one time-log chat session, keyed by user and session.
+
+    History is append-only: every message is pushed on its own and the full history is never rewritten.
+    Every write refreshes the session's TTL, so sessions that are not resumed expire on their own, and
+    histories longer than `max_history` are compacted to their most recent messages.
+
+    Parameters
+    ----------
+    ttl: int, optional
+        Seconds an idle session is kept.
+    max_history: int, optional
+        Number of history messages kept per session.
+    """
+
+    def __init__(
+        self, ttl: int = settings.TIMELOG_SESSION_TTL, max_history: int = settings.TIMELOG_SESSION_HISTORY_MAX
+    ) -> None:
+        self.ttl = ttl
+        self.max_history = max_history
+
+    @abstractmethod
+    async def load_state(self, user_id: str, session_id: str) -> dict[str, Any] | None:
+        ...
+
+    @abstractmethod
+    async def save_state(self, user_id: str, session_id: str, state: dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def append_history(self, user_id: str, session_id: str, *messages: dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def get_history(self, user_id: str, session_id: str, last: int | None = None) -> list[dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def delete(self, user_id: str, session_id: str) -> None:
+        ...
+
+
+class RedisTeamSessionStore(TeamSessionStore):
+    """Session store on Redis: state is a string key and history a list, both sharing the session TTL."""
+
+    def __init__(self, client: Redis, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.client = client
+
+    @staticmethod
+    def _key(user_id: str, session_id: str, kind: str) -> str:
+        return f"timelog_session:{user_id}:{session_id}:{kind}"
+
+    async def load_state(self, user_id: str, session_id: str) -> dict[str, Any] | None:
+        state = await self.client.get(self._key(user_id, session_id, "state"))
+        if state is None:
+            return None
+        loaded: dict[str, Any] = json.loads(state)
+        return loaded
+
+    async def save_state(self, user_id: str, session_id: str, state: dict[str, Any]) -> None:
+        history_key = self._key(user_id, session_id, "history")
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(user_id, session_id, "state"), json.dumps(state, default=str), ex=self.ttl)
+            pipe.expire(history_key, self.ttl)
+            await pipe.execute()
+
+    async def append_history(self, user_id: str, session_id: str, *messages: dict[str, Any]) -> None:
+        if not messages:
+            return
+        history_key = self._key(user_id, session_id, "history")
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.rpush(history_key, *[json.dumps(message, default=str) for message in messages])
+            pipe.ltrim(history_key, -self.max_history, -1)
+            pipe.expire(history_key, self.ttl)
+            await pipe.execute()
+
+    async def get_history(self, user_id: str, session_id: str, last: int | None = None) -> list[dict[str, Any]]:
+        start = -last if last else 0
+        messages = await self.client.lrange(self._key(user_id, session_id, "history"), start, -1)
+        return [json.loads(message) for message in messages]
+
+    async def delete(self, user_id: str, session_id: str) -> None:
+        await self.client.delete(self._key(user_id, session_id, "state"), self._key(user_id, session_id, "history"))
+
+
+class MemoryTeamSessionStore(TeamSessionStore):
+    """Process-local session store used when Redis is not configured (e.g. local development)."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._sessions: dict[tuple[str, str], dict[str, Any]] = {}
+
+    def _session(self, user_id: str, session_id: str) -> dict[str, Any] | None:
+        now = time.monotonic()
+        expired = [key for key, session in self._sessions.items() if session["expires_at"] <= now]
+        for key in expired:
+            del self._sessions[key]
+        return self._sessions.get((user_id, session_id))
+
+    def _touch(self, user_id: str, session_id: str) -> dict[str, Any]:
+        session = self._session(user_id, session_id)
+        if session is None:
+            session = self._sessions[(user_id, session_id)] = {"state": None, "history": []}
+        session["expires_at"] = time.monotonic() + self.ttl
+        return session
+
+    async def load_state(self, user_id: str, session_id: str) -> dict[str, Any] | None:
+        session = self._session(user_id, session_id)
+        return session["state"] if session else None
+
+    async def save_state(self, user_id: str, session_id: str, state: dict[str, Any]) -> None:
+        self._touch(user_id, session_id)["state"] = state
+
+    async def append_history(self, user_id: str, session_id: str, *messages: dict[str, Any]) -> None:
+        history = self._touch(user_id, session_id)["history"]
+        history.extend(messages)
+        del history[: -self.max_history]
+
+    async def get_history(self, user_id: str, session_id: str, last: int | None = None) -> list[dict[str, Any]]:
+        session = self._session(user_id, session_id)
+        if session is None:
+            return []
+        history: list[dict[str, Any]] = session["history"]
+        return list(history[-last:] if last else history)
+
+    async def delete(self, user_id: str, session_id: str) -> None:
+        self._sessions.pop((user_id, session_id), None)
+
+
+_memory_store: MemoryTeamSessionStore | None = None
+
+
+def get_team_session_store() -> TeamSessionStore:
+    """Return a Redis-backed store when the cache client is initialized, the process-local store otherwise."""
+    global _memory_store
+    if cache.client is not None:
+        return RedisTeamSessionStore(cache.client)
+    if _memory_store is None:
+        _memory_store = MemoryTeamSessionStore()
+    return _memory_store
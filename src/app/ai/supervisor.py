@@ -0,0 +1,180 @@
+import asyncio
+import uuid as uuid_pkg
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from typing import Literal
+
+from autogen_core import CancellationToken
+from pydantic import BaseModel
+
+from ..core.config import settings
+from ..core.exceptions.run_exceptions import RunLimitExceededError
+from ..core.logger import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RunInfo(BaseModel):
+    run_id: str
+    user_id: str
+    session_id: str | None = None
+    status: Literal["queued", "running", "waiting"] = "queued"
+    queued_at: datetime
+    started_at: datetime | None = None
+
+
+class SupervisedRun:
+    """A run admitted by `RunSupervisor.run`.
+
+    Attributes
+    ----------
+    info: RunInfo
+        What `RunSupervisor.active_runs` reports about the run.
+    token: CancellationToken
+        The token to pass to the team, cancelled when the run ends or `cancel` is called.
+    """
+
+    def __init__(self, supervisor: "RunSupervisor", info: RunInfo, user_slot: asyncio.Semaphore) -> None:
+        self.info = info
+        self.token = CancellationToken()
+        self._supervisor = supervisor
+        self._user_slot = user_slot
+        self._held: list[asyncio.Semaphore] = []
+        self._budget: asyncio.Timeout | None = None
+
+    def cancel(self) -> None:
+        """Cancel the run, e.g. because its client went away."""
+        self.token.cancel()
+
+    async def _acquire(self) -> None:
+        # The user slot is taken first so a user's queued runs never hold a global slot while waiting.
+        try:
+            async with asyncio.timeout(max(self._supervisor.queue_timeout, 0)):
+                for slot in (self._user_slot, self._supervisor._global_slots):
+                    await slot.acquire()
+                    self._held.append(slot)
+        except TimeoutError:
+            self._release()
+            raise RunLimitExceededError() from None
+
+    def _release(self) -> None:
+        while self._held:
+            self._held.pop().release()
+
+    @asynccontextmanager
+    async def waiting(self) -> AsyncIterator[None]:
+        """Suspend the run while it waits on something other than its agents, e.g. the user typing.
+
+        The run's slots are handed back and its `run_timeout` budget stops counting until the block
+        exits; the slots are then taken again, waiting up to `queue_timeout`.
+
+        Raises
+        ------
+        RunLimitExceededError
+            If no slot frees up within `queue_timeout` once the wait is over.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = self._budget.when() if self._budget is not None else None
+        remaining = deadline - loop.time() if deadline is not None else None
+        if self._budget is not None:
+            self._budget.reschedule(None)
+        self._release()
+        self.info.status = "waiting"
+        try:
+            yield
+            await self._acquire()
+        finally:
+            self.info.status = "running"
+            if self._budget is not None and remaining is not None:
+                self._budget.reschedule(loop.time() + remaining)
+
+
+class RunSupervisor:
+    """Admission control and cancellation for agent team runs within one worker.
+
+    A run holds a per-user slot and a global slot for as long as it executes. Runs over either limit
+    wait up to `queue_timeout` seconds for a slot (`0` rejects them right away) and then fail with
+    `RunLimitExceededError`. Every run gets a `CancellationToken` that is cancelled when the run
+    ends for any reason, e.g. the client went away, and a run that exceeds `run_timeout` seconds is
+    cancelled and raises `TimeoutError`. Time spent in `SupervisedRun.waiting`, e.g. on user input,
+    holds no slot and does not count towards `run_timeout`.
+
+    Parameters
+    ----------
+    max_concurrent: int, optional
+        Runs executing at the same time in this worker.
+    max_per_user: int, optional
+        Runs executing at the same time for one user.
+    queue_timeout: float, optional
+        Seconds a run waits for a free slot before it is rejected.
+    run_timeout: float, optional
+        Wall-clock budget of a run in seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = settings.AGENT_RUN_MAX_CONCURRENT,
+        max_per_user: int = settings.AGENT_RUN_MAX_PER_USER,
+        queue_timeout: float = settings.AGENT_RUN_QUEUE_TIMEOUT,
+        run_timeout: float = settings.AGENT_RUN_TIMEOUT,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.queue_timeout = queue_timeout
+        self.run_timeout = run_timeout
+        self._global_slots = asyncio.Semaphore(max_concurrent)
+        self._user_slots: dict[str, asyncio.Semaphore] = {}
+        self._user_runs: dict[str, int] = {}
+        self._runs: dict[str, RunInfo] = {}
+
+    def active_runs(self) -> list[RunInfo]:
+        """Queued and running runs, oldest first."""
+        return sorted(self._runs.values(), key=lambda run: run.queued_at)
+
+    @asynccontextmanager
+    async def run(self, user_id: str, session_id: str | None = None) -> AsyncIterator[SupervisedRun]:
+        """Admit a run for `user_id` and yield it; pass its `token` to the team.
+
+        Raises
+        ------
+        RunLimitExceededError
+            If no slot frees up within `queue_timeout`.
+        TimeoutError
+            If the run takes longer than `run_timeout`.
+        """
+        info = RunInfo(
+            run_id=uuid_pkg.uuid4().hex, user_id=user_id, session_id=session_id, queued_at=datetime.now(UTC)
+        )
+        user_slot = self._user_slots.setdefault(user_id, asyncio.Semaphore(self.max_per_user))
+        run = SupervisedRun(self, info, user_slot)
+        self._user_runs[user_id] = self._user_runs.get(user_id, 0) + 1
+        self._runs[info.run_id] = info
+        try:
+            try:
+                await run._acquire()
+            except RunLimitExceededError:
+                logger.warning(f"Rejected agent run for user {user_id}: {len(self._runs) - 1} runs in progress")
+                raise
+
+            info.status = "running"
+            info.started_at = datetime.now(UTC)
+            try:
+                async with asyncio.timeout(self.run_timeout) as budget:
+                    run._budget = budget
+                    yield run
+            except TimeoutError:
+                logger.warning(f"Agent run {info.run_id} of user {user_id} exceeded {self.run_timeout}s")
+                raise
+            finally:
+                run.token.cancel()
+        finally:
+            run._release()
+            del self._runs[info.run_id]
+            self._user_runs[user_id] -= 1
+            if not self._user_runs[user_id]:
+                del self._user_runs[user_id]
+                del self._user_slots[user_id]
+
+
+run_supervisor = RunSupervisor()
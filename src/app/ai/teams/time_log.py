@@ -1,18 +1,23 @@
+import asyncio
 import json
-import os
+import time
 from datetime import datetime
-from typing import Callable, Optional, Awaitable, Any, List, Literal
+from typing import Callable, Optional, Awaitable, List, Literal, Sequence
 
-import aiofiles
 from autogen_agentchat.base import TaskResult
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_core import CancellationToken
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from autogen_core.models import ChatCompletionClient
 from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
 from autogen_agentchat.conditions import ExternalTermination, TextMentionTermination
-from github import Auth, Github
-from pydantic import BaseModel, Field
-from ...core.config import AISettings, AccessTokenSettings
+from pydantic import BaseModel, Field, ValidationError
+from ...core.config import settings
+from ...core.logger import logging
+from ..history import history_context
+from ..run_usage import RunUsageTracker
+from ..model_clients import get_model_client
+
+logger = logging.getLogger(__name__)
 
 class TimeLog(BaseModel):
     task: str = Field(..., description="The task of the time log")
@@ -24,68 +29,15 @@ class AgentResponse(BaseModel):
     thoughts: str
     response: List[TimeLog]
 
-tokens = AccessTokenSettings()# Create an OpenAI model client.
-model_client = OpenAIChatCompletionClient(
-    model="gpt-4o",
-    api_key=AISettings().OPENAI_API_KEY,
-    response_format=AgentResponse, # type:
-
-    # gnore
-)
-
-model_config_path = "model_config.yaml"
-timelog_state_path = "team_state.json"
-timelog_history_path = "team_history.json"
-
-# using an access token
-auth = Auth.Token("access_token")
-
-# First create a Github instance:
-
-# Public Web Github
-g = Github(auth=auth)
-
-
-# Create an Autogen team that aggregates the outputs.
-class TimeLogTeam:
-    def __init__(self, github_agent: AssistantAgent, calendar_agent: AssistantAgent):
-        self.github_agent = github_agent
-        self.calendar_agent = calendar_agent
-
-        # self.assistant = AssistantAgent(
-        #     "timelog",
-        #     model_client=model_client,
-        #     system_message="You are a time log expert. Retrieve all timelogs and combine them and return an array of it.  When you are done respond with 'DONE'",
-        # )
-
-        self.user_proxy = UserProxyAgent(
-            name="user",
-            input_func=user_input_func,  # Use the user input function.
-        )
-
-    async def run(self, username: str)-> TaskResult:
-        text_termination = TextMentionTermination("DONE")
-        team = RoundRobinGroupChat(
-            [self.github_agent, self.calendar_agent, self.user_proxy],
-            termination_condition=text_termination
-        )
-        result = await team.run(task="Give me a json of of all timelogs in format: {task, date, time, person } . " )
-        print(result)
-        return result
-
 
+def model_client() -> ChatCompletionClient:
+    return get_model_client("timelog", AgentResponse)
 
 
+model_config_path = "model_config.yaml"
 
-async def get_timelog_team(
-    user_input_func: Callable[[str, Optional[CancellationToken]], Awaitable[str]],
-    github_agent: AssistantAgent,
-    calendar_agent: AssistantAgent,
-) -> RoundRobinGroupChat:
-    timelog = AssistantAgent(
-        "timelog",
-        model_client=model_client,
-        system_message="""
+# Instructions of the `timelog` agent that combines the sources' time logs.
+TIMELOG_SYSTEM_MESSAGE = """
           You are a time log expert responsible for returning all timelines and combining them into a single array and returning the final result.
           ***Very Important***: 
           - You are responsible for combining all the timelogs from the tools.
@@ -126,7 +78,166 @@ async def get_timelog_team(
           - If there is an error in the input, the response should be an empty list
           - If the user wants to stop the conversation, the response should be an empty list
 
-          """,
+          """
+
+class SourceResult(BaseModel):
+    source: str
+    ok: bool
+    content: Optional[str] = None
+    error: Optional[str] = None
+    elapsed_ms: float
+
+
+async def _run_source(
+    agent: AssistantAgent,
+    task: str,
+    timeout: float,
+    cancellation_token: Optional[CancellationToken],
+    usage: Optional[RunUsageTracker],
+) -> SourceResult:
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(timeout):
+            result = None
+            async for message in agent.run_stream(task=task, cancellation_token=cancellation_token):
+                if usage is not None:
+                    usage.observe(message, lane=agent.name)
+                if isinstance(message, TaskResult):
+                    result = message
+        content = result.messages[-1].content if result and result.messages else None
+        return SourceResult(
+            source=agent.name,
+            ok=True,
+            content=content if isinstance(content, str) else json.dumps(content, default=str),
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+    except TimeoutError:
+        error = f"timed out after {timeout}s"
+    except Exception as e:
+        error = repr(e)
+    logger.warning(f"Time log source {agent.name} failed: {error}")
+    return SourceResult(source=agent.name, ok=False, error=error, elapsed_ms=(time.perf_counter() - started) * 1000)
+
+
+async def gather_sources(
+    agents: Sequence[AssistantAgent],
+    task: str,
+    cancellation_token: Optional[CancellationToken] = None,
+    usage: Optional[RunUsageTracker] = None,
+) -> List[SourceResult]:
+    """Run the source agents concurrently, each bounded by its `TIMELOG_SOURCE_TIMEOUTS` entry.
+
+    A source that fails or times out is reported in its `SourceResult` instead of failing the others.
+    """
+    return list(
+        await asyncio.gather(
+            *(
+                _run_source(
+                    agent,
+                    task,
+                    settings.TIMELOG_SOURCE_TIMEOUTS.get(agent.name, settings.TIMELOG_SOURCE_TIMEOUT),
+                    cancellation_token,
+                    usage,
+                )
+                for agent in agents
+            )
+        )
+    )
+
+
+async def aggregate_timelogs(
+    task: str,
+    sources: Sequence[SourceResult],
+    cancellation_token: Optional[CancellationToken] = None,
+    usage: Optional[RunUsageTracker] = None,
+) -> TaskResult:
+    """Run the `timelog` agent once over the combined output of all sources."""
+    aggregator = AssistantAgent(
+        "timelog",
+        model_client=model_client(),
+        system_message=TIMELOG_SYSTEM_MESSAGE,
+        model_context=history_context("timelog"),
+    )
+    combined = json.dumps({"task": task, "sources": [source.model_dump() for source in sources]})
+    result = None
+    async for message in aggregator.run_stream(task=combined, cancellation_token=cancellation_token):
+        if usage is not None:
+            usage.observe(message, lane=aggregator.name)
+        if isinstance(message, TaskResult):
+            result = message
+    assert result is not None
+    return result
+
+
+# Create an Autogen team that aggregates the outputs.
+class TimeLogTeam:
+    """Time log team over a GitHub and a calendar agent.
+
+    In `parallel` mode (the default) the source agents fetch their data concurrently and the
+    `timelog` aggregator runs once on the combined result, so a run takes about as long as the
+    slowest source plus one aggregation. `round_robin` keeps the original turn-taking group chat,
+    which asks the user for input through `user_input_func` and so needs one.
+
+    Every `parallel` run starts the source agents from an empty model context, so a team that is
+    run again does not carry the previous run's messages or tool output into the next one.
+    """
+
+    def __init__(
+        self,
+        github_agent: AssistantAgent,
+        calendar_agent: AssistantAgent,
+        mode: Literal["parallel", "round_robin"] = "parallel",
+        user_input_func: Optional[Callable[[str, Optional[CancellationToken]], Awaitable[str]]] = None,
+    ):
+        if mode == "round_robin" and user_input_func is None:
+            raise ValueError("A round_robin time log team needs a user_input_func to ask the user for input")
+        self.github_agent = github_agent
+        self.calendar_agent = calendar_agent
+        self.mode = mode
+        self.user_input_func = user_input_func
+
+    async def run(
+        self,
+        username: str,
+        cancellation_token: Optional[CancellationToken] = None,
+        usage: Optional[RunUsageTracker] = None,
+    ) -> TaskResult:
+        task = "Give me a json of of all timelogs in format: {task, date, time, person } . "
+        if self.mode == "parallel":
+            for agent in (self.github_agent, self.calendar_agent):
+                await agent.on_reset(cancellation_token or CancellationToken())
+            sources = await gather_sources(
+                [self.github_agent, self.calendar_agent], f"{task}Person: {username}", cancellation_token, usage
+            )
+            return await aggregate_timelogs(task, sources, cancellation_token, usage)
+
+        user_proxy = UserProxyAgent(
+            name="user",
+            input_func=self.user_input_func,  # Use the user input function.
+        )
+        text_termination = TextMentionTermination("DONE")
+        team = RoundRobinGroupChat(
+            [self.github_agent, self.calendar_agent, user_proxy],
+            termination_condition=text_termination
+        )
+        result = await team.run(task=task)
+        logger.info(f"Round-robin time log team finished after {len(result.messages)} messages: {result.stop_reason}")
+        return result
+
+
+
+
+
+async def get_timelog_team(
+    user_input_func: Callable[[str, Optional[CancellationToken]], Awaitable[str]],
+    github_agent: AssistantAgent,
+    calendar_agent: AssistantAgent,
+) -> RoundRobinGroupChat:
+    timelog = AssistantAgent(
+        "timelog",
+        model_client=model_client(),
+        system_message=TIMELOG_SYSTEM_MESSAGE,
+        model_context=history_context("timelog"),
     )
 
     user_proxy = UserProxyAgent(
@@ -154,10 +265,42 @@ async def get_timelog_team(
 #     print(result)
 #     return result
 
-async def get_timelog_history() -> list[dict[str, Any]]:
-    """Get chat history from file."""
-    if not os.path.exists(timelog_history_path):
-        return []
-    async with aiofiles.open(timelog_state_path, "r") as file:
-        return json.loads(await file.read())
-
+async def review_timelogs(
+    timelogs: List[TimeLog], ambiguous: List[TimeLog], usage: Optional[RunUsageTracker] = None
+) -> AgentResponse:
+    """Ask the model to settle the sessions the rule-based estimator flagged as ambiguous."""
+    reviewer = AssistantAgent(
+        "timelog",
+        model_client=model_client(),
+        system_message="""
+          You are a time log expert. You receive time logs that were already computed from commits
+          and calendar events, and a list of ambiguous coding sessions (mostly outside working hours
+          or unusually long). Decide for each ambiguous session whether it should be kept, shortened
+          or dropped, and never change the computed time logs.
+          The response must contain the computed time logs plus the sessions you kept.
+          """,
+    )
+    task = json.dumps(
+        {
+            "timelogs": [timelog.model_dump() for timelog in timelogs],
+            "ambiguous": [timelog.model_dump() for timelog in ambiguous],
+        }
+    )
+    result = None
+    async for message in reviewer.run_stream(task=task):
+        if usage is not None:
+            usage.observe(message)
+        if isinstance(message, TaskResult):
+            result = message
+    content = result.messages[-1].content if result and result.messages else None
+    try:
+        if not isinstance(content, str):
+            raise ValueError(f"expected a JSON reply, got {type(content).__name__}")
+        return AgentResponse.model_validate_json(content)
+    except (ValidationError, ValueError) as e:
+        # The computed time logs stand on their own; only the ambiguous sessions are lost.
+        logger.warning(f"Time log review returned an unusable reply, keeping the estimate: {e!r}")
+        return AgentResponse(
+            thoughts=f"Estimated from commit sessions; {len(ambiguous)} ambiguous sessions could not be reviewed",
+            response=timelogs,
+        )
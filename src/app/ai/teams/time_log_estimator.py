@@ -0,0 +1,212 @@
+"""Rule-based commit/calendar to time log estimation.
+
+Most time logs are plain arithmetic over commit timestamps: commits close together belong to one
+work session, a session starts some time before its first commit, and calendar events take
+precedence over coding time. This module does that math with numpy so the LLM team only has to
+look at the sessions the rules cannot settle.
+"""
+from collections.abc import Sequence
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .time_log import TimeLog
+
+_UNIT = "datetime64[s]"
+
+
+class EstimatorConfig(BaseModel):
+    session_gap_minutes: int = Field(120, description="Commits further apart than this start a new session")
+    first_commit_minutes: int = Field(30, description="Work assumed to precede the first commit of a session")
+    min_session_minutes: int = Field(15, description="Sessions shorter than this after clipping are dropped")
+    max_session_hours: float = Field(10, description="Longer sessions are flagged for review")
+    outside_hours_ratio: float = Field(0.5, description="Share of a session outside working hours that needs review")
+    workday_start: time = time(9, 0)
+    workday_end: time = time(18, 0)
+    timezone: str = "UTC"
+
+
+class CommitInput(BaseModel):
+    date: datetime
+    message: str
+
+
+class CalendarInput(BaseModel):
+    title: str
+    start_date: datetime
+    end_date: datetime
+
+
+class TimeLogEstimate(BaseModel):
+    timelogs: list[TimeLog] = Field(default_factory=list)
+    ambiguous: list[TimeLog] = Field(default_factory=list, description="Sessions the rules could not settle")
+
+    @property
+    def needs_review(self) -> bool:
+        return bool(self.ambiguous)
+
+
+def _to_local_array(values: Sequence[datetime], tz: ZoneInfo) -> np.ndarray:
+    # Naive datetimes are taken as UTC. Local offsets are resolved once per distinct UTC hour, which
+    # keeps DST transitions correct without a per-value timezone conversion.
+    epoch = np.fromiter(
+        ((value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp() for value in values),
+        dtype=np.float64,
+        count=len(values),
+    ).astype(np.int64)
+    hours, inverse = np.unique(epoch // 3600, return_inverse=True)
+    offsets = np.array(
+        [datetime.fromtimestamp(hour * 3600, tz).utcoffset().total_seconds() for hour in hours.tolist()],
+        dtype=np.int64,
+    )
+    return (epoch + offsets[inverse]).astype(_UNIT)
+
+
+def _to_iso(value: datetime, tz: ZoneInfo) -> str:
+    return value.replace(tzinfo=tz).isoformat()
+
+
+def _github_log(task: str, start: datetime, end: datetime, tz: ZoneInfo) -> TimeLog:
+    return TimeLog(task=task, start_date=_to_iso(start, tz), end_date=_to_iso(end, tz), source="github")
+
+
+def _sort_key(timelog: TimeLog) -> datetime:
+    start = datetime.fromisoformat(timelog.start_date)
+    return start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+
+
+def _offset(value: time) -> np.timedelta64:
+    return np.timedelta64(value.hour * 3600 + value.minute * 60 + value.second, "s")
+
+
+def cluster_sessions(times: np.ndarray, gap: np.timedelta64) -> tuple[np.ndarray, np.ndarray]:
+    """Split sorted commit times into sessions.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Index of the first and last commit of every session.
+    """
+    if times.size == 0:
+        empty = np.array([], dtype=np.intp)
+        return empty, empty
+    breaks = np.diff(times) > gap
+    first = np.flatnonzero(np.concatenate(([True], breaks)))
+    last = np.concatenate((first[1:] - 1, [times.size - 1]))
+    return first, last
+
+
+def _subtract_intervals(
+    start: datetime, end: datetime, busy: list[tuple[datetime, datetime]]
+) -> list[tuple[datetime, datetime]]:
+    # `busy` holds the calendar intervals that may overlap [start, end), sorted by start.
+    pieces = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_end <= cursor:
+            continue
+        if busy_start >= end:
+            break
+        if busy_start > cursor:
+            pieces.append((cursor, busy_start))
+        cursor = busy_end
+        if cursor >= end:
+            break
+    if cursor < end:
+        pieces.append((cursor, end))
+    return pieces
+
+
+def _session_task(messages: Sequence[str]) -> str:
+    headline = messages[-1].strip().splitlines()[0] if messages[-1].strip() else "Development work"
+    if len(messages) > 1:
+        headline = f"{headline} (+{len(messages) - 1} commits)"
+    return headline[:255]
+
+
+def estimate_time_logs(
+    commits: Sequence[CommitInput],
+    events: Sequence[CalendarInput] = (),
+    config: EstimatorConfig | None = None,
+) -> TimeLogEstimate:
+    """Estimate time logs from commits and calendar events without calling the LLM.
+
+    Commits are clustered into sessions by `session_gap_minutes`, each session is extended back by
+    `first_commit_minutes` and clipped to working hours. Calendar events are kept as they are and the
+    time they cover is removed from overlapping coding sessions. Sessions that are mostly outside
+    working hours or longer than `max_session_hours` are returned in `ambiguous` instead.
+
+    Parameters
+    ----------
+    commits: Sequence[CommitInput]
+        Commits to estimate from, in any order.
+    events: Sequence[CalendarInput], optional
+        Calendar events of the same person.
+    config: EstimatorConfig | None, optional
+        Estimation rules. Defaults to `EstimatorConfig()`.
+
+    Returns
+    -------
+    TimeLogEstimate
+        Time logs in the `TimeLog` schema, sorted by start date.
+    """
+    config = config or EstimatorConfig()
+    tz = ZoneInfo(config.timezone)
+
+    times = _to_local_array([commit.date for commit in commits], tz)
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+    messages = [commits[i].message for i in order]
+
+    first, last = cluster_sessions(times, np.timedelta64(config.session_gap_minutes * 60, "s"))
+    raw_start = times[first] - np.timedelta64(config.first_commit_minutes * 60, "s")
+    raw_end = times[last]
+
+    day = raw_start.astype("datetime64[D]").astype(_UNIT)
+    start = np.maximum(raw_start, day + _offset(config.workday_start))
+    end = np.minimum(raw_end, day + _offset(config.workday_end))
+
+    raw_seconds = (raw_end - raw_start).astype(np.int64)
+    kept_seconds = np.clip((end - start).astype(np.int64), 0, None)
+    outside_ratio = 1 - kept_seconds / np.maximum(raw_seconds, 1)
+    ambiguous = (outside_ratio > config.outside_hours_ratio) | (raw_seconds > config.max_session_hours * 3600)
+
+    event_starts = _to_local_array([event.start_date for event in events], tz)
+    event_ends = _to_local_array([event.end_date for event in events], tz)
+    event_order = np.argsort(event_starts, kind="stable")
+    event_starts, event_ends = event_starts[event_order], event_ends[event_order]
+    # Events are sorted by start, the running maximum of their ends is sorted too, so the window of
+    # events that can overlap each session is found with two binary searches for all sessions at once.
+    reach = np.maximum.accumulate(event_ends) if event_ends.size else event_ends
+    lower = np.searchsorted(reach, start, side="right")
+    upper = np.searchsorted(event_starts, end, side="left")
+    busy = list(zip(event_starts.tolist(), event_ends.tolist(), strict=True))
+
+    min_session = timedelta(minutes=config.min_session_minutes)
+    raw_start_list, raw_end_list = raw_start.tolist(), raw_end.tolist()
+    start_list, end_list = start.tolist(), end.tolist()
+    estimate = TimeLogEstimate()
+    for i in range(first.size):
+        task = _session_task(messages[first[i] : last[i] + 1])
+        if ambiguous[i]:
+            estimate.ambiguous.append(_github_log(task, raw_start_list[i], raw_end_list[i], tz))
+            continue
+        for piece_start, piece_end in _subtract_intervals(start_list[i], end_list[i], busy[lower[i] : upper[i]]):
+            if piece_end - piece_start >= min_session:
+                estimate.timelogs.append(_github_log(task, piece_start, piece_end, tz))
+
+    for index in event_order:
+        event = events[index]
+        estimate.timelogs.append(
+            TimeLog(
+                task=event.title,
+                start_date=event.start_date.isoformat(),
+                end_date=event.end_date.isoformat(),
+                source="calendar",
+            )
+        )
+
+    estimate.timelogs.sort(key=_sort_key)
+    return estimate
@@ -1,10 +1,11 @@
 """GitHub Toolkit."""
+import asyncio
 from datetime import datetime
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from langchain_core.tools import BaseTool
 from langchain_core.tools.base import BaseToolkit
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
 from src.app.ai.tools.prompt import (
     COMMENT_ON_ISSUE_PROMPT,
@@ -36,7 +37,9 @@ from src.app.ai.tools.prompt import (
 )
 from langchain_community.utilities.github import GitHubAPIWrapper
 
-from src.app.ai.tools.tool import GitHubAction
+from src.app.ai.tools.github_client import AsyncGitHubClient
+from src.app.ai.tools.tool import GitHubAction, GitHubResponseCache
+from src.app.core.config import settings
 
 
 class NoInput(BaseModel):
@@ -206,6 +209,172 @@ class GetRepoCommits(BaseModel):
         ...,
         description="The date to stop fetching commits from",
     )
+OPERATIONS: List[Dict] = [
+    {
+        "mode": "get_issues",
+        "name": "Get Issues",
+        "description": GET_ISSUES_PROMPT,
+        "args_schema": NoInput,
+    },
+    {
+        "mode": "get_issue",
+        "name": "Get Issue",
+        "description": GET_ISSUE_PROMPT,
+        "args_schema": GetIssue,
+    },
+    {
+        "mode": "comment_on_issue",
+        "name": "Comment on Issue",
+        "description": COMMENT_ON_ISSUE_PROMPT,
+        "args_schema": CommentOnIssue,
+    },
+    {
+        "mode": "list_open_pull_requests",
+        "name": "List open pull requests (PRs)",
+        "description": LIST_PRS_PROMPT,
+        "args_schema": NoInput,
+    },
+    {
+        "mode": "get_pull_request",
+        "name": "Get Pull Request",
+        "description": GET_PR_PROMPT,
+        "args_schema": GetPR,
+    },
+    {
+        "mode": "list_pull_request_files",
+        "name": "Overview of files included in PR",
+        "description": LIST_PULL_REQUEST_FILES,
+        "args_schema": GetPR,
+    },
+    {
+        "mode": "create_pull_request",
+        "name": "Create Pull Request",
+        "description": CREATE_PULL_REQUEST_PROMPT,
+        "args_schema": CreatePR,
+    },
+    {
+        "mode": "create_file",
+        "name": "Create File",
+        "description": CREATE_FILE_PROMPT,
+        "args_schema": CreateFile,
+    },
+    {
+        "mode": "read_file",
+        "name": "Read File",
+        "description": READ_FILE_PROMPT,
+        "args_schema": ReadFile,
+    },
+    {
+        "mode": "update_file",
+        "name": "Update File",
+        "description": UPDATE_FILE_PROMPT,
+        "args_schema": UpdateFile,
+    },
+    {
+        "mode": "delete_file",
+        "name": "Delete File",
+        "description": DELETE_FILE_PROMPT,
+        "args_schema": DeleteFile,
+    },
+    {
+        "mode": "list_files_in_main_branch",
+        "name": "Overview of existing files in Main branch",
+        "description": OVERVIEW_EXISTING_FILES_IN_MAIN,
+        "args_schema": NoInput,
+    },
+    {
+        "mode": "list_files_in_bot_branch",
+        "name": "Overview of files in current working branch",
+        "description": OVERVIEW_EXISTING_FILES_BOT_BRANCH,
+        "args_schema": NoInput,
+    },
+    {
+        "mode": "list_branches_in_repo",
+        "name": "List branches in this repository",
+        "description": LIST_BRANCHES_IN_REPO_PROMPT,
+        "args_schema": NoInput,
+    },
+    {
+        "mode": "set_active_branch",
+        "name": "Set active branch",
+        "description": SET_ACTIVE_BRANCH_PROMPT,
+        "args_schema": BranchName,
+    },
+    {
+        "mode": "create_branch",
+        "name": "Create a new branch",
+        "description": CREATE_BRANCH_PROMPT,
+        "args_schema": BranchName,
+    },
+    {
+        "mode": "get_files_from_directory",
+        "name": "Get files from a directory",
+        "description": GET_FILES_FROM_DIRECTORY_PROMPT,
+        "args_schema": DirectoryPath,
+    },
+    {
+        "mode": "search_issues_and_prs",
+        "name": "Search issues and pull requests",
+        "description": SEARCH_ISSUES_AND_PRS_PROMPT,
+        "args_schema": SearchIssuesAndPRs,
+    },
+    {
+        "mode": "search_code",
+        "name": "Search code",
+        "description": SEARCH_CODE_PROMPT,
+        "args_schema": SearchCode,
+    },
+    {
+        "mode": "create_review_request",
+        "name": "Create review request",
+        "description": CREATE_REVIEW_REQUEST_PROMPT,
+        "args_schema": CreateReviewRequest,
+    },
+]
+
+REPO_OPERATIONS: List[Dict] = [
+    {
+        "mode": "get_repo_commits",
+        "name": "Get Repository Commits",
+        "description": GET_REPO_COMMITS_PROMPT,
+        "args_schema": RepositoryName,
+    },
+    {
+        "mode": "get_repo_info",
+        "name": "Get Repository Info",
+        "description": GET_REPO_INFO_PROMPT,
+        "args_schema": RepositoryName,
+    },
+    {
+        "mode": "get_repos_info",
+        "name": "Get Repositories Info",
+        "description": GET_REPOS_INFO_PROMPT,
+        "args_schema": NoInput,
+    },
+]
+
+RELEASE_OPERATIONS: List[Dict] = [
+    {
+        "mode": "get_latest_release",
+        "name": "Get latest release",
+        "description": GET_LATEST_RELEASE_PROMPT,
+        "args_schema": NoInput,
+    },
+    {
+        "mode": "get_releases",
+        "name": "Get releases",
+        "description": GET_RELEASES_PROMPT,
+        "args_schema": NoInput,
+    },
+    {
+        "mode": "get_release",
+        "name": "Get release",
+        "description": GET_RELEASE_PROMPT,
+        "args_schema": TagName,
+    },
+]
+
+
 class GitHubToolkit(BaseToolkit):
     """GitHub Toolkit.
 
@@ -257,7 +426,6 @@ class GitHubToolkit(BaseToolkit):
             Get Pull Request
             Overview of files included in PR
             Create Pull Request
-            List Pull Requests' Files
             Create File
             Read File
             Update File
@@ -338,208 +506,119 @@ class GitHubToolkit(BaseToolkit):
 
     Parameters:
         tools: List[BaseTool]. The tools in the toolkit. Default is an empty list.
+        concurrent_tool_calls: bool. Whether ``arun_tools`` runs independent calls
+            concurrently. Default is True.
+        max_concurrency: int. Calls ``arun_tools`` runs at the same time.
     """  # noqa: E501
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     tools: List[BaseTool] = []
+    api_wrapper: Optional[GitHubAPIWrapper] = None
+    async_client: Optional[AsyncGitHubClient] = None
+    response_cache: Optional[GitHubResponseCache] = None
+    operations: Dict[str, Dict] = {}
+    concurrent_tool_calls: bool = True
+    max_concurrency: int = settings.GITHUB_TOOL_MAX_CONCURRENCY
+
+    _built: Dict[str, BaseTool] = PrivateAttr(default_factory=dict)
 
     @classmethod
     def from_github_api_wrapper(
-        cls, github_api_wrapper: GitHubAPIWrapper, include_release_tools: bool = False
+        cls,
+        github_api_wrapper: GitHubAPIWrapper,
+        include_release_tools: bool = False,
+        async_client: Optional[AsyncGitHubClient] = None,
+        include: Optional[Sequence[str]] = None,
+        cache_ttl: float = settings.GITHUB_TOOL_CACHE_TTL,
+        **kwargs: Any,
     ) -> "GitHubToolkit":
         """Create a GitHubToolkit from a GitHubAPIWrapper.
 
+        Tools are only built when they are first requested.
+
         Args:
             github_api_wrapper: GitHubAPIWrapper. The GitHub API wrapper.
             include_release_tools: bool. Whether to include release-related tools.
                 Defaults to False.
+            async_client: AsyncGitHubClient. Pooled HTTP client the tools use when
+                run asynchronously. Defaults to None, running the wrapper in a thread.
+            include: Sequence[str]. Names or modes of the only tools to offer, which also
+                keeps the other tools' descriptions out of the prompt. Defaults to all.
+            cache_ttl: float. Seconds responses of read-only tools are cached, ``0``
+                disables the cache.
+            **kwargs: Other fields of the toolkit, e.g. ``max_concurrency``.
 
         Returns:
             GitHubToolkit. The GitHub toolkit.
         """
-        operations: List[Dict] = [
-            {
-                "mode": "get_issues",
-                "name": "Get Issues",
-                "description": GET_ISSUES_PROMPT,
-                "args_schema": NoInput,
-            },
-            {
-                "mode": "get_issue",
-                "name": "Get Issue",
-                "description": GET_ISSUE_PROMPT,
-                "args_schema": GetIssue,
-            },
-            {
-                "mode": "comment_on_issue",
-                "name": "Comment on Issue",
-                "description": COMMENT_ON_ISSUE_PROMPT,
-                "args_schema": CommentOnIssue,
-            },
-            {
-                "mode": "list_open_pull_requests",
-                "name": "List open pull requests (PRs)",
-                "description": LIST_PRS_PROMPT,
-                "args_schema": NoInput,
-            },
-            {
-                "mode": "get_pull_request",
-                "name": "Get Pull Request",
-                "description": GET_PR_PROMPT,
-                "args_schema": GetPR,
-            },
-            {
-                "mode": "list_pull_request_files",
-                "name": "Overview of files included in PR",
-                "description": LIST_PULL_REQUEST_FILES,
-                "args_schema": GetPR,
-            },
-            {
-                "mode": "create_pull_request",
-                "name": "Create Pull Request",
-                "description": CREATE_PULL_REQUEST_PROMPT,
-                "args_schema": CreatePR,
-            },
-            {
-                "mode": "list_pull_request_files",
-                "name": "List Pull Requests' Files",
-                "description": LIST_PULL_REQUEST_FILES,
-                "args_schema": GetPR,
-            },
-            {
-                "mode": "create_file",
-                "name": "Create File",
-                "description": CREATE_FILE_PROMPT,
-                "args_schema": CreateFile,
-            },
-            {
-                "mode": "read_file",
-                "name": "Read File",
-                "description": READ_FILE_PROMPT,
-                "args_schema": ReadFile,
-            },
-            {
-                "mode": "update_file",
-                "name": "Update File",
-                "description": UPDATE_FILE_PROMPT,
-                "args_schema": UpdateFile,
-            },
-            {
-                "mode": "delete_file",
-                "name": "Delete File",
-                "description": DELETE_FILE_PROMPT,
-                "args_schema": DeleteFile,
-            },
-            {
-                "mode": "list_files_in_main_branch",
-                "name": "Overview of existing files in Main branch",
-                "description": OVERVIEW_EXISTING_FILES_IN_MAIN,
-                "args_schema": NoInput,
-            },
-            {
-                "mode": "list_files_in_bot_branch",
-                "name": "Overview of files in current working branch",
-                "description": OVERVIEW_EXISTING_FILES_BOT_BRANCH,
-                "args_schema": NoInput,
-            },
-            {
-                "mode": "list_branches_in_repo",
-                "name": "List branches in this repository",
-                "description": LIST_BRANCHES_IN_REPO_PROMPT,
-                "args_schema": NoInput,
-            },
-            {
-                "mode": "set_active_branch",
-                "name": "Set active branch",
-                "description": SET_ACTIVE_BRANCH_PROMPT,
-                "args_schema": BranchName,
-            },
-            {
-                "mode": "create_branch",
-                "name": "Create a new branch",
-                "description": CREATE_BRANCH_PROMPT,
-                "args_schema": BranchName,
-            },
-            {
-                "mode": "get_files_from_directory",
-                "name": "Get files from a directory",
-                "description": GET_FILES_FROM_DIRECTORY_PROMPT,
-                "args_schema": DirectoryPath,
-            },
-            {
-                "mode": "search_issues_and_prs",
-                "name": "Search issues and pull requests",
-                "description": SEARCH_ISSUES_AND_PRS_PROMPT,
-                "args_schema": SearchIssuesAndPRs,
-            },
-            {
-                "mode": "search_code",
-                "name": "Search code",
-                "description": SEARCH_CODE_PROMPT,
-                "args_schema": SearchCode,
-            },
-            {
-                "mode": "create_review_request",
-                "name": "Create review request",
-                "description": CREATE_REVIEW_REQUEST_PROMPT,
-                "args_schema": CreateReviewRequest,
-            },
-        ]
-
-        repo: List[Dict] = [
-            {
-                "mode": "get_repo_commits",
-                "name": "Get Repository Commits",
-                "description": GET_REPO_COMMITS_PROMPT,
-                "args_schema": RepositoryName,
-            },
-            {
-                "mode": "get_repo_info",
-                "name": "Get Repository Info",
-                "description": GET_REPO_INFO_PROMPT,
-                "args_schema": RepositoryName,
-            },
-            {
-                "mode": "get_repos_info",
-                "name": "Get Repositories Info",
-                "description": GET_REPOS_INFO_PROMPT,
-                "args_schema": NoInput,
-            },
-        ]
-
-        release_operations: List[Dict] = [
-            {
-                "mode": "get_latest_release",
-                "name": "Get latest release",
-                "description": GET_LATEST_RELEASE_PROMPT,
-                "args_schema": NoInput,
-            },
-            {
-                "mode": "get_releases",
-                "name": "Get releases",
-                "description": GET_RELEASES_PROMPT,
-                "args_schema": NoInput,
-            },
-            {
-                "mode": "get_release",
-                "name": "Get release",
-                "description": GET_RELEASE_PROMPT,
-                "args_schema": TagName,
-            },
-        ]
-
-        operations = operations + repo + (release_operations if include_release_tools else [])
-        tools = [
-            GitHubAction(
+        available = OPERATIONS + REPO_OPERATIONS + (RELEASE_OPERATIONS if include_release_tools else [])
+        if include is not None:
+            wanted = set(include)
+            unknown = wanted - {op["name"] for op in available} - {op["mode"] for op in available}
+            if unknown:
+                raise ValueError(f"Unknown GitHub tools: {sorted(unknown)}")
+            available = [op for op in available if op["name"] in wanted or op["mode"] in wanted]
+        return cls(
+            api_wrapper=github_api_wrapper,
+            async_client=async_client,
+            response_cache=GitHubResponseCache(cache_ttl) if cache_ttl > 0 else None,
+            operations={op["name"]: op for op in available},
+            **kwargs,
+        )
+
+    @property
+    def tool_names(self) -> List[str]:
+        """Names of the tools in the toolkit, without building them."""
+        return list(self.operations) or [tool.name for tool in self.tools]
+
+    def get_tool(self, name: str) -> BaseTool:
+        """Get one tool by name, building it on first use."""
+        if name in self._built:
+            return self._built[name]
+        if name in self.operations:
+            action = self.operations[name]
+            tool: BaseTool = GitHubAction(
                 name=action["name"],
                 description=action["description"],
                 mode=action["mode"],
-                api_wrapper=github_api_wrapper,
+                api_wrapper=self.api_wrapper,
+                async_client=self.async_client,
+                response_cache=self.response_cache,
                 args_schema=action.get("args_schema", None),
             )
-            for action in operations
-        ]
-        return cls(tools=tools)  # type: ignore[arg-type]
+        else:
+            tool = next((tool for tool in self.tools if tool.name == name), None)
+            if tool is None:
+                raise ValueError(f"Unknown tool {name!r}")
+        self._built[name] = tool
+        return tool
 
     def get_tools(self) -> List[BaseTool]:
         """Get the tools in the toolkit."""
-        return self.tools
\ No newline at end of file
+        return [self.get_tool(name) for name in self.tool_names]
+
+    async def arun_tools(self, calls: Sequence[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Run tool calls, given as ``(tool name, arguments)``, and return their results in order.
+
+        With ``concurrent_tool_calls``, consecutive read-only calls run concurrently, at most
+        ``max_concurrency`` at a time. Calls that change the repository or the active branch
+        run on their own, in order, so the calls after them see their effect.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(name: str, arguments: Dict[str, Any]) -> str:
+            async with semaphore:
+                return await self.get_tool(name).arun(arguments)
+
+        results: List[str] = []
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        for name, arguments in calls:
+            if self.concurrent_tool_calls and getattr(self.get_tool(name), "read_only", False):
+                batch.append((name, arguments))
+                continue
+            results += await asyncio.gather(*(run(*call) for call in batch))
+            batch = []
+            results.append(await run(name, arguments))
+        results += await asyncio.gather(*(run(*call) for call in batch))
+        return results
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""Async, connection-pooled access to the read-only GitHub operations of `GitHubAction`.
+
+Results are formatted like the corresponding `GitHubAPIWrapper` methods, so a tool answers the same
+whether it runs through this client or through the wrapper.
+"""
+
+import base64
+import json
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import httpx
+
+from ...core.config import settings
+
+_MAX_COMMENTS = 10
+_MAX_SEARCH_RESULTS = 5
+
+
+class AsyncGitHubClient:
+    """GitHub REST client on one pooled `httpx.AsyncClient`.
+
+    Parameters
+    ----------
+    repository: str
+        Full name of the repository the tools work on, e.g. `owner/repo`.
+    token: str | None, optional
+        Access token. Defaults to `GITHUB_ACCESS_TOKEN`.
+    active_branch: str | None, optional
+        Branch files are read from. Defaults to the repository's default branch.
+    base_url: str, optional
+        Root of the GitHub API.
+    timeout: float, optional
+        Seconds one request may take.
+    max_connections: int, optional
+        Size of the connection pool.
+    transport: httpx.AsyncBaseTransport | None, optional
+        Transport override, e.g. `httpx.MockTransport` in tests.
+    """
+
+    def __init__(
+        self,
+        repository: str,
+        token: str | None = settings.GITHUB_ACCESS_TOKEN,
+        active_branch: str | None = None,
+        base_url: str = settings.GITHUB_API_URL,
+        timeout: float = settings.GITHUB_HTTP_TIMEOUT,
+        max_connections: int = settings.GITHUB_HTTP_MAX_CONNECTIONS,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.repository = repository
+        self.active_branch = active_branch
+        headers = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self._modes: dict[str, Callable[[str], Awaitable[str]]] = {
+            "get_issues": lambda _: self.get_issues(),
+            "get_issue": lambda query: self.get_issue(int(query)),
+            "list_open_pull_requests": lambda _: self.list_open_pull_requests(),
+            "list_branches_in_repo": lambda _: self.list_branches_in_repo(),
+            "read_file": self.read_file,
+            "search_issues_and_prs": self.search_issues_and_prs,
+            "get_latest_release": lambda _: self.get_latest_release(),
+            "get_releases": lambda _: self.get_releases(),
+            "get_release": self.get_release,
+            "get_repo_info": self.get_repo_info,
+            "get_repo_commits": self.get_repo_commits,
+            "get_repos_info": lambda _: self.get_repos_info(),
+        }
+
+    def supports(self, mode: str) -> bool:
+        return mode in self._modes
+
+    async def run(self, mode: str, query: str) -> str:
+        """Run the operation of `mode`, mirroring `GitHubAPIWrapper.run`."""
+        if mode not in self._modes:
+            raise ValueError(f"Invalid mode {mode}")
+        return await self._modes[mode](query)
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def _get(self, url: str, **params: Any) -> Any:
+        response = await self.http.get(url, params=params or None)
+        response.raise_for_status()
+        return response.json()
+
+    async def _get_all(self, url: str, limit: int | None = None, **params: Any) -> list[Any]:
+        # Follows the `Link: rel="next"` header over the pages of a listing.
+        items: list[Any] = []
+        request_params: dict[str, Any] | None = {"per_page": 100, **params}
+        next_url: str | None = url
+        while next_url is not None and (limit is None or len(items) < limit):
+            response = await self.http.get(next_url, params=request_params)
+            response.raise_for_status()
+            items.extend(response.json())
+            next_url = response.links.get("next", {}).get("url")
+            request_params = None
+        return items if limit is None else items[:limit]
+
+    def _repo_path(self, repository: str | None = None) -> str:
+        repository = repository or self.repository
+        if "/" not in repository:
+            # Tools are often given a bare repository name, resolve it against the configured owner.
+            repository = f"{self.repository.split('/')[0]}/{repository}"
+        return f"/repos/{repository}"
+
+    async def get_issues(self) -> str:
+        issues = await self._get_all(f"{self._repo_path()}/issues", state="open")
+        parsed = [
+            {"title": issue["title"], "number": issue["number"], "opened_by": (issue.get("user") or {}).get("login")}
+            for issue in issues
+            if "pull_request" not in issue
+        ]
+        if not parsed:
+            return "No open issues available"
+        return f"Found {len(parsed)} issues:\n{parsed}"
+
+    async def get_issue(self, issue_number: int) -> str:
+        issue = await self._get(f"{self._repo_path()}/issues/{issue_number}")
+        comments = await self._get(
+            f"{self._repo_path()}/issues/{issue_number}/comments", per_page=_MAX_COMMENTS
+        )
+        return json.dumps(
+            {
+                "number": issue_number,
+                "title": issue["title"],
+                "body": issue["body"],
+                "comments": str([{"body": c["body"], "user": c["user"]["login"]} for c in comments]),
+                "opened_by": str((issue.get("user") or {}).get("login")),
+            }
+        )
+
+    async def list_open_pull_requests(self) -> str:
+        pulls = await self._get_all(f"{self._repo_path()}/pulls", state="open")
+        if not pulls:
+            return "No open pull requests available"
+        parsed = [{"title": pr["title"], "number": pr["number"]} for pr in pulls]
+        return f"Found {len(parsed)} pull requests:\n{parsed}"
+
+    async def list_branches_in_repo(self) -> str:
+        branches = [branch["name"] for branch in await self._get_all(f"{self._repo_path()}/branches")]
+        if not branches:
+            return "No branches found in the repository"
+        branches_str = "\n".join(branches)
+        return f"Found {len(branches)} branches in the repository:\n{branches_str}"
+
+    async def read_file(self, file_path: str) -> str:
+        params = {"ref": self.active_branch} if self.active_branch else {}
+        try:
+            content = await self._get(f"{self._repo_path()}/contents/{file_path}", **params)
+            return base64.b64decode(content["content"]).decode("utf-8")
+        except (httpx.HTTPError, KeyError, TypeError) as e:
+            return f"File not found `{file_path}` on branch`{self.active_branch}`. Error: {str(e)}"
+
+    async def search_issues_and_prs(self, query: str) -> str:
+        result = await self._get(
+            "/search/issues", q=f"{query} repo:{self.repository}", per_page=_MAX_SEARCH_RESULTS
+        )
+        items = result["items"][:_MAX_SEARCH_RESULTS]
+        lines = [f"Top {len(items)} results:"]
+        lines += [f"Title: {item['title']}, Number: {item['number']}, State: {item['state']}" for item in items]
+        return "\n".join(lines)
+
+    async def get_latest_release(self) -> str:
+        release = await self._get(f"{self._repo_path()}/releases/latest")
+        return f"Latest title: {release['name']} tag: {release['tag_name']} body: {release['body']}"
+
+    async def get_releases(self) -> str:
+        releases = await self._get(f"{self._repo_path()}/releases", per_page=_MAX_SEARCH_RESULTS)
+        lines = [f"Top {len(releases)} results:"]
+        lines += [
+            f"Title: {release['name']}, Tag: {release['tag_name']}, Body: {release['body']}" for release in releases
+        ]
+        return "\n".join(lines)
+
+    async def get_release(self, tag_name: str) -> str:
+        release = await self._get(f"{self._repo_path()}/releases/tags/{tag_name}")
+        return f"Release: {release['name']} tag: {release['tag_name']} body: {release['body']}"
+
+    async def get_repo_info(self, repo_name: str) -> str:
+        repo = await self._get(self._repo_path(repo_name or None))
+        fields = ["full_name", "description", "default_branch", "language", "visibility", "pushed_at", "html_url"]
+        return json.dumps({field: repo.get(field) for field in fields})
+
+    async def get_repo_commits(self, repo_name: str) -> str:
+        commits = await self._get_all(f"{self._repo_path(repo_name or None)}/commits", limit=100)
+        return json.dumps(
+            [
+                {
+                    "sha": commit["sha"],
+                    "message": commit["commit"]["message"],
+                    "author_name": commit["commit"]["author"]["name"],
+                    "date": commit["commit"]["author"]["date"],
+                }
+                for commit in commits
+            ]
+        )
+
+    async def get_repos_info(self) -> str:
+        repos = await self._get_all("/user/repos", sort="pushed")
+        return json.dumps([{"full_name": repo["full_name"], "description": repo["description"]} for repo in repos])
@@ -8,24 +8,128 @@ To use this tool, you must first set as environment variables:
 
 """
 
-from typing import Any, Optional, Type
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, Type
 
-from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_community.utilities.github import GitHubAPIWrapper
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
 from langchain_core.tools import BaseTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
-from langchain_community.utilities.github import GitHubAPIWrapper
+from .github_client import AsyncGitHubClient
+
+# Modes that only read from GitHub; every other mode changes the repository or the wrapper's state.
+READ_ONLY_MODES = frozenset(
+    {
+        "get_issues",
+        "get_issue",
+        "list_open_pull_requests",
+        "get_pull_request",
+        "list_pull_request_files",
+        "list_files_in_main_branch",
+        "list_files_in_bot_branch",
+        "list_branches_in_repo",
+        "get_files_from_directory",
+        "read_file",
+        "search_issues_and_prs",
+        "search_code",
+        "get_latest_release",
+        "get_releases",
+        "get_release",
+        "get_repo_commits",
+        "get_repo_info",
+        "get_repos_info",
+    }
+)
+
+
+class GitHubResponseCache:
+    """Responses of read-only modes by mode and query, kept for `ttl` seconds.
+
+    Any mutating call clears the cache, and a response is only stored if no mutation happened while it
+    was being fetched, so reads never outlive a write that could have changed them.
+
+    Parameters
+    ----------
+    ttl: float
+        Seconds a response is kept.
+    clock: Callable[[], float], optional
+        Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self.clock = clock
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        # Tools run synchronously in worker threads as well as on the event loop.
+        self._lock = threading.Lock()
+
+    def get(self, mode: str, query: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get((mode, query))
+            if entry is None or entry[0] <= self.clock():
+                self._entries.pop((mode, query), None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, mode: str, query: str, value: str, generation: int) -> None:
+        with self._lock:
+            if generation == self.generation:
+                self._entries[(mode, query)] = (self.clock() + self.ttl, value)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
 
 
 class GitHubAction(BaseTool):  # type: ignore[override]
-    """Tool for interacting with the GitHub API."""
+    """Tool for interacting with the GitHub API.
+
+    Run asynchronously, modes supported by `async_client` are served by its pooled HTTP client,
+    on the active branch of `api_wrapper`; the others run `api_wrapper` in a worker thread. With a
+    `response_cache`, read-only modes are answered from it and every other mode clears it.
+    """
 
     api_wrapper: GitHubAPIWrapper = Field(default_factory=GitHubAPIWrapper)  # type: ignore[arg-type]
+    async_client: Optional[AsyncGitHubClient] = None
+    response_cache: Optional[GitHubResponseCache] = None
     mode: str
     name: str = ""
     description: str = ""
     args_schema: Optional[Type[BaseModel]] = None
 
+    _query_field: Optional[str] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _resolve_query_field(self) -> "GitHubAction":
+        # Resolved once here rather than by building the JSON schema on every call.
+        if self.args_schema is not None:
+            field_names = list(self.args_schema.model_fields)
+            if len(field_names) > 1:
+                raise ValueError(f"Expected one argument in tool schema, got {field_names}.")
+            self._query_field = field_names[0] if field_names else ""
+        return self
+
+    @property
+    def read_only(self) -> bool:
+        return self.mode in READ_ONLY_MODES
+
+    def _query(self, instructions: Optional[str], kwargs: dict[str, Any]) -> str:
+        if self._query_field is not None:
+            return str(kwargs.get(self._query_field, "")) if self._query_field else ""
+        if not instructions or instructions == "{}":
+            # Catch other forms of empty input that GPT-4 likes to send.
+            return ""
+        return instructions
+
     def _run(
         self,
         instructions: Optional[str] = "",
@@ -33,20 +137,50 @@ class GitHubAction(BaseTool):  # type: ignore[override]
         **kwargs: Any,
     ) -> str:
         """Use the GitHub API to run an operation."""
-        if not instructions or instructions == "{}":
-            # Catch other forms of empty input that GPT-4 likes to send.
-            instructions = ""
-        if self.args_schema is not None:
-            field_names = list(self.args_schema.schema()["properties"].keys())
-            if len(field_names) > 1:
-                raise AssertionError(
-                    f"Expected one argument in tool schema, got {field_names}."
-                )
-            if field_names:
-                field = field_names[0]
-            else:
-                field = ""
-            query = str(kwargs.get(field, ""))
-        else:
-            query = instructions
-        return self.api_wrapper.run(self.mode, query)
\ No newline at end of file
+        query = self._query(instructions, kwargs)
+        cache = self.response_cache
+        if cache is None:
+            return self.api_wrapper.run(self.mode, query)
+        if not self.read_only:
+            try:
+                return self.api_wrapper.run(self.mode, query)
+            finally:
+                cache.invalidate()
+        generation = cache.generation
+        cached = cache.get(self.mode, query)
+        if cached is not None:
+            return cached
+        result = self.api_wrapper.run(self.mode, query)
+        cache.set(self.mode, query, result, generation)
+        return result
+
+    async def _call(self, query: str) -> str:
+        if self.async_client is not None and self.async_client.supports(self.mode):
+            # `set_active_branch` and `create_branch` run on the wrapper; the client follows its branch.
+            self.async_client.active_branch = self.api_wrapper.active_branch
+            return await self.async_client.run(self.mode, query)
+        return await asyncio.to_thread(self.api_wrapper.run, self.mode, query)
+
+    async def _arun(
+        self,
+        instructions: Optional[str] = "",
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Use the GitHub API to run an operation without blocking the event loop."""
+        query = self._query(instructions, kwargs)
+        cache = self.response_cache
+        if cache is None:
+            return await self._call(query)
+        if not self.read_only:
+            try:
+                return await self._call(query)
+            finally:
+                cache.invalidate()
+        generation = cache.generation
+        cached = cache.get(self.mode, query)
+        if cached is not None:
+            return cached
+        result = await self._call(query)
+        cache.set(self.mode, query, result, generation)
+        return result
\ No newline at end of file
@@ -1,13 +1,15 @@
 from typing import Annotated, Any
 
-from fastapi import Depends, HTTPException, Request
+from fastapi import Depends, HTTPException, Query, Request, WebSocketException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.config import settings
 from ..core.db.database import async_get_db
 from ..core.exceptions.http_exceptions import ForbiddenException, RateLimitException, UnauthorizedException
 from ..core.logger import logging
+from ..core.schemas import TokenData
 from ..core.security import oauth2_scheme, verify_token
+from ..core.utils.tracing import span
 from ..crud.crud_users import crud_users
 
 logger = logging.getLogger(__name__)
@@ -24,7 +26,8 @@ async def get_current_user(
         raise UnauthorizedException("User not authenticated.")
 
 
-    user = await crud_users.get(db=db, uuid=token_data.id, is_deleted=False)
+    with span("auth.user_lookup"):
+        user = await crud_users.get(db=db, uuid=token_data.id, is_deleted=False)
     if user:
         return user
 
@@ -64,4 +67,23 @@ async def get_current_superuser(current_user: Annotated[dict, Depends(get_curren
     return current_user
 
 
+async def get_current_owner(user_id: str, current_user: Annotated[dict, Depends(get_current_user)]) -> dict:
+    """The current user, if the `user_id` path parameter is theirs.
 
+    Resolved before the endpoint runs, so `@cache` never serves one user's entries to another.
+    """
+    if current_user["id"] != user_id:
+        raise ForbiddenException()
+
+    return current_user
+
+
+async def get_websocket_user(
+    token: Annotated[str | None, Query()] = None, db: AsyncSession = Depends(async_get_db)
+) -> TokenData:
+    """Authenticate a WebSocket from its `token` query parameter, browsers cannot set headers on the handshake."""
+    token_data = await verify_token(token, db) if token else None
+    if token_data is None:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="User not authenticated.")
+
+    return token_data
@@ -1,25 +1,31 @@
 import asyncio
+import contextlib
 import json
+import uuid as uuid_pkg
 from keyword import kwlist
 from typing import Annotated, Any
 
-import aiofiles
-from autogen_agentchat.base import TaskResult
-from autogen_agentchat.messages import TextMessage, UserInputRequestedEvent
-from autogen_core import CancellationToken
 from fastapi import APIRouter, Depends, Request, WebSocket, WebSocketDisconnect
 from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...ai.agents.calender import CalendarAgent
-from ...ai.agents.github import GitHubAgent
-from ...ai.teams.time_log import get_timelog_team, get_timelog_history, timelog_state_path, timelog_history_path, \
-    TimeLogTeam
-from ...api.dependencies import get_current_superuser, get_current_user, logger
+from ...ai.stores.session_store import get_team_session_store
+from ...api.dependencies import (
+    get_current_owner,
+    get_current_superuser,
+    get_current_user,
+    get_websocket_user,
+    logger,
+)
+from ...api.websocket_manager import manager
 from ...core.config import settings
 from ...core.db.database import async_get_db
-from ...core.exceptions.http_exceptions import ForbiddenException, NotFoundException
-from ...core.utils.cache import cache
+from ...core.exceptions.http_exceptions import BadRequestException, ForbiddenException, NotFoundException
+from ...core.logger import get_sampled_logger
+from ...core.schemas import TokenData
+from ...core.utils.cache import cache, invalidate_tags
+from ...core.utils.tracing import TracedRoute
+from ...crud.crud_agent_runs import crud_agent_runs
 from ...crud.crud_timelog import crud_timelogs
 from ...crud.crud_users import crud_users
 from datetime import datetime
@@ -30,13 +36,18 @@ from pydantic import BaseModel
 from ...models.timelog import TimeLogRead, TimeLogCreate, TimeLogCreateInternal, TimeLogUpdate, TimeLogBatchRead, \
     TimeLogBatchUpsertResponse, TimeLogBatchUpsert, TimeLogBatchUpdate, TimeLogBatchDelete, TimeLogBatchCreate, \
     TimeLogUpdateInternal, TimeLogUpsert, TimeUpsertInternal
+from ...models.agent_run import AgentRunRead
 from ...models.user import UserRead
 
 
 
-router = APIRouter(tags=["time_logs"])
+router = APIRouter(tags=["time_logs"], route_class=TracedRoute)
+
+# Per-message WebSocket logs are sampled.
+ws_logger = get_sampled_logger(f"{__name__}.ws")
 
 @router.post("/user/{user_id}/time_log", response_model=TimeLogRead, status_code=201)
+@cache("user_{user_id}_time_log_cache", resource_id_name="user_id", tags=["user_{user_id}"])
 async def write_time_log(
     request: Request,
     user_id: str,
@@ -52,7 +63,7 @@ async def write_time_log(
         raise ForbiddenException()
 
     time_log_internal_dict = time_log.model_dump()
-    time_log_internal_dict["created_by_user_id"] = db_user["id"]
+    time_log_internal_dict["creator_id"] = db_user["id"]
     time_log_internal = TimeLogCreateInternal(**time_log_internal_dict)
     created_time_log: TimeLogRead = await crud_timelogs.create(db=db, object=time_log_internal)
     return created_time_log
@@ -88,7 +99,6 @@ async def upsert_time_log_batch(
         await db.commit()  # Ensure the changes are committed to the database
         # Extract timelogs from the result and format response
         upserted_time_logs = result.get('data', []) if isinstance(result, dict) else result
-        return TimeLogBatchRead(timelogs=upserted_time_logs, failed_entries=[])
         
     except Exception as e:
         # If batch operation fails, return all as failed entries
@@ -98,9 +108,13 @@ async def upsert_time_log_batch(
         ]
         return TimeLogBatchRead(timelogs=[], failed_entries=failed_entries)
 
+    # The batch route has no `user_id` for `@cache`, the user's cached reads are dropped here.
+    await invalidate_tags(f"user_{current_user['id']}")
+    return TimeLogBatchRead(timelogs=upserted_time_logs, failed_entries=[])
+
 
 @router.patch("/user/{user_id}/time_logs/batch")
-@cache("user_{user_id}_time_log_cache", pattern_to_invalidate_extra=["user_{user_id}_time_logs:*"])
+@cache("user_{user_id}_time_log_cache", resource_id_name="user_id", tags=["user_{user_id}"])
 async def update_time_logs_batch(
     request: Request,
     user_id: str,
@@ -115,7 +129,7 @@ async def update_time_logs_batch(
     if current_user["id"] != db_user["id"]:
         raise ForbiddenException()
 
-    filters = {"created_by_user_id": db_user["id"], "is_deleted": False}
+    filters = {"creator_id": db_user["id"], "is_deleted": False}
     
     if batch_update.start_date:
         filters["created_at__gte"] = batch_update.start_date
@@ -134,7 +148,7 @@ async def update_time_logs_batch(
     return {"message": "Time Logs batch updated"}
 
 @router.delete("/user/{user_id}/time_logs/batch")
-@cache("user_{user_id}_time_log_cache", pattern_to_invalidate_extra=["user_{user_id}_time_logs:*"])
+@cache("user_{user_id}_time_log_cache", resource_id_name="user_id", tags=["user_{user_id}"])
 async def erase_time_logs_batch(
     request: Request,
     user_id: str,
@@ -149,7 +163,7 @@ async def erase_time_logs_batch(
     if current_user["id"] != db_user["id"]:
         raise ForbiddenException()
 
-    filters = {"created_by_user_id": db_user["id"], "is_deleted": False}
+    filters = {"creator_id": db_user["id"], "is_deleted": False}
     
     if batch_delete.start_date:
         filters["created_at__gte"] = batch_delete.start_date
@@ -169,12 +183,14 @@ async def erase_time_logs_batch(
 @router.get("/user/{user_id}/time_logs", response_model=PaginatedListResponse[TimeLogRead])
 @cache(
     key_prefix="user_{user_id}_time_logs:page_{page}:items_per_page:{items_per_page}",
+    resource_id_name="user_id",
     expiration=60,
+    tags=["user_{user_id}"],
 )
 async def read_time_logs(
     request: Request,
     user_id: str,
-    current_user: Annotated[UserRead, Depends(get_current_user)],
+    current_user: Annotated[UserRead, Depends(get_current_owner)],
     db: Annotated[AsyncSession, Depends(async_get_db)],
     page: int = 1,
     items_per_page: int = 10,
@@ -184,7 +200,7 @@ async def read_time_logs(
         offset=compute_offset(page, items_per_page),
         limit=items_per_page,
         schema_to_select=TimeLogRead,
-        created_by_user_id=current_user['id'],
+        creator_id=current_user['id'],
         is_deleted=False,
     )
 
@@ -192,18 +208,19 @@ async def read_time_logs(
     return response
 
 @router.get("/user/{user_id}/time_log/{id}", response_model=TimeLogRead)
-@cache(key_prefix="user_{user_id}_time_log_cache", resource_id_name="id")
+@cache(key_prefix="user_{user_id}_time_log_cache", resource_id_name="id", tags=["user_{user_id}"])
 async def read_time_log(
     request: Request,
+    user_id: str,
     id: int,
-    current_user: Annotated[UserRead, Depends(get_current_user)],
+    current_user: Annotated[UserRead, Depends(get_current_owner)],
     db: Annotated[AsyncSession, Depends(async_get_db)],
 ) -> dict:
     db_time_log: TimeLogRead | None = await crud_timelogs.get(
         db=db,
         schema_to_select=TimeLogRead,
         id=id,
-        created_by_user_id=current_user["id"],
+        creator_id=current_user["id"],
         is_deleted=False
     )
     if db_time_log is None:
@@ -212,9 +229,10 @@ async def read_time_log(
     return db_time_log
 
 @router.patch("/user/{user_id}/time_log/{id}")
-@cache("user_{user_id}_time_log_cache", resource_id_name="id", pattern_to_invalidate_extra=["user_{user_id}_time_logs:*"])
+@cache("user_{user_id}_time_log_cache", resource_id_name="id", tags=["user_{user_id}"])
 async def patch_time_log(
     request: Request,
+    user_id: str,
     id: int,
     values: TimeLogUpdate,
     current_user: Annotated[UserRead, Depends(get_current_user)],
@@ -224,7 +242,7 @@ async def patch_time_log(
         db=db,
         schema_to_select=TimeLogRead,
         id=id,
-        created_by_user_id=current_user["id"],
+        creator_id=current_user["id"],
         is_deleted=False
     )
     if db_time_log is None:
@@ -234,9 +252,10 @@ async def patch_time_log(
     return {"message": "Time Log updated"}
 
 @router.delete("/user/{user_id}/time_log/{id}")
-@cache("user_{user_id}_time_log_cache", resource_id_name="id", to_invalidate_extra={"user_{user_id}_time_logs": "user"})
+@cache("user_{user_id}_time_log_cache", resource_id_name="id", tags=["user_{user_id}"])
 async def erase_time_log(
     request: Request,
+    user_id: str,
     id: int,
     current_user: Annotated[UserRead, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(async_get_db)],
@@ -245,7 +264,7 @@ async def erase_time_log(
         db=db,
         schema_to_select=TimeLogRead,
         id=id,
-        created_by_user_id=current_user["id"],
+        creator_id=current_user["id"],
         is_deleted=False
     )
     if db_time_log is None:
@@ -255,7 +274,7 @@ async def erase_time_log(
     return {"message": "Time Log deleted"}
 
 @router.delete("/user/{user_id}/db_time_log/{id}", dependencies=[Depends(get_current_superuser)])
-@cache("user_{user_id}_time_log_cache", resource_id_name="id", to_invalidate_extra={"user_{user_id}_time_logs": "user"})
+@cache("user_{user_id}_time_log_cache", resource_id_name="id", tags=["user_{user_id}"])
 async def erase_db_time_log(
     request: Request, user_id: str, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
@@ -271,74 +290,224 @@ async def erase_db_time_log(
     return {"message": "Time Log deleted from the database"}
 
 @router.get("/timelog")
-async def get_timelog():
+async def get_timelog(
+    current_user: Annotated[UserRead, Depends(get_current_user)],
+    repository: str | None = None,
+    author: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    # The agents pull in autogen, the OpenAI SDK and PyGithub; they are imported on first use so
+    # workers boot without them.
+    from ...ai.agents.calender import calendar_assistant
+    from ...ai.agents.github import GitHubAgent
+    from ...ai.connectors.calendar import get_calendar_connector
+    from ...ai.connectors.collector import TimeEventCollector
+    from ...ai.run_usage import RunUsageTracker
+    from ...ai.teams.time_log import AgentResponse, TimeLogTeam, review_timelogs
+    from ...ai.teams.time_log_estimator import CalendarInput, CommitInput, estimate_time_logs
+
+    # Syncing spends the server's GitHub token and stores the history, only configured repositories may be read.
+    allowed = {name.lower() for name in settings.TIMELOG_REPOSITORIES}
+    if repository is not None and repository.lower() not in allowed:
+        raise ForbiddenException("Repository is not allowed")
+
     github_agent = GitHubAgent(github_token=settings.GITHUB_ACCESS_TOKEN)
-    team_result = await TimeLogTeam(github_agent=github_agent.assistant, calendar_agent=CalendarAgent.assistant).run("John Doe")
+    if repository is not None:
+        # Estimate deterministically and only involve the model for sessions the rules cannot settle.
+        await github_agent.commit_store.sync(repository)
+        commits = await github_agent.commit_store.get_commits(repository, since=since, until=until, author=author)
+        calendar = get_calendar_connector()
+        events = []
+        if calendar is not None:
+            # An unreachable calendar is logged by the collector; the estimate goes on from the commits.
+            collected = await TimeEventCollector([calendar]).collect(since, until, incremental=False)
+            events = [
+                CalendarInput(title=event.title, start_date=event.start, end_date=event.end)
+                for event in collected.events
+            ]
+        estimate = estimate_time_logs(
+            [CommitInput(date=commit.authored_at, message=commit.message) for commit in commits], events
+        )
+        if not estimate.needs_review:
+            return {"message": AgentResponse(thoughts="Estimated from commit sessions", response=estimate.timelogs)}
+        async with RunUsageTracker("timelog") as usage:
+            return {"message": await review_timelogs(estimate.timelogs, estimate.ambiguous, usage=usage)}
+
+    if settings.TIMELOG_TEAM_MODE == "round_robin":
+        # The round-robin team asks the user for input, which only the websocket chat can provide.
+        raise BadRequestException("The round_robin time log team is only available over the /ws chat")
+    team = TimeLogTeam(
+        github_agent=github_agent.assistant, calendar_agent=calendar_assistant(), mode=settings.TIMELOG_TEAM_MODE
+    )
+    async with RunUsageTracker("timelog") as usage:
+        team_result = await team.run("John Doe", usage=usage)
     timelog = next((msg.content for msg in team_result.messages if msg.source == 'timelog'), None)
     return {"message": timelog}
 
+@router.get("/timelog/sessions/{session_id}/history")
+async def read_timelog_session_history(
+    request: Request,
+    session_id: str,
+    current_user: Annotated[UserRead, Depends(get_current_user)],
+    last: int | None = None,
+) -> list[dict[str, Any]]:
+    return await get_team_session_store().get_history(current_user["uuid"], session_id, last=last)
+
+@router.get("/timelog/runs", dependencies=[Depends(get_current_superuser)])
+async def read_active_timelog_runs(request: Request) -> dict[str, Any]:
+    from ...ai.supervisor import run_supervisor
+
+    return {
+        "max_concurrent": run_supervisor.max_concurrent,
+        "max_per_user": run_supervisor.max_per_user,
+        "runs": run_supervisor.active_runs(),
+    }
+
+@router.get("/timelog/usage", response_model=PaginatedListResponse[AgentRunRead], dependencies=[Depends(get_current_superuser)])
+async def read_agent_run_usage(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+    user_id: str | None = None,
+    page: int = 1,
+    items_per_page: int = 10,
+) -> dict:
+    filters = {"user_id": user_id} if user_id is not None else {}
+    runs_data = await crud_agent_runs.get_multi(
+        db=db,
+        offset=compute_offset(page, items_per_page),
+        limit=items_per_page,
+        schema_to_select=AgentRunRead,
+        sort_columns="started_at",
+        sort_orders="desc",
+        **filters,
+    )
+    response: dict[str, Any] = paginated_response(crud_data=runs_data, page=page, items_per_page=items_per_page)
+    return response
+
+@router.get("/timelog/llm-cache", dependencies=[Depends(get_current_superuser)])
+async def read_llm_cache_stats(request: Request) -> dict[str, dict[str, Any]]:
+    from ...ai.stores.response_cache import response_cache_stats
+
+    return response_cache_stats()
+
 # example socket
 @router.websocket("/ws")
-async def timelog_chat(websocket: WebSocket):
-    print("Websocket connected")
-    await websocket.accept()
-    receive_lock = asyncio.Lock()
+async def timelog_chat(
+    websocket: WebSocket,
+    token_data: Annotated[TokenData, Depends(get_websocket_user)],
+    session_id: str | None = None,
+):
+    from autogen_agentchat.base import TaskResult
+    from autogen_agentchat.messages import TextMessage, UserInputRequestedEvent
+    from autogen_core import CancellationToken
+
+    from ...ai.agents.calender import calendar_assistant
+    from ...ai.agents.github import GitHubAgent
+    from ...ai.run_usage import RunUsageTracker
+    from ...ai.supervisor import SupervisedRun, run_supervisor
+    from ...ai.teams.time_log import get_timelog_team
+
+    user_id = token_data.id
+    new_session = session_id is None
+    if session_id is None:
+        session_id = str(uuid_pkg.uuid4())
+    logger.info(f"Websocket connected for user {user_id}, session {session_id}")
+    # Register the socket under its user and its chat session so other parts of the app can reach it.
+    await manager.connect(websocket, user_id=user_id, rooms=[f"timelog_session:{session_id}"])
+    if new_session:
+        await websocket.send_json({"type": "SessionStarted", "content": session_id, "source": "system"})
+    session_store = get_team_session_store()
+    team = None
+    current_run: SupervisedRun | None = None
+    # Frames from the client, or the error reading them failed with; only `_read_frames` receives.
+    inbox: asyncio.Queue[Any] = asyncio.Queue()
+    closed: Exception | None = None
+
+    async def _read_frames() -> None:
+        # Reading runs alongside the team, so a client going away cancels the run it is waiting on.
+        nonlocal closed
+        while True:
+            try:
+                data = await websocket.receive_json()
+            except json.JSONDecodeError as e:
+                logger.warning(f"Invalid JSON from websocket in session {session_id}: {e}")
+                inbox.put_nowait(ValueError("Invalid JSON received"))
+                continue
+            except Exception as e:
+                closed = e
+                inbox.put_nowait(e)
+                if current_run is not None:
+                    current_run.cancel()
+                return
+            inbox.put_nowait(data)
+
+    async def _receive_message() -> TextMessage:
+        item = await inbox.get()
+        if isinstance(item, Exception):
+            if item is closed:
+                # Keep the socket reported as closed for whoever reads next.
+                inbox.put_nowait(item)
+            raise item
+        if not item:
+            raise ValueError("Received empty message")
+        return TextMessage.model_validate(item)
 
     # User input function used by the team.
     async def _user_input(prompt: str, cancellation_token: CancellationToken | None) -> str:
-        print("Before user input requested")
-        async with receive_lock:
+        ws_logger.debug(f"Waiting for user input in session {session_id}")
+        # The user typing holds no run slot and does not count towards the run's time budget.
+        waiting = current_run.waiting() if current_run is not None else contextlib.nullcontext()
+        async with waiting:
             try:
-                # Get user message.
-                data = await websocket.receive_json()
-                if not data:
-                    raise ValueError("Received empty message")
-                message = TextMessage.model_validate(data)
-                print("User input requested")
-                return message.content
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON: {e}")
-                raise ValueError("Invalid JSON received")
+                message = await _receive_message()
             except Exception as e:
-                print(f"Error receiving user input: {e}")
+                logger.warning(f"Error receiving user input in session {session_id}: {e!r}")
                 raise
+        ws_logger.debug(f"Received user input in session {session_id}")
+        return message.content
 
+    reader = asyncio.create_task(_read_frames())
     try:
-        print("Before get_timelog_team")
         while True:
-            async with receive_lock:
-                # Get user message.
-                data = await websocket.receive_json()
-                if not data:
-                    raise ValueError("Received empty message")
-                request = TextMessage.model_validate(data)
-                print(f"Received message: {request.content}")
+            request = await _receive_message()
+            ws_logger.info(f"Received message of {len(request.content)} characters in session {session_id}")
             try:
-                # Get the team and respond to the message.
-                github_agent = GitHubAgent(github_token=settings.GITHUB_ACCESS_TOKEN)
-                team = await get_timelog_team(_user_input, github_agent=github_agent.assistant, calendar_agent=CalendarAgent.assistant)
-                history = await get_timelog_history()
-                if not isinstance(history, list):
-                    history = []
-                stream = team.run_stream(task=request)
-                async for message in stream:
-                    if isinstance(message, TaskResult):
-                        continue
-                    await websocket.send_json(message.model_dump())
-                    if not isinstance(message, UserInputRequestedEvent):
-                        # Don't save user input events to history.
-                        history.append(message.model_dump())
-
-                # Save team state to file.
-                async with aiofiles.open(timelog_state_path, "w") as file:
-                    state = await team.save_state()
-                    await file.write(json.dumps(state))
-
-                # Save chat history to file.
-                async with aiofiles.open(timelog_history_path, "w") as file:
-                    await file.write(json.dumps(history))
-
+                # Build the team once per connection and resume the session's saved state, if any.
+                if team is None:
+                    github_agent = GitHubAgent(github_token=settings.GITHUB_ACCESS_TOKEN)
+                    team = await get_timelog_team(
+                        _user_input, github_agent=github_agent.assistant, calendar_agent=calendar_assistant()
+                    )
+                    state = await session_store.load_state(user_id, session_id)
+                    if state is not None:
+                        await team.load_state(state)
+                # The supervisor caps concurrent runs and cancels this one if the handler exits mid-run.
+                async with (
+                    run_supervisor.run(user_id, session_id) as current_run,
+                    RunUsageTracker("ws", user_id=user_id, session_id=session_id) as usage,
+                ):
+                    stream = team.run_stream(task=request, cancellation_token=current_run.token)
+                    async for message in stream:
+                        usage.observe(message)
+                        if isinstance(message, TaskResult):
+                            continue
+                        await websocket.send_json(message.model_dump())
+                        if not isinstance(message, UserInputRequestedEvent):
+                            # Don't save user input events to history.
+                            await session_store.append_history(user_id, session_id, message.model_dump())
+
+                # Save team state for the session.
+                await session_store.save_state(user_id, session_id, await team.save_state())
+
+            except asyncio.CancelledError:
+                # The run was cancelled because the client went away; anything else cancels the handler.
+                if closed is None:
+                    raise
+                raise closed from None
             except Exception as e:
+                if closed is not None:
+                    raise closed from e
                 # Send error message to client
                 error_message = {
                     "type": "error",
@@ -352,6 +521,8 @@ async def timelog_chat(websocket: WebSocket):
                     "content": "An error occurred. Please try again.",
                     "source": "system"
                 })
+            finally:
+                current_run = None
 
     except WebSocketDisconnect:
         logger.info("Client disconnected")
@@ -366,4 +537,7 @@ async def timelog_chat(websocket: WebSocket):
                 "source": "system"
             })
         except:
-            pass
\ No newline at end of file
+            pass
+    finally:
+        reader.cancel()
+        manager.disconnect(websocket)
\ No newline at end of file
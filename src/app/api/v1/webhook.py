@@ -1,110 +1,39 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Request, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from svix.webhooks import Webhook, WebhookVerificationError
-import os
-import json
 import logging
 
 from ...core.db.database import async_get_db
 from ...core.config import settings
 from fastapi import Depends
 
-from ...crud.crud_users import crud_users
-from ...models.user import UserCreateInternal, UserUpdateInternal
+from ...core.utils import queue
+from ...core.utils.dedupe import webhook_deduplicator
+from ...core.utils.tracing import TracedRoute
+from ...core.worker.webhooks import drain_webhook_inbox, store_webhook_event
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/webhooks",tags=["webhooks"])
+router = APIRouter(prefix="/webhooks",tags=["webhooks"], route_class=TracedRoute)
 
 # Get webhook secret from environment
 WEBHOOK_SECRET = settings.CLERK_SIGNING_SECRET
 if not WEBHOOK_SECRET:
     raise Exception("Missing CLERK_WEBHOOK_SECRET environment variable")
 
-async def process_user_created(event_data: dict, db: AsyncSession):
-    """Handle user.created event"""
-    # Extract user data from the event
-    email_addresses = event_data.get("email_addresses", [])
-    primary_email_id = event_data.get("primary_email_address_id")
-    email = next((e["email_address"] for e in email_addresses if e["id"] == primary_email_id), None)
-    
-    if not email:
-        logger.error(f"No primary email found for user {event_data.get('id')}")
-        return
-    
-    # Create user data
-    user_data = {
-        "name": f"{event_data.get('first_name', '')} {event_data.get('last_name', '')}".strip(),
-        "username": event_data.get('username') or email.split('@')[0],
-        "email": email,
-        "profile_image_url": event_data.get('profile_image_url', 'https://www.gravatar.com/avatar?d=mp'),
-        "uuid": str(event_data.get('id'))  # Ensure the ID is converted to string
-    }
-    
-    try:
-        user_create = UserCreateInternal(**user_data)
-        await crud_users.create(db=db, object=user_create)
-        logger.info(f"User created successfully: {user_data['email']}")
-    except Exception as e:
-        logger.error(f"Error creating user: {str(e)}\nUser data: {user_data}")
-
-async def process_user_updated(event_data: dict, db: AsyncSession):
-    """Handle user.updated event"""
-    user_id = event_data.get("id")
-    
-    # Get existing user
-    db_user = await crud_users.get(db=db, uuid=user_id)
-    if not db_user:
-        error_msg = f"User not found for update: {user_id}"
-        logger.error(error_msg)
-        raise HTTPException(status_code=404, detail=error_msg)
-    
-    # Extract updated data
-    email_addresses = event_data.get("email_addresses", [])
-    primary_email_id = event_data.get("primary_email_address_id")
-    email = next((e["email_address"] for e in email_addresses if e["id"] == primary_email_id), None)
-    
-    update_data = {
-        "name": f"{event_data.get('first_name', '')} {event_data.get('last_name', '')}".strip(),
-        "profile_image_url": event_data.get('profile_image_url')
-    }
-    
-    if email:
-        update_data["email"] = email
-    
-    if event_data.get('username'):
-        update_data["username"] = event_data["username"]
-    
-    try:
-        user_update = UserUpdateInternal(**update_data)
-        await crud_users.update(db=db, object=user_update, uuid=user_id)
-        logger.info(f"User updated successfully: {user_id}")
-    except Exception as e:
-        error_msg = f"Error updating user: {str(e)}"
-        logger.error(f"{error_msg}\nUpdate data: {update_data}")
-        raise HTTPException(status_code=500, detail=error_msg)
-
-async def process_user_deleted(event_data: dict, db: AsyncSession):
-    """Handle user.deleted event"""
-    user_id = event_data.get("id")
-    
-    try:
-        # Get existing user
-        db_user = await crud_users.get(db=db, uuid=user_id)
-        if not db_user:
-            logger.error(f"User not found for deletion: {user_id}")
-            return
-            
-        # Soft delete the user
-        await crud_users.delete(db=db, uuid=user_id)
-        logger.info(f"User deleted successfully: {user_id}")
-    except Exception as e:
-        logger.error(f"Error deleting user: {str(e)}")
+async def schedule_webhook_drain(background_tasks: BackgroundTasks) -> None:
+    """Have the inbox drained: by the arq worker when the queue is up, after the response otherwise."""
+    if queue.pool is not None:
+        # A fixed job id collapses a burst of deliveries into one pending drain.
+        await queue.pool.enqueue_job("drain_webhook_inbox", _job_id="drain_webhook_inbox")
+    else:
+        background_tasks.add_task(drain_webhook_inbox, {})
 
 
 @router.post("/clerk")
 async def clerk_webhook(
     request: Request,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(async_get_db)
 ):
     # Get the raw payload
@@ -140,17 +69,17 @@ async def clerk_webhook(
         logger.error(f"{error_msg}\nPayload: {payload_str[:200]}...\nHeaders: svix-id={svix_id}, svix-timestamp={svix_timestamp}")
         raise HTTPException(status_code=400, detail=error_msg)
     
-    # Process the event based on type
-    event_type = event.get("type")
-    event_data = event.get("data", {})
-    
-    if event_type == "user.created":
-        await process_user_created(event_data, db)
-    elif event_type == "user.updated":
-        await process_user_updated(event_data, db)
-    elif event_type == "user.deleted":
-        await process_user_deleted(event_data, db)
+    # Acknowledge right away; the event is processed from the inbox. Redeliveries share the svix-id
+    # and are answered from the dedupe caches without touching the database.
+    if await webhook_deduplicator.seen(svix_id):
+        logger.info(f"Duplicate webhook delivery {svix_id}")
+        return {"message": "Webhook received"}
+
+    if await store_webhook_event(db, svix_id, event):
+        await schedule_webhook_drain(background_tasks)
     else:
-        print(f"Unhandled event type: {event_type}")
-    
-    return {"message": "Webhook processed successfully"}
\ No newline at end of file
+        webhook_deduplicator.record_inbox_duplicate(svix_id)
+        logger.info(f"Duplicate webhook delivery {svix_id}")
+    await webhook_deduplicator.mark(svix_id)
+
+    return {"message": "Webhook received"}
\ No newline at end of file
@@ -1,20 +1,220 @@
-from fastapi import WebSocket, WebSocketDisconnect
-from typing import List
+import asyncio
+import contextlib
+import json
+import uuid as uuid_pkg
+from collections.abc import Iterable
+
+from fastapi import WebSocket
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from starlette.websockets import WebSocketState
+
+from ..core.config import settings
+from ..core.logger import logging
+
+logger = logging.getLogger(__name__)
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """Registry of open WebSockets indexed by user and room, with fan-out across workers.
+
+    Sends to many sockets run concurrently and each one is bounded by `send_timeout`, so a slow
+    client cannot stall the others; sockets that fail or time out are closed and unregistered.
+
+    When a Redis client is attached with `start`, every user, room and broadcast message is also
+    published on `channel`. Each worker delivers messages to its own sockets directly and the ones
+    published by other workers (or nodes) when they arrive from the subscription.
+
+    Parameters
+    ----------
+    send_timeout: float, optional
+        Seconds a single socket may take to accept a message.
+    channel: str, optional
+        Redis pub/sub channel shared by all workers.
+    reconnect_delay: float, optional
+        Seconds before resubscribing after the subscription is lost, doubled on every failed attempt.
+    max_reconnect_delay: float, optional
+        Upper bound of the delay between two attempts.
+    """
+
+    def __init__(
+        self,
+        send_timeout: float = settings.WEBSOCKET_SEND_TIMEOUT,
+        channel: str = settings.WEBSOCKET_PUBSUB_CHANNEL,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0,
+    ) -> None:
+        self.send_timeout = send_timeout
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.active_connections: set[WebSocket] = set()
+        self.user_connections: dict[str, set[WebSocket]] = {}
+        self.room_connections: dict[str, set[WebSocket]] = {}
+        self._user_of: dict[WebSocket, str] = {}
+        self._rooms_of: dict[WebSocket, set[str]] = {}
+        self._instance_id = uuid_pkg.uuid4().hex
+        self._redis: Redis | None = None
+        self._listener: asyncio.Task | None = None
+
+    # -------------- registry --------------
+    async def connect(
+        self, websocket: WebSocket, user_id: str | None = None, rooms: Iterable[str] = (), accept: bool = True
+    ) -> None:
+        if accept:
+            await websocket.accept()
+        self.active_connections.add(websocket)
+        if user_id is not None:
+            self._user_of[websocket] = user_id
+            self.user_connections.setdefault(user_id, set()).add(websocket)
+        for room in rooms:
+            self.join(websocket, room)
+
+    def disconnect(self, websocket: WebSocket) -> None:
+        self.active_connections.discard(websocket)
+        user_id = self._user_of.pop(websocket, None)
+        if user_id is not None:
+            self._discard(self.user_connections, user_id, websocket)
+        for room in self._rooms_of.pop(websocket, set()):
+            self._discard(self.room_connections, room, websocket)
+
+    def join(self, websocket: WebSocket, room: str) -> None:
+        self.room_connections.setdefault(room, set()).add(websocket)
+        self._rooms_of.setdefault(websocket, set()).add(room)
+
+    def leave(self, websocket: WebSocket, room: str) -> None:
+        self._discard(self.room_connections, room, websocket)
+        rooms = self._rooms_of.get(websocket)
+        if rooms is not None:
+            rooms.discard(room)
+
+    @staticmethod
+    def _discard(index: dict[str, set[WebSocket]], key: str, websocket: WebSocket) -> None:
+        sockets = index.get(key)
+        if sockets is None:
+            return
+        sockets.discard(websocket)
+        if not sockets:
+            del index[key]
+
+    # -------------- local delivery --------------
+    async def _send(self, websocket: WebSocket, message: str) -> bool:
+        if websocket.client_state != WebSocketState.CONNECTED:
+            return False
+        try:
+            await asyncio.wait_for(websocket.send_text(message), timeout=self.send_timeout)
+            return True
+        except Exception as e:
+            logger.debug(f"Websocket send failed: {e!r}")
+            return False
+
+    async def _drop(self, websocket: WebSocket) -> None:
+        self.disconnect(websocket)
+        try:
+            await asyncio.wait_for(websocket.close(), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+    async def _send_many(self, sockets: Iterable[WebSocket], message: str) -> int:
+        # Snapshot the targets: connects and disconnects may happen while the sends are awaited.
+        targets = list(sockets)
+        if not targets:
+            return 0
+        results = await asyncio.gather(*(self._send(websocket, message) for websocket in targets))
+        dead = [websocket for websocket, sent in zip(targets, results, strict=True) if not sent]
+        if dead:
+            logger.info(f"Dropping {len(dead)} of {len(targets)} websockets after failed or timed out sends")
+            await asyncio.gather(*(self._drop(websocket) for websocket in dead))
+        return len(targets) - len(dead)
+
+    async def send_personal_message(self, message: str, websocket: WebSocket) -> bool:
+        return await self._send_many([websocket], message) == 1
+
+    async def _deliver(self, target: str, key: str | None, message: str) -> int:
+        if target == "user":
+            return await self._send_many(self.user_connections.get(key, ()), message)  # type: ignore[arg-type]
+        if target == "room":
+            return await self._send_many(self.room_connections.get(key, ()), message)  # type: ignore[arg-type]
+        return await self._send_many(self.active_connections, message)
+
+    # -------------- fan-out --------------
+    async def _publish(self, target: str, key: str | None, message: str) -> None:
+        if self._redis is None:
+            return
+        envelope = json.dumps({"origin": self._instance_id, "target": target, "key": key, "message": message})
+        try:
+            await self._redis.publish(self.channel, envelope)
+        except Exception as e:
+            logger.error(f"Failed to publish websocket message: {e!r}")
+
+    async def send_to_user(self, user_id: str, message: str) -> int:
+        """Send `message` to every socket of `user_id` on all workers, returns the local delivery count."""
+        await self._publish("user", user_id, message)
+        return await self._deliver("user", user_id, message)
+
+    async def send_to_room(self, room: str, message: str) -> int:
+        """Send `message` to every socket in `room` on all workers, returns the local delivery count."""
+        await self._publish("room", room, message)
+        return await self._deliver("room", room, message)
+
+    async def broadcast(self, message: str) -> int:
+        """Send `message` to every socket on all workers, returns the local delivery count."""
+        await self._publish("all", None, message)
+        return await self._deliver("all", None, message)
+
+    async def _subscribe(self, redis: Redis) -> PubSub:
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        return pubsub
+
+    async def _listen(self, redis: Redis, pubsub: PubSub | None) -> None:
+        # Runs until cancelled: a lost subscription is logged and resubscribed with exponential backoff.
+        delay = self.reconnect_delay
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = await self._subscribe(redis)
+                    logger.info(f"Resubscribed to websocket pub/sub channel {self.channel}")
+                    delay = self.reconnect_delay
+                async for item in pubsub.listen():
+                    try:
+                        envelope = json.loads(item["data"])
+                        if envelope["origin"] == self._instance_id:
+                            continue
+                        await self._deliver(envelope["target"], envelope["key"], envelope["message"])
+                    except Exception as e:
+                        logger.error(f"Failed to deliver websocket message from pub/sub: {e!r}")
+                error = "subscription ended"
+            except Exception as e:
+                error = repr(e)
+            finally:
+                if pubsub is not None:
+                    with contextlib.suppress(Exception):
+                        await pubsub.aclose()
+                    pubsub = None
+            logger.error(f"Lost websocket pub/sub subscription ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+    async def start(self, redis: Redis) -> None:
+        """Subscribe to the fan-out channel so messages published by other workers reach local sockets."""
+        if self._listener is not None:
+            return
+        pubsub = await self._subscribe(redis)
+        self._redis = redis
+        self._listener = asyncio.create_task(self._listen(redis, pubsub))
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.warning(f"Websocket pub/sub listener failed before shutdown: {e!r}")
+        self._listener = None
+        self._redis = None
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+manager = ConnectionManager()
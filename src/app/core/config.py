@@ -1,10 +1,12 @@
 from enum import Enum
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class PydanticBaseSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file='src/.env', extra='ignore')
 
-print("Settings loaded", PydanticBaseSettings())
+
 class AppSettings(PydanticBaseSettings):
     APP_NAME: str = "FastAPI app"
     APP_DESCRIPTION: str | None = None
@@ -21,6 +23,8 @@ class CryptSettings(PydanticBaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     CLERK_SECRET_KEY: str
     CLERK_SIGNING_SECRET: str
+    # Threads hashing passwords and verifying tokens; defaults to the number of cores.
+    CRYPTO_MAX_WORKERS: int | None = None
 
 
 class DatabaseSettings(PydanticBaseSettings):
@@ -118,6 +122,109 @@ class AccessTokenSettings(PydanticBaseSettings):
     GITHUB_ACCESS_TOKEN: str | None = None
 
 
+class CommitStoreSettings(PydanticBaseSettings):
+    COMMIT_STORE_SYNC_INTERVAL: int = 300
+    COMMIT_STORE_BATCH_SIZE: int = 500
+    COMMIT_TOOL_MAX_ITEMS: int = 200
+    # Repositories, as `owner/repo`, that `GET /timelog` may sync with the server's GitHub token.
+    TIMELOG_REPOSITORIES: list[str] = []
+
+
+class TimeLogSessionSettings(PydanticBaseSettings):
+    TIMELOG_SESSION_TTL: int = 604800
+    TIMELOG_SESSION_HISTORY_MAX: int = 500
+
+
+class TimeLogTeamSettings(PydanticBaseSettings):
+    TIMELOG_TEAM_MODE: Literal["parallel", "round_robin"] = "parallel"
+    TIMELOG_SOURCE_TIMEOUT: float = 60.0
+    # Per-source overrides of TIMELOG_SOURCE_TIMEOUT, keyed by agent name.
+    TIMELOG_SOURCE_TIMEOUTS: dict[str, float] = {}
+
+
+class TeamHistorySettings(PydanticBaseSettings):
+    TIMELOG_CONTEXT_MAX_TOKENS: int = 8000
+    TIMELOG_TOOL_OUTPUT_MAX_TOKENS: int = 1000
+    TIMELOG_SUMMARY_MAX_TOKENS: int = 500
+    # Per-agent overrides of the limits above, e.g. {"github": {"max_tokens": 12000}}.
+    TIMELOG_CONTEXT_LIMITS: dict[str, dict[str, int]] = {}
+
+
+class WebSocketSettings(PydanticBaseSettings):
+    WEBSOCKET_SEND_TIMEOUT: float = 5.0
+    WEBSOCKET_PUBSUB_CHANNEL: str = "websocket:fanout"
+
+
+class AgentRunSettings(PydanticBaseSettings):
+    AGENT_RUN_MAX_CONCURRENT: int = 8
+    AGENT_RUN_MAX_PER_USER: int = 2
+    AGENT_RUN_QUEUE_TIMEOUT: float = 30.0
+    AGENT_RUN_TIMEOUT: float = 300.0
+
+
+class ResponseCacheSettings(PydanticBaseSettings):
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL: int = 86400
+    LLM_CACHE_DIR: str = ".cache/llm"
+
+
+class GitHubClientSettings(PydanticBaseSettings):
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_HTTP_TIMEOUT: float = 30.0
+    GITHUB_HTTP_MAX_CONNECTIONS: int = 20
+    GITHUB_TOOL_MAX_CONCURRENCY: int = 4
+    GITHUB_TOOL_CACHE_TTL: float = 60.0
+
+
+class WebhookInboxSettings(PydanticBaseSettings):
+    WEBHOOK_BATCH_SIZE: int = 100
+    WEBHOOK_MAX_ATTEMPTS: int = 5
+    # Svix retries a delivery for about a day and a half.
+    WEBHOOK_DEDUPE_TTL: int = 259200
+    WEBHOOK_DEDUPE_LOCAL_SIZE: int = 10000
+
+
+class LoggingSettings(PydanticBaseSettings):
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    # Directory of the rotating `app.log`; `src/app/logs` when unset.
+    LOG_DIR: str | None = None
+    # Share of the records below WARNING kept by sampled loggers, e.g. per-message WebSocket logs.
+    LOG_SAMPLE_RATE: float = 0.1
+
+
+class TracingSettings(PydanticBaseSettings):
+    # Where sampled request traces go as OTLP/JSON: nowhere, a JSON lines file or an OTLP/HTTP collector.
+    TRACE_EXPORTER: Literal["none", "file", "otlp"] = "none"
+    TRACE_FILE_PATH: str = "traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    # Share of the requests whose spans are exported, unless the caller's `traceparent` decided it.
+    TRACE_SAMPLE_RATE: float = 1.0
+    # Serve the superuser-only sampling profiler at /debug/profile.
+    PROFILER_ENABLED: bool = False
+
+
+class EventLoopMonitorSettings(PydanticBaseSettings):
+    EVENT_LOOP_MONITOR_ENABLED: bool = True
+    EVENT_LOOP_MONITOR_INTERVAL: float = 0.25
+    # A stall longer than this is logged with the stack of the code blocking the loop.
+    EVENT_LOOP_BLOCKED_THRESHOLD: float = 0.1
+
+
+class UserSyncSettings(PydanticBaseSettings):
+    # Rows per `INSERT ... ON CONFLICT` statement, well below the bind parameter limits.
+    USER_SYNC_CHUNK_SIZE: int = 1000
+
+
+class ConnectorSettings(PydanticBaseSettings):
+    CONNECTOR_TIMEOUT: float = 60.0
+    CONNECTOR_PAGE_SIZE: int = 200
+    # Google Calendar time logs are estimated against; no calendar is read when CALENDAR_ID is unset.
+    CALENDAR_ID: str | None = None
+    CALENDAR_ACCESS_TOKEN: str | None = None
+    CALENDAR_API_URL: str = "https://www.googleapis.com/calendar/v3"
+
+
 db_type = PostgresSettings
 if EnvironmentSettings().DB_ENGINE == DBOption.SQLITE:
     db_type = SQLiteSettings
@@ -136,7 +243,21 @@ class Settings(
     DefaultRateLimitSettings,
     EnvironmentSettings,
     AISettings,
-    AccessTokenSettings
+    AccessTokenSettings,
+    CommitStoreSettings,
+    TimeLogSessionSettings,
+    TeamHistorySettings,
+    TimeLogTeamSettings,
+    WebSocketSettings,
+    AgentRunSettings,
+    ResponseCacheSettings,
+    ConnectorSettings,
+    GitHubClientSettings,
+    WebhookInboxSettings,
+    UserSyncSettings,
+    LoggingSettings,
+    TracingSettings,
+    EventLoopMonitorSettings,
 ):
     pass
 
@@ -1,7 +1,11 @@
-from sqlalchemy.ext.asyncio import create_async_engine
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
-from ..config import settings, DBOption
+
+from ..config import DBOption, settings
+from ..utils.tracing import instrument_engine
 
 if settings.DB_ENGINE == DBOption.SQLITE:
     DATABASE_URI = settings.SQLITE_URI
@@ -12,9 +16,55 @@ if settings.DB_ENGINE == DBOption.POSTGRES:
     DATABASE_PREFIX = settings.POSTGRES_ASYNC_PREFIX
     DATABASE_URL = f"{DATABASE_PREFIX}{DATABASE_URI}"
 
-async_engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+# The engine holds sockets, so it belongs to one process: it is created by `init_engine`, from the
+# application's lifespan in every worker, and never in a gunicorn master that forks after `--preload`.
+_engine: AsyncEngine | None = None
+
+
+class _LazySessionmaker(sessionmaker):
+    """Session factory that creates the process's engine on first use when nothing bound it yet."""
+
+    def __call__(self, **local_kw: Any) -> Any:
+        if self.kw.get("bind") is None and local_kw.get("bind") is None:
+            init_engine()
+        return super().__call__(**local_kw)
+
+
+local_session = _LazySessionmaker(class_=AsyncSession, expire_on_commit=False)
+
+
+def init_engine() -> AsyncEngine:
+    """Create this process's engine and bind `local_session` to it."""
+    global _engine
+    if _engine is not None:
+        # Pooled connections may have been inherited from a parent process; drop them unclosed.
+        _engine.sync_engine.dispose(close=False)
+    _engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    instrument_engine(_engine)
+    local_session.configure(bind=_engine)
+    return _engine
+
+
+def get_engine() -> AsyncEngine:
+    """This process's engine, created on first use."""
+    return _engine if _engine is not None else init_engine()
+
+
+async def dispose_engine() -> None:
+    """Close the pooled connections of this process's engine; the next session creates a new one."""
+    global _engine
+    if _engine is None:
+        return
+    engine, _engine = _engine, None
+    local_session.configure(bind=None)
+    await engine.dispose()
+
 
-local_session = sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+def __getattr__(name: str) -> Any:
+    # `async_engine` used to be created on import; it now resolves to the lazily created engine.
+    if name == "async_engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def async_get_db() -> AsyncSession:
@@ -0,0 +1,4 @@
+class RunLimitExceededError(Exception):
+    def __init__(self, message: str = "Too many agent runs in progress, try again later.") -> None:
+        self.message = message
+        super().__init__(self.message)
@@ -1,20 +1,138 @@
+"""Application logging.
+
+Records are put on a queue by the thread that logs them and written to the console and the rotating
+log file by a background `QueueListener`, so logging never waits on I/O in the event loop. Records
+carry the ids of the request and the trace they were logged in and are written as JSON lines unless
+`LOG_FORMAT` is `text`. Loggers on hot paths can be sampled with `get_sampled_logger`.
+"""
+import atexit
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any
+
+from .config import settings
 
-LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
+LOG_DIR = settings.LOG_DIR or os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
 LOG_FILE_PATH = os.path.join(LOG_DIR, "app.log")
 
-LOGGING_LEVEL = logging.INFO
-LOGGING_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOGGING_LEVEL = logging.getLevelName(settings.LOG_LEVEL)
+LOGGING_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(request_id)s - %(message)s"
+
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+trace_id: ContextVar[str | None] = ContextVar("trace_id", default=None)
+
+# Attributes every `LogRecord` has; anything else was passed with `extra=` and is added to the JSON.
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "request_id", "trace_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request and trace ids, in the thread that logged them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        record.trace_id = trace_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Let through a `rate` share of the records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "trace_id": getattr(record, "trace_id", None),
+        }
+        entry.update({key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the default, keep the message and the traceback apart for the output formatter.
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_traceback_formatter = logging.Formatter()
+
+
+def _formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(LOGGING_FORMAT)
+
+
+def _output_handlers() -> list[logging.Handler]:
+    console_handler = logging.StreamHandler()
+    file_handler = RotatingFileHandler(LOG_FILE_PATH, maxBytes=10485760, backupCount=5)
+    for handler in (console_handler, file_handler):
+        handler.setLevel(LOGGING_LEVEL)
+        handler.setFormatter(_formatter())
+    return [console_handler, file_handler]
+
+
+queue_handler = _QueueHandler(queue.SimpleQueue())
+queue_handler.addFilter(RequestIdFilter())
+listener = QueueListener(queue_handler.queue, *_output_handlers(), respect_handler_level=True)
+
+
+def _restart_listener_after_fork() -> None:
+    # The writer thread does not survive a fork, e.g. of a preloading gunicorn master; give the
+    # child its own queue and writer.
+    global listener
+    queue_handler.queue = queue.SimpleQueue()
+    listener = QueueListener(queue_handler.queue, *listener.handlers, respect_handler_level=True)
+    listener.start()
+
+
+def stop_logging() -> None:
+    """Write out the queued records and stop the writer thread."""
+    if listener._thread is not None:
+        listener.stop()
+
 
-logging.basicConfig(level=LOGGING_LEVEL, format=LOGGING_FORMAT)
+def get_sampled_logger(name: str, rate: float = settings.LOG_SAMPLE_RATE) -> logging.Logger:
+    """Logger for a hot path that keeps a `rate` share of its records below WARNING."""
+    logger = logging.getLogger(name)
+    if not any(isinstance(f, SamplingFilter) for f in logger.filters):
+        logger.addFilter(SamplingFilter(rate))
+    return logger
 
-file_handler = RotatingFileHandler(LOG_FILE_PATH, maxBytes=10485760, backupCount=5)
-file_handler.setLevel(LOGGING_LEVEL)
-file_handler.setFormatter(logging.Formatter(LOGGING_FORMAT))
 
-logging.getLogger("").addHandler(file_handler)
+logging.getLogger("").setLevel(LOGGING_LEVEL)
+logging.getLogger("").addHandler(queue_handler)
+listener.start()
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
+atexit.register(stop_logging)
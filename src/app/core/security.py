@@ -1,6 +1,13 @@
+import asyncio
 import base64
+import contextvars
+import functools
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
-from typing import Any, Literal
+from types import SimpleNamespace
+from typing import Any, Literal, TypeVar
 
 import bcrypt
 from cryptography.hazmat.primitives.asymmetric import rsa
@@ -14,8 +21,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.crud_users import crud_users
 from .config import settings
+from .logger import logging
 # from .db.crud_token_blacklist import crud_token_blacklist
 from .schemas import TokenBlacklistCreate, TokenData
+from .utils.tracing import span
+
+logger = logging.getLogger(__name__)
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
@@ -24,6 +35,23 @@ REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
+T = TypeVar("T")
+
+# bcrypt and RS256 verification are CPU bound. They run on their own pool, one thread per core, so they
+# neither block the event loop nor queue behind I/O in the default thread pool; bcrypt releases the
+# GIL, so hashes run in parallel. Threads are only started on first use, not in a preloading master.
+crypto_executor = ThreadPoolExecutor(
+    max_workers=settings.CRYPTO_MAX_WORKERS or os.cpu_count() or 1, thread_name_prefix="crypto"
+)
+
+
+async def run_crypto(func: Callable[..., T], *args: Any) -> T:
+    """Run `func(*args)` on the crypto pool, with the caller's context so its spans are recorded."""
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(crypto_executor, functools.partial(context.run, func, *args))
+
+
 class DecodeTokenException(CustomException):
     code = 400
     error_code = "TOKEN__DECODE_ERROR"
@@ -36,13 +64,13 @@ class ExpiredTokenException(CustomException):
     message = "expired token"
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
-    correct_password: bool = bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    correct_password: bool = await run_crypto(bcrypt.checkpw, plain_password.encode(), hashed_password.encode())
     return correct_password
 
 
-def get_password_hash(password: str) -> str:
-    hashed_password: str = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-    return hashed_password
+async def get_password_hash(password: str) -> str:
+    hashed_password: bytes = await run_crypto(bcrypt.hashpw, password.encode(), bcrypt.gensalt())
+    return hashed_password.decode()
 
 
 async def authenticate_user(username_or_email: str, password: str, db: AsyncSession) -> dict[str, Any] | Literal[False]:
@@ -103,7 +131,9 @@ async def verify_token(token: str, db: AsyncSession) -> TokenData | None:
 
     try:
         # payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        payload = jwt_claim(token)
+        payload = await jwt_claim(token)
+        if payload is None:
+            return None
         username_or_email: str = payload.get("email") or payload.get("username")
         user_id = payload.get("id")
         if username_or_email  is None or user_id is None:
@@ -121,19 +151,22 @@ async def verify_token(token: str, db: AsyncSession) -> TokenData | None:
 
 
 
-def jwt_claim(token: str):
+async def jwt_claim(token: str):
 
         try:
-            with Clerk(bearer_auth=settings.CLERK_SECRET_KEY) as sdk:
+            async with Clerk(bearer_auth=settings.CLERK_SECRET_KEY) as sdk:
                 # get key set
-                jdk = sdk.jwks.get()
+                with span("auth.jwks"):
+                    jdk = await sdk.jwks.get_async()
                 first_key = jdk.keys[0]  # Extract the first key
-                decoded = TokenHelper.decode_jwt(token, first_key)  # Pass the first key to decode_jwt
+                with span("auth.verify"):
+                    # Pass the first key to decode_jwt
+                    decoded = await run_crypto(TokenHelper.decode_jwt, token, first_key)
                 if decoded is not None:
                     # handle response
                     return decoded
         except Exception as e:
-            print('error:', e)
+            logger.warning(f"Failed to verify Clerk session token: {e!r}")
             HTTPException(status_code=401, detail="Invalid Token")
 
 
@@ -155,8 +188,14 @@ class TokenHelper:
             format=serialization.PublicFormat.SubjectPublicKeyInfo
         )
 
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def public_key(n: str, e: str):
+        # Clerk rotates its keys rarely; parse each one once instead of on every request.
+        jwk = SimpleNamespace(n=n, e=e)
+        return serialization.load_pem_public_key(TokenHelper.jwk_to_pem(jwk))
+
     @staticmethod
     def decode_jwt(token, jwk):
-        pem = TokenHelper.jwk_to_pem(jwk)
-        public_key = serialization.load_pem_public_key(pem)
+        public_key = TokenHelper.public_key(jwk.n, jwk.e)
         return jwt.decode(token, public_key, algorithms=['RS256'])
\ No newline at end of file
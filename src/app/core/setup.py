@@ -1,3 +1,4 @@
+import threading
 from collections.abc import AsyncGenerator, Callable
 from contextlib import _AsyncGeneratorContextManager, asynccontextmanager
 from typing import Any
@@ -7,31 +8,42 @@ import fastapi
 import redis.asyncio as redis
 from arq import create_pool
 from arq.connections import RedisSettings
-from fastapi import APIRouter, Depends, FastAPI
+from fastapi import APIRouter, Depends, FastAPI, Query
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from sqlmodel import SQLModel
 from starlette.middleware.cors import CORSMiddleware
 
+from ..ai.connectors import calendar
 from ..api.dependencies import get_current_superuser
+from ..api.websocket_manager import manager as websocket_manager
 from ..middleware.client_cache_middleware import ClientCacheMiddleware
+from ..middleware.request_id_middleware import RequestIdMiddleware
+from ..middleware.tracing_middleware import TracingMiddleware
 from .config import (
     AppSettings,
-    ClientSideCacheSettings,    DatabaseSettings,
+    ClientSideCacheSettings,
+    ConnectorSettings,
+    DatabaseSettings,
     EnvironmentOption,
     EnvironmentSettings,
+    EventLoopMonitorSettings,
     RedisCacheSettings,
     RedisQueueSettings,
     RedisRateLimiterSettings,
+    TracingSettings,
     settings,
 )
-from .db.database import async_engine as engine
-from .utils import cache, queue
+from .db import database
+from .utils import cache, profiler, queue
+from .utils.loop_monitor import loop_monitor
+from .utils.tracing import span_exporter
 from ..models import *
 
 # -------------- database --------------
 async def create_tables() -> None:
-    async with engine.begin() as conn:
+    async with database.get_engine().begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
@@ -42,7 +54,18 @@ async def create_redis_cache_pool() -> None:
 
 
 async def close_redis_cache_pool() -> None:
-    await cache.client.aclose()  # type: ignore
+    # Nothing was created in local and development environments.
+    if cache.client is not None:
+        await cache.client.aclose()
+
+
+# -------------- websockets --------------
+async def start_websocket_fanout() -> None:
+    await websocket_manager.start(cache.client)  # type: ignore
+
+
+async def stop_websocket_fanout() -> None:
+    await websocket_manager.stop()
 
 
 # -------------- queue --------------
@@ -51,7 +74,8 @@ async def create_redis_queue_pool() -> None:
 
 
 async def close_redis_queue_pool() -> None:
-    await queue.pool.aclose()  # type: ignore
+    if queue.pool is not None:
+        await queue.pool.aclose()
 
 
 # -------------- rate limit --------------
@@ -63,6 +87,17 @@ async def close_redis_rate_limit_pool() -> None:
     pass
 
 
+# -------------- calendar --------------
+async def create_calendar_client() -> None:
+    calendar.client = calendar.GoogleCalendarClient(settings.CALENDAR_ID)  # type: ignore
+
+
+async def close_calendar_client() -> None:
+    if isinstance(calendar.client, calendar.GoogleCalendarClient):
+        await calendar.client.aclose()
+    calendar.client = None
+
+
 # -------------- application --------------
 async def set_threadpool_tokens(number_of_tokens: int = 100) -> None:
     limiter = anyio.to_thread.current_default_thread_limiter()
@@ -87,6 +122,12 @@ def lifespan_factory(
     async def lifespan(app: FastAPI) -> AsyncGenerator:
         await set_threadpool_tokens()
 
+        if isinstance(settings, EventLoopMonitorSettings) and settings.EVENT_LOOP_MONITOR_ENABLED:
+            loop_monitor.start()
+
+        # Connections are opened here, in each worker, so an app preloaded in a forking master shares none.
+        database.init_engine()
+
         if isinstance(settings, DatabaseSettings) and create_tables_on_start:
             await create_tables()
 
@@ -94,6 +135,7 @@ def lifespan_factory(
         if settings.ENVIRONMENT != EnvironmentOption.LOCAL and settings.ENVIRONMENT != EnvironmentOption.DEVELOPMENT:
             if isinstance(settings, RedisCacheSettings):
                 await create_redis_cache_pool()
+                await start_websocket_fanout()
 
             if isinstance(settings, RedisQueueSettings):
                 await create_redis_queue_pool()
@@ -101,8 +143,15 @@ def lifespan_factory(
             if isinstance(settings, RedisRateLimiterSettings):
                 await create_redis_rate_limit_pool()
 
+        if isinstance(settings, ConnectorSettings) and settings.CALENDAR_ID:
+            await create_calendar_client()
+
         yield
 
+        await close_calendar_client()
+
+        await stop_websocket_fanout()
+
         if isinstance(settings, RedisCacheSettings):
             await close_redis_cache_pool()
 
@@ -112,6 +161,12 @@ def lifespan_factory(
         if isinstance(settings, RedisRateLimiterSettings):
             await close_redis_rate_limit_pool()
 
+        await database.dispose_engine()
+
+        span_exporter.shutdown()
+
+        await loop_monitor.stop()
+
     return lifespan
 
 
@@ -188,9 +243,37 @@ def create_application(
     application = FastAPI(lifespan=lifespan, **kwargs)
     application.include_router(router)
 
+    # Route names, latencies and pool stats are internal, only superusers may scrape them.
+    metrics_router = APIRouter(dependencies=[Depends(get_current_superuser)])
+
+    @metrics_router.get("/metrics", include_in_schema=False)
+    async def metrics() -> fastapi.responses.Response:
+        return fastapi.responses.Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    application.include_router(metrics_router)
+
     if isinstance(settings, ClientSideCacheSettings):
         application.add_middleware(ClientCacheMiddleware, max_age=settings.CLIENT_CACHE_MAX_AGE)
 
+    # Per-route latency and phase histograms, and the trace id on every record logged during a request.
+    application.add_middleware(TracingMiddleware)
+
+    # Every record logged while a request is handled carries its id.
+    application.add_middleware(RequestIdMiddleware)
+
+    if isinstance(settings, TracingSettings) and settings.PROFILER_ENABLED:
+        profiler_router = APIRouter(dependencies=[Depends(get_current_superuser)])
+
+        @profiler_router.get("/debug/profile", include_in_schema=False)
+        async def profile(
+            seconds: float = Query(5.0, gt=0, le=60), interval: float = Query(0.005, ge=0.001, le=1)
+        ) -> fastapi.responses.PlainTextResponse:
+            # Sample this worker's event loop thread from another thread while it keeps serving requests.
+            stacks = await anyio.to_thread.run_sync(profiler.sample_stacks, threading.get_ident(), seconds, interval)
+            return fastapi.responses.PlainTextResponse(profiler.folded(stacks))
+
+        application.include_router(profiler_router)
+
     if isinstance(settings, EnvironmentSettings):
         if settings.ENVIRONMENT != EnvironmentOption.PRODUCTION:
             docs_router = APIRouter()
@@ -1,145 +1,103 @@
 import functools
+import inspect
 import json
-import re
-from collections.abc import Callable
-from typing import Any
+import string
+from collections.abc import Callable, Mapping
+from typing import Annotated, Any, get_args, get_origin
 
 from fastapi import Request, Response
 from fastapi.encoders import jsonable_encoder
 from redis.asyncio import ConnectionPool, Redis
 
-from ..exceptions.cache_exceptions import CacheIdentificationInferenceError, InvalidRequestError, MissingClientError
+from ..exceptions.cache_exceptions import (
+    CacheIdentificationInferenceError,
+    CacheKeyTemplateError,
+    InvalidRequestError,
+    MissingClientError,
+)
+from .tracing import span
 
 pool: ConnectionPool | None = None
 client: Redis | None = None
 
 
-def _infer_resource_id(kwargs: dict[str, Any], resource_id_type: type | tuple[type, ...]) -> int | str:
-    """Infer the resource ID from a dictionary of keyword arguments.
-
-    Parameters
-    ----------
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
-    resource_id_type: Union[type, Tuple[type, ...]]
-        The expected type of the resource ID, which can be integer (int) or a string (str).
-
-    Returns
-    -------
-    Union[None, int, str]
-        The inferred resource ID. If it cannot be inferred or does not match the expected type, it returns None.
-
-    Note
-    ----
-        - When `resource_id_type` is `int`, the function looks for an argument with the key 'id'.
-        - When `resource_id_type` is `str`, it attempts to infer the resource ID as a string.
-    """
-    resource_id: int | str | None = None
-    for arg_name, arg_value in kwargs.items():
-        if isinstance(arg_value, resource_id_type):
-            if (resource_id_type is int) and ("id" in arg_name):
-                resource_id = arg_value
-
-            elif (resource_id_type is int) and ("id" not in arg_name):
-                pass
-
-            elif resource_id_type is str:
-                resource_id = arg_value
-
-    if resource_id is None:
-        raise CacheIdentificationInferenceError
-
-    return resource_id
+class _KeyTemplate:
+    """A cache key template such as `user_{user_id}_time_logs:page_{page}`, bound to an endpoint's parameters.
 
-
-def _extract_data_inside_brackets(input_string: str) -> list[str]:
-    """Extract data inside curly brackets from a given string using regular expressions.
+    The template is parsed once, when the endpoint is decorated, into a positional format string and the names of
+    the parameters filling it, so rendering it for a request is one `str.format` call.
 
     Parameters
     ----------
-    input_string: str
-        The input string in which to find data enclosed within curly brackets.
-
-    Returns
-    -------
-    List[str]
-        A list of strings containing the data found inside the curly brackets within the input string.
-
-    Example
-    -------
-    >>> _extract_data_inside_brackets("The {quick} brown {fox} jumps over the {lazy} dog.")
-    ['quick', 'fox', 'lazy']
+    template: str
+        The template, with parameter names between curly brackets.
+    parameters: Mapping[str, inspect.Parameter]
+        The parameters of the decorated endpoint.
+
+    Raises
+    ------
+    CacheKeyTemplateError
+        If the template uses a name that is not a parameter of the endpoint.
     """
-    data_inside_brackets = re.findall(r"{(.*?)}", input_string)
-    return data_inside_brackets
 
+    __slots__ = ("template", "fields", "_format")
 
-def _construct_data_dict(data_inside_brackets: list[str], kwargs: dict[str, Any]) -> dict[str, Any]:
-    """Construct a dictionary based on data inside brackets and keyword arguments.
-
-    Parameters
-    ----------
-    data_inside_brackets: List[str]
-        A list of keys inside brackets.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+    def __init__(self, template: str, parameters: Mapping[str, inspect.Parameter]) -> None:
+        self.template = template
+        fields: list[str] = []
+        parts: list[str] = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field_name is None:
+                continue
+            if field_name not in parameters:
+                raise CacheKeyTemplateError(f"Cache key template {template!r} uses {field_name!r}, not a parameter.")
+            conversion = f"!{conversion}" if conversion else ""
+            format_spec = f":{format_spec}" if format_spec else ""
+            parts.append(f"{{{len(fields)}{conversion}{format_spec}}}")
+            fields.append(field_name)
+        self.fields = tuple(fields)
+        self._format = "".join(parts).format
 
-    Returns
-    -------
-    Dict[str, Any]: A dictionary with keys from data_inside_brackets and corresponding values from kwargs.
-    """
-    data_dict = {}
-    for key in data_inside_brackets:
-        data_dict[key] = kwargs[key]
-    return data_dict
+    def render(self, kwargs: Mapping[str, Any]) -> str:
+        return self._format(*[kwargs[field] for field in self.fields])
 
 
-def _format_prefix(prefix: str, kwargs: dict[str, Any]) -> str:
-    """Format a prefix using keyword arguments.
+def _resource_id_name(parameters: Mapping[str, inspect.Parameter], resource_id_type: type | tuple[type, ...]) -> str:
+    """Pick the parameter holding the resource ID from the annotations of an endpoint's parameters.
 
     Parameters
     ----------
-    prefix: str
-        The prefix template to be formatted.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+    parameters: Mapping[str, inspect.Parameter]
+        The parameters of the decorated endpoint.
+    resource_id_type: Union[type, Tuple[type, ...]]
+        The expected type of the resource ID, which can be integer (int) or a string (str).
 
     Returns
     -------
-    str: The formatted prefix.
-    """
-    data_inside_brackets = _extract_data_inside_brackets(prefix)
-    data_dict = _construct_data_dict(data_inside_brackets, kwargs)
-    formatted_prefix = prefix.format(**data_dict)
-    return formatted_prefix
-
+    str
+        The name of the last parameter annotated with `resource_id_type`. For `int`, only names containing 'id' count.
 
-def _format_extra_data(to_invalidate_extra: dict[str, str], kwargs: dict[str, Any]) -> dict[str, Any]:
-    """Format extra data based on provided templates and keyword arguments.
-
-    This function takes a dictionary of templates and their associated values and a dictionary of keyword arguments.
-    It formats the templates with the corresponding values from the keyword arguments and returns a dictionary
-    where keys are the formatted templates and values are the associated keyword argument values.
-
-    Parameters
-    ----------
-    to_invalidate_extra: Dict[str, str]
-        A dictionary where keys are templates and values are the associated values.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
-
-    Returns
-    -------
-        Dict[str, Any]: A dictionary where keys are formatted templates and values
-        are associated keyword argument values.
+    Raises
+    ------
+    CacheIdentificationInferenceError
+        If no parameter matches.
     """
-    formatted_extra = {}
-    for prefix, id_template in to_invalidate_extra.items():
-        formatted_prefix = _format_prefix(prefix, kwargs)
-        id = _extract_data_inside_brackets(id_template)[0]
-        formatted_extra[formatted_prefix] = kwargs[id]
+    resource_id_name = None
+    for name, parameter in parameters.items():
+        annotation = parameter.annotation
+        if get_origin(annotation) is Annotated:
+            annotation = get_args(annotation)[0]
+        if not isinstance(annotation, type) or not issubclass(annotation, resource_id_type):
+            continue
+        if resource_id_type is int and "id" not in name:
+            continue
+        resource_id_name = name
+
+    if resource_id_name is None:
+        raise CacheIdentificationInferenceError
 
-    return formatted_extra
+    return resource_id_name
 
 
 async def _delete_keys_by_pattern(pattern: str) -> None:
@@ -174,11 +132,56 @@ async def _delete_keys_by_pattern(pattern: str) -> None:
     if client is None:
         raise MissingClientError
 
-    cursor = -1
-    while cursor != 0:
+    cursor = 0
+    while True:
         cursor, keys = await client.scan(cursor, match=pattern, count=100)
         if keys:
             await client.delete(*keys)
+        if cursor == 0:
+            break
+
+
+def _tag_key(tag: str) -> str:
+    return f"cache_tag:{tag}"
+
+
+async def _tag_cache_key(cache_key: str, tags: list[str], expiration: int) -> None:
+    """Record `cache_key` under each of `tags`; a tag lives as long as its longest-lived key."""
+    if client is None:
+        raise MissingClientError
+
+    async with client.pipeline(transaction=False) as pipe:
+        for tag in tags:
+            tag_key = _tag_key(tag)
+            pipe.sadd(tag_key, cache_key)
+            pipe.expire(tag_key, expiration, nx=True)
+            pipe.expire(tag_key, expiration, gt=True)
+        await pipe.execute()
+
+
+async def invalidate_tags(*tags: str) -> int:
+    """Delete every cached response recorded under one of `tags`, and the tags themselves.
+
+    This is how code outside of a request, e.g. the webhook worker, invalidates the responses the
+    `cache` decorator stored with `tags`. Without a Redis client nothing is cached and nothing is done.
+
+    Parameters
+    ----------
+    tags: str
+        Formatted tags, e.g. `user_42`.
+
+    Returns
+    -------
+    int
+        The number of cached responses deleted.
+    """
+    if client is None or not tags:
+        return 0
+
+    tag_keys = [_tag_key(tag) for tag in tags]
+    keys = await client.sunion(tag_keys)
+    await client.delete(*keys, *tag_keys)
+    return len(keys)
 
 
 def cache(
@@ -188,6 +191,7 @@ def cache(
     resource_id_type: type | tuple[type, ...] = int,
     to_invalidate_extra: dict[str, Any] | None = None,
     pattern_to_invalidate_extra: list[str] | None = None,
+    tags: list[str] | None = None,
 ) -> Callable:
     """Cache decorator for FastAPI endpoints.
 
@@ -200,7 +204,7 @@ def cache(
         A unique prefix to identify the cache key.
     resource_id_name: Any, optional
         The name of the resource ID argument in the decorated function. If provided, it is used directly;
-        otherwise, the resource ID is inferred from the function's arguments.
+        otherwise, it is inferred from the annotations of the function's parameters.
     expiration: int, optional
         The expiration time for the cached data in seconds. Defaults to 3600 seconds (1 hour).
     resource_id_type: Union[type, Tuple[type, ...]], default int
@@ -213,6 +217,10 @@ def cache(
     pattern_to_invalidate_extra: List[str] | None, optional
         A list of string patterns for cache keys that should be invalidated when the decorated function is called.
         This allows for bulk invalidation of cache keys based on a matching pattern.
+    tags: List[str] | None, optional
+        Templates of tags, e.g. `user_{user_id}`. On GET the cached response is recorded under each tag; on other
+        methods every response recorded under the tags is invalidated. `invalidate_tags` does the same from outside
+        a request.
 
     Returns
     -------
@@ -278,12 +286,25 @@ def cache(
     Note
     ----
     - resource_id_type is used only if resource_id is not passed.
+    - The key prefix, tags and invalidation templates are parsed against the function's signature when it is
+      decorated: a template naming something other than a parameter raises `CacheKeyTemplateError` at import.
     - `to_invalidate_extra` and `pattern_to_invalidate_extra` are used for cache invalidation on methods other than GET.
     - Using `pattern_to_invalidate_extra` can be resource-intensive on large datasets. Use it judiciously and
-      consider the potential impact on Redis performance.
+      consider the potential impact on Redis performance. Invalidating `tags` only touches the tagged keys.
     """
 
     def wrapper(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        parameters = signature.parameters
+        id_name = resource_id_name or _resource_id_name(parameters, resource_id_type)
+        key_template = _KeyTemplate(key_prefix, parameters)
+        tag_templates = [_KeyTemplate(tag, parameters) for tag in tags or []]
+        extra_templates = [
+            (_KeyTemplate(prefix, parameters), _KeyTemplate(id_template, parameters))
+            for prefix, id_template in (to_invalidate_extra or {}).items()
+        ]
+        pattern_templates = [_KeyTemplate(pattern, parameters) for pattern in pattern_to_invalidate_extra or []]
+
         @functools.wraps(func)
         async def inner(request: Request, *args: Any, **kwargs: Any) -> Response:
             if client is None:
@@ -291,44 +312,39 @@ def cache(
                 result = await func(request, *args, **kwargs)
                 return result
 
-            if resource_id_name:
-                resource_id = kwargs[resource_id_name]
-            else:
-                resource_id = _infer_resource_id(kwargs=kwargs, resource_id_type=resource_id_type)
-
-            formatted_key_prefix = _format_prefix(key_prefix, kwargs)
-            cache_key = f"{formatted_key_prefix}:{resource_id}"
+            # FastAPI passes every parameter but the request by keyword.
+            values = signature.bind(request, *args, **kwargs).arguments if args else kwargs
+            cache_key = f"{key_template.render(values)}:{values[id_name]}"
             if request.method == "GET":
                 if to_invalidate_extra is not None or pattern_to_invalidate_extra is not None:
                     raise InvalidRequestError
 
-                cached_data = await client.get(cache_key)
+                with span("cache.get") as current:
+                    cached_data = await client.get(cache_key)
+                    if current is not None:
+                        current.attributes["cache.hit"] = cached_data is not None
                 if cached_data:
-                    return json.loads(cached_data.decode())
+                    return json.loads(cached_data)
 
             result = await func(request, *args, **kwargs)
 
             if request.method == "GET":
-                serializable_data = jsonable_encoder(result)
-                serialized_data = json.dumps(serializable_data)
-
-                await client.set(cache_key, serialized_data)
-                await client.expire(cache_key, expiration)
+                serialized_data = json.dumps(jsonable_encoder(result))
 
-                serialized_data = json.loads(serialized_data)
+                with span("cache.set"):
+                    await client.set(cache_key, serialized_data, ex=expiration)
+                    if tag_templates:
+                        await _tag_cache_key(cache_key, [tag.render(values) for tag in tag_templates], expiration)
 
             else:
-                await client.delete(cache_key)
-                if to_invalidate_extra is not None:
-                    formatted_extra = _format_extra_data(to_invalidate_extra, kwargs)
-                    for prefix, id in formatted_extra.items():
-                        extra_cache_key = f"{prefix}:{id}"
-                        await client.delete(extra_cache_key)
-
-                if pattern_to_invalidate_extra is not None:
-                    for pattern in pattern_to_invalidate_extra:
-                        formatted_pattern = _format_prefix(pattern, kwargs)
-                        await _delete_keys_by_pattern(formatted_pattern + "*")
+                extra_keys = [f"{prefix.render(values)}:{id.render(values)}" for prefix, id in extra_templates]
+                await client.delete(cache_key, *extra_keys)
+
+                for pattern in pattern_templates:
+                    await _delete_keys_by_pattern(pattern.render(values) + "*")
+
+                if tag_templates:
+                    await invalidate_tags(*[tag.render(values) for tag in tag_templates])
 
             return result
 
@@ -0,0 +1,128 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from prometheus_client import Counter
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from ..config import settings
+from ..logger import logging
+from . import cache
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_DUPLICATES = Counter(
+    "webhook_duplicate_deliveries_total", "Webhook redeliveries, by the layer that caught them", ["layer"]
+)
+
+
+class DedupeStats(BaseModel):
+    checked: int = 0
+    memory_duplicates: int = 0
+    redis_duplicates: int = 0
+    inbox_duplicates: int = 0
+
+    @property
+    def duplicates(self) -> int:
+        return self.memory_duplicates + self.redis_duplicates + self.inbox_duplicates
+
+
+class DeliveryDeduplicator:
+    """Remembers delivery ids (e.g. `svix-id`) for `ttl` seconds so redeliveries skip the database.
+
+    A bounded in-process LRU answers repeats that hit the same worker, and a Redis key per id, written
+    with `SET NX EX`, covers every worker. Ids are only marked once the delivery is stored durably, so
+    a delivery that failed half-way is never mistaken for a duplicate; the inbox's primary key stays
+    the final guard against concurrent deliveries of the same id.
+
+    Parameters
+    ----------
+    ttl: int, optional
+        Seconds an id is remembered, longer than the sender's retry window.
+    max_local: int, optional
+        Ids kept in the in-process LRU.
+    client: Redis | None, optional
+        Redis client. Defaults to the application's cache client, resolved on every call; without
+        one only the in-process LRU is used.
+    prefix: str, optional
+        Prefix of the Redis keys.
+    """
+
+    def __init__(
+        self,
+        ttl: int = settings.WEBHOOK_DEDUPE_TTL,
+        max_local: int = settings.WEBHOOK_DEDUPE_LOCAL_SIZE,
+        client: Redis | None = None,
+        prefix: str = "webhook_seen:",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_local = max_local
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+        self.stats = DedupeStats()
+        self._local: OrderedDict[str, float] = OrderedDict()
+
+    def _redis(self) -> Redis | None:
+        return self.client or cache.client
+
+    def _seen_locally(self, delivery_id: str) -> bool:
+        expires_at = self._local.get(delivery_id)
+        if expires_at is None:
+            return False
+        if expires_at <= self.clock():
+            del self._local[delivery_id]
+            return False
+        self._local.move_to_end(delivery_id)
+        return True
+
+    def _remember(self, delivery_id: str) -> None:
+        self._local[delivery_id] = self.clock() + self.ttl
+        self._local.move_to_end(delivery_id)
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+
+    def _count(self, layer: str) -> None:
+        setattr(self.stats, f"{layer}_duplicates", getattr(self.stats, f"{layer}_duplicates") + 1)
+        WEBHOOK_DUPLICATES.labels(layer=layer).inc()
+
+    async def seen(self, delivery_id: str) -> bool:
+        """Whether `delivery_id` was already stored; a hit counts as a duplicate."""
+        self.stats.checked += 1
+        if self._seen_locally(delivery_id):
+            self._count("memory")
+            return True
+        client = self._redis()
+        if client is None:
+            return False
+        try:
+            found = await client.exists(f"{self.prefix}{delivery_id}")
+        except Exception as e:
+            logger.warning(f"Delivery dedupe lookup failed, falling back to the inbox: {e!r}")
+            return False
+        if found:
+            self._remember(delivery_id)
+            self._count("redis")
+            return True
+        return False
+
+    async def mark(self, delivery_id: str) -> None:
+        """Remember `delivery_id` once its delivery is stored."""
+        self._remember(delivery_id)
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            await client.set(f"{self.prefix}{delivery_id}", 1, nx=True, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Delivery dedupe write failed: {e!r}")
+
+    def record_inbox_duplicate(self, delivery_id: str) -> None:
+        """Count a duplicate that got past the caches and was caught by the inbox, and remember it."""
+        self._remember(delivery_id)
+        self._count("inbox")
+
+
+webhook_deduplicator = DeliveryDeduplicator()
@@ -0,0 +1,112 @@
+"""Event loop lag and thread pool saturation monitor.
+
+A task on the event loop wakes up every `interval` seconds and records how late it was woken (the
+loop's lag), how many of AnyIO's default thread limiter tokens are borrowed, how many tasks wait for
+one and how many tasks the loop has. A watchdog thread checks that the task keeps waking up; when
+the loop has been stuck for longer than `blocked_threshold` it logs a warning with the stack of the
+code blocking it, e.g. a bcrypt hash or a PyGithub call made without `to_thread`.
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+import anyio.to_thread
+from prometheus_client import Counter, Gauge, Histogram
+
+from ..config import settings
+from ..logger import logging
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "How late the monitor task was woken up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_TASKS = Gauge("event_loop_tasks", "Tasks on the event loop")
+EVENT_LOOP_BLOCKED = Counter("event_loop_blocked_total", "Times the event loop was blocked for too long")
+THREAD_LIMITER_TOKENS = Gauge("thread_limiter_tokens", "Tokens of AnyIO's default thread limiter")
+THREAD_LIMITER_BORROWED = Gauge("thread_limiter_borrowed_tokens", "Threads running sync work for the loop")
+THREAD_LIMITER_WAITING = Gauge("thread_limiter_waiting_tasks", "Tasks waiting for a thread limiter token")
+
+
+class LoopMonitor:
+    """Sample the running event loop and warn with a stack trace when it is blocked.
+
+    Parameters
+    ----------
+    interval: float, optional
+        Seconds between two samples.
+    blocked_threshold: float, optional
+        Seconds the loop may be late to wake the monitor before the blocking code is logged.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.EVENT_LOOP_MONITOR_INTERVAL,
+        blocked_threshold: float = settings.EVENT_LOOP_BLOCKED_THRESHOLD,
+    ) -> None:
+        self.interval = interval
+        self.blocked_threshold = blocked_threshold
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: int | None = None
+        self._heartbeat = 0.0
+
+    def start(self) -> None:
+        """Start monitoring the running loop."""
+        if self._task is not None:
+            return
+        self._stopped.clear()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._sample(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _sample(self) -> None:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self._heartbeat = now = time.monotonic()
+            EVENT_LOOP_LAG_SECONDS.observe(max(now - expected, 0.0))
+            EVENT_LOOP_TASKS.set(len(asyncio.all_tasks()))
+            THREAD_LIMITER_TOKENS.set(limiter.total_tokens)
+            THREAD_LIMITER_BORROWED.set(limiter.borrowed_tokens)
+            THREAD_LIMITER_WAITING.set(limiter.statistics().tasks_waiting)
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self.blocked_threshold / 2):
+            heartbeat = self._heartbeat
+            late = time.monotonic() - heartbeat - self.interval
+            # One warning per stall: the heartbeat only moves once the loop runs again.
+            if late < self.blocked_threshold or heartbeat == reported:
+                continue
+            reported = heartbeat
+            EVENT_LOOP_BLOCKED.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "unavailable\n"
+            del frame
+            logger.warning(f"Event loop blocked for more than {late:.3f}s by:\n{stack.rstrip()}")
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,54 @@
+"""Sampling profiler for a running worker.
+
+`sample_stacks` reads the stack of one thread, normally the event loop's, at a fixed interval from
+another thread, so the profiled code runs unmodified and at full speed. The samples are returned in
+the folded format of flame graph tools (`frame;frame;frame count` per line), which speedscope and
+`flamegraph.pl` read directly.
+"""
+import os
+import sys
+import time
+from collections import Counter
+from types import FrameType
+
+
+def _fold(frame: FrameType | None) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float = 0.005) -> Counter[str]:
+    """Sample the stack of thread `thread_id` every `interval` seconds for `seconds` seconds.
+
+    Parameters
+    ----------
+    thread_id: int
+        `threading.get_ident()` of the thread to profile.
+    seconds: float
+        How long to profile for.
+    interval: float, optional
+        Seconds between two samples.
+
+    Returns
+    -------
+    Counter[str]
+        Number of samples per folded stack, outermost frame first.
+    """
+    stacks: Counter[str] = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stacks[_fold(frame)] += 1
+        del frame
+        time.sleep(interval)
+    return stacks
+
+
+def folded(stacks: Counter[str]) -> str:
+    """Stacks in the folded format, most sampled first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
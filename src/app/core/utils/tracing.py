@@ -0,0 +1,386 @@
+"""Request tracing.
+
+`TracingMiddleware` opens a `Trace` for every HTTP request and code on the request path records the
+phases it spends time in with `span`: authentication, the user lookup, cache reads and writes, SQL
+statements, the endpoint and the serialization of its response. Each request's duration is
+observed in a per-route histogram and each phase in a per-route, per-phase histogram, so
+`/metrics` shows which phase of an endpoint dominates. Sampled traces are exported as OTLP/JSON to
+a JSON lines file or an OpenTelemetry collector by a background thread. The trace id is put in
+`core.logger.trace_id` so every record logged during the request carries it.
+"""
+import asyncio
+import functools
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..config import settings
+from ..logger import LOG_DIR, logging, trace_id
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUEST_SECONDS = Histogram("http_request_seconds", "Wall time of one HTTP request", ["method", "route", "status"])
+HTTP_PHASE_SECONDS = Histogram(
+    "http_request_phase_seconds", "Time one HTTP request spent in a phase, e.g. db.query", ["route", "phase"]
+)
+
+# Span kinds of the OTLP protocol.
+_SPAN_KIND_INTERNAL = 1
+_SPAN_KIND_SERVER = 2
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int = 0
+    kind: int = _SPAN_KIND_INTERNAL
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: bool = False
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+@dataclass
+class Trace:
+    """The spans of one request. It is shared, not copied, by the tasks and threads handling the request."""
+
+    trace_id: str
+    sampled: bool
+    root: Span
+    route: str | None = None
+    spans: list[Span] = field(default_factory=list)
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def _parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    # W3C trace context: version-trace_id-parent_id-flags, e.g. 00-4bf9...4736-00f0...02b7-01
+    parts = header.split("-") if header else []
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[1] == "0" * 32:
+        return None
+    try:
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+@contextmanager
+def trace_request(method: str, traceparent: str | None = None) -> Iterator[Trace]:
+    """Trace the request handled in the block, continuing the caller's trace when `traceparent` is valid.
+
+    On exit the request and its phases are observed in the histograms and the trace is exported
+    when sampled. Set `Trace.route` to the route template and the root span's `http.status_code`
+    attribute before leaving the block.
+    """
+    parent = _parse_traceparent(traceparent)
+    if parent is None:
+        new_trace_id, parent_id = secrets.token_hex(16), None
+        sampled = random.random() < settings.TRACE_SAMPLE_RATE
+    else:
+        new_trace_id, parent_id, sampled = parent
+
+    root = Span(method, new_trace_id, secrets.token_hex(8), parent_id, time.time_ns(), kind=_SPAN_KIND_SERVER)
+    trace = Trace(new_trace_id, sampled, root)
+    tokens = (_current_trace.set(trace), _current_span.set(root), trace_id.set(new_trace_id))
+    try:
+        yield trace
+    except BaseException:
+        root.error = True
+        raise
+    finally:
+        root.end_ns = time.time_ns()
+        _current_trace.reset(tokens[0])
+        _current_span.reset(tokens[1])
+        trace_id.reset(tokens[2])
+        _finish(trace, method)
+
+
+def _finish(trace: Trace, method: str) -> None:
+    # Unmatched paths share one label to keep the number of series bounded.
+    route = trace.route or "unmatched"
+    trace.root.name = f"{method} {route}"
+    trace.root.attributes.update({"http.method": method, "http.route": route})
+    status = trace.root.attributes.get("http.status_code", 500)
+    HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(trace.root.duration)
+
+    phases: dict[str, float] = {}
+    for finished in trace.spans:
+        phases[finished.name] = phases.get(finished.name, 0.0) + finished.duration
+    for phase, seconds in phases.items():
+        HTTP_PHASE_SECONDS.labels(route, phase).observe(seconds)
+
+    if trace.sampled:
+        span_exporter.export(trace)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Record the block as a phase of the current request; outside of a request it records nothing.
+
+    Examples
+    --------
+    >>> with span("cache.get", key=cache_key) as current:
+    ...     cached_data = await client.get(cache_key)
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(name, trace.trace_id, secrets.token_hex(8), parent.span_id if parent else None, time.time_ns())
+    current.attributes.update(attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.spans.append(current)
+
+
+def record_span(name: str, start_ns: int, end_ns: int | None = None, **attributes: Any) -> None:
+    """Record a phase of the current request that was timed elsewhere, e.g. by event hooks."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    finished = Span(
+        name,
+        trace.trace_id,
+        secrets.token_hex(8),
+        parent.span_id if parent else None,
+        start_ns,
+        end_ns if end_ns is not None else time.time_ns(),
+        attributes=attributes,
+    )
+    trace.spans.append(finished)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Record every SQL statement executed through `engine` during a request as a `db.query` span."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info.setdefault("query_start_ns", []).append(time.time_ns())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        start_ns = conn.info["query_start_ns"].pop()
+        record_span("db.query", start_ns, **{"db.statement": statement[:500]})
+
+
+class TracedRoute(APIRoute):
+    """Route that records its template on the trace and times its endpoint and the response serialization.
+
+    FastAPI validates and serializes the endpoint's return value after the endpoint returns; that
+    time up to the response being built is recorded as the `serialization` span. Set it as the
+    `route_class` of the routers whose endpoints should be broken down.
+    """
+
+    def get_route_handler(self) -> Callable:
+        self.dependant.call = _endpoint_span(self.dependant.call)
+        handler = super().get_route_handler()
+        route = self.path_format
+
+        async def traced_handler(request: Request) -> Response:
+            trace = _current_trace.get()
+            if trace is None:
+                return await handler(request)
+            trace.route = route
+            response = await handler(request)
+            endpoint = next((s for s in reversed(trace.spans) if s.name == "endpoint"), None)
+            if endpoint is not None:
+                record_span("serialization", endpoint.end_ns)
+            return response
+
+        return traced_handler
+
+
+def _endpoint_span(endpoint: Callable) -> Callable:
+    if getattr(endpoint, "__traced__", False):
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def traced(*args: Any, **kwargs: Any) -> Any:
+            with span("endpoint", **{"code.function": endpoint.__name__}):
+                return await endpoint(*args, **kwargs)
+
+    else:
+
+        @functools.wraps(endpoint)
+        def traced(*args: Any, **kwargs: Any) -> Any:
+            with span("endpoint", **{"code.function": endpoint.__name__}):
+                return endpoint(*args, **kwargs)
+
+    traced.__traced__ = True  # type: ignore[attr-defined]
+    return traced
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    values = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            values.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            values.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            values.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            values.append({"key": key, "value": {"stringValue": str(value)}})
+    return values
+
+
+def otlp_json(traces: list[Trace], service_name: str = settings.APP_NAME) -> dict[str, Any]:
+    """Traces as an OTLP/JSON `ExportTraceServiceRequest`, as accepted on an OTLP/HTTP `/v1/traces` endpoint."""
+    spans = []
+    for trace in traces:
+        for finished in (trace.root, *trace.spans):
+            spans.append(
+                {
+                    "traceId": finished.trace_id,
+                    "spanId": finished.span_id,
+                    "parentSpanId": finished.parent_id or "",
+                    "name": finished.name,
+                    "kind": finished.kind,
+                    "startTimeUnixNano": str(finished.start_ns),
+                    "endTimeUnixNano": str(finished.end_ns),
+                    "attributes": _otlp_attributes(finished.attributes),
+                    # Status codes: 1 is OK, 2 is ERROR.
+                    "status": {"code": 2 if finished.error else 1},
+                }
+            )
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class SpanExporter:
+    """Export finished traces in batches from a background thread, so requests never wait on it.
+
+    Parameters
+    ----------
+    exporter: str
+        `none` drops the traces, `file` appends one OTLP/JSON object per batch to `file_path` and
+        `otlp` posts it to the OTLP/HTTP `endpoint` of a collector.
+    file_path: str
+        JSON lines file for the `file` exporter, relative to the log directory unless absolute.
+    endpoint: str
+        Traces endpoint of the collector for the `otlp` exporter.
+    max_batch: int, optional
+        Traces per export at most.
+    interval: float, optional
+        Seconds a trace waits at most for its batch to fill up.
+    """
+
+    def __init__(
+        self, exporter: str, file_path: str, endpoint: str, max_batch: int = 512, interval: float = 1.0
+    ) -> None:
+        self.exporter = exporter
+        self.file_path = file_path if os.path.isabs(file_path) else os.path.join(LOG_DIR, file_path)
+        self.endpoint = endpoint
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue: queue.SimpleQueue[Trace | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._failing = False
+
+    def export(self, trace: Trace) -> None:
+        if self.exporter == "none":
+            return
+        # The thread is started on first use, so in the process that exports: not in a forking master.
+        if self._thread is None or self._pid != os.getpid():
+            self._queue = queue.SimpleQueue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+        self._queue.put(trace)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Export the queued traces and stop the thread."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        batch: list[Trace] = []
+        deadline = 0.0
+        while True:
+            try:
+                trace = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0) if batch else None)
+            except queue.Empty:
+                self._write(batch)
+                batch = []
+                continue
+            if trace is None:
+                if batch:
+                    self._write(batch)
+                return
+            if not batch:
+                deadline = time.monotonic() + self.interval
+            batch.append(trace)
+            if len(batch) >= self.max_batch:
+                self._write(batch)
+                batch = []
+
+    def _write(self, batch: list[Trace]) -> None:
+        payload = otlp_json(batch)
+        try:
+            if self.exporter == "file":
+                with open(self.file_path, "a") as file:
+                    file.write(json.dumps(payload) + "\n")
+            else:
+                import httpx
+
+                httpx.post(self.endpoint, json=payload, timeout=5.0).raise_for_status()
+        except Exception as e:
+            # Log once per outage instead of once per batch.
+            if not self._failing:
+                logger.warning(f"Could not export {len(batch)} traces to {self.exporter}: {e!r}")
+            self._failing = True
+        else:
+            self._failing = False
+
+
+span_exporter = SpanExporter(settings.TRACE_EXPORTER, settings.TRACE_FILE_PATH, settings.TRACE_OTLP_ENDPOINT)
@@ -4,6 +4,8 @@ import logging
 import uvloop
 from arq.worker import Worker
 
+from ..db.database import dispose_engine
+
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -21,4 +23,5 @@ async def startup(ctx: Worker) -> None:
 
 
 async def shutdown(ctx: Worker) -> None:
+    await dispose_engine()
     logging.info("Worker end")
@@ -1,14 +1,19 @@
+from arq import cron, func
 from arq.connections import RedisSettings
 
 from ...core.config import settings
 from .functions import sample_background_task, shutdown, startup
+from .webhooks import drain_webhook_inbox
 
 REDIS_QUEUE_HOST = settings.REDIS_QUEUE_HOST
 REDIS_QUEUE_PORT = settings.REDIS_QUEUE_PORT
 
 
 class WorkerSettings:
-    functions = [sample_background_task]
+    # No result is kept for inbox drains so the next delivery can enqueue one under the same job id.
+    functions = [sample_background_task, func(drain_webhook_inbox, keep_result=0)]
+    # Picks up events whose drain was missed and retries failed ones.
+    cron_jobs = [cron(drain_webhook_inbox, second=0, run_at_startup=True)]
     redis_settings = RedisSettings(host=REDIS_QUEUE_HOST, port=REDIS_QUEUE_PORT)
     on_startup = startup
     on_shutdown = shutdown
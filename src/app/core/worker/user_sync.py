@@ -0,0 +1,100 @@
+"""Bulk sync of Clerk users: Clerk user objects are mapped to rows and upserted by `uuid` in chunks."""
+import uuid as uuid_pkg
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.user import User, UserCreateInternal
+from ..config import settings
+from ..logger import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_IMAGE_URL = "https://www.gravatar.com/avatar?d=mp"
+
+# Columns taken from Clerk when a user already exists; `id` and `created_at` are kept.
+SYNCED_COLUMNS = ("name", "username", "email", "profile_image_url")
+
+
+def primary_email(user_data: dict) -> str | None:
+    email_addresses = user_data.get("email_addresses", [])
+    primary_email_id = user_data.get("primary_email_address_id")
+    return next((e["email_address"] for e in email_addresses if e["id"] == primary_email_id), None)
+
+
+def clerk_user_values(user_data: dict) -> dict[str, Any] | None:
+    """Map a Clerk user object to a validated `user` row, `None` if it has no primary email.
+
+    Raises
+    ------
+    pydantic.ValidationError
+        If the user does not satisfy `UserCreateInternal`, e.g. its username is not lowercase.
+    """
+    email = primary_email(user_data)
+    if not email:
+        return None
+    user = UserCreateInternal(
+        name=f"{user_data.get('first_name') or ''} {user_data.get('last_name') or ''}".strip(),
+        username=user_data.get("username") or email.split("@")[0],
+        email=email,
+        uuid=str(user_data.get("id")),
+    )
+    return {
+        **user.model_dump(),
+        "profile_image_url": user_data.get("profile_image_url", DEFAULT_PROFILE_IMAGE_URL),
+    }
+
+
+def _chunks(rows: Iterable[dict[str, Any]], size: int) -> Iterable[list[dict[str, Any]]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def upsert_users(
+    db: AsyncSession, rows: Iterable[dict[str, Any]], chunk_size: int = settings.USER_SYNC_CHUNK_SIZE
+) -> int:
+    """Insert or update users by `uuid`, one `INSERT ... ON CONFLICT (uuid) DO UPDATE` per chunk.
+
+    `rows` are `clerk_user_values` results. Existing users get the synced columns and are restored
+    if they were soft deleted. Nothing is committed.
+
+    Returns
+    -------
+    int
+        The number of rows sent.
+    """
+    insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    upserted = 0
+    for chunk in _chunks(rows, chunk_size):
+        now = datetime.now(timezone.utc)
+        # A statement may not touch the same row twice; the last occurrence of a user wins.
+        by_uuid = {row["uuid"]: row for row in chunk}
+        values = [
+            {
+                **row,
+                "id": str(uuid_pkg.uuid4()),
+                "created_at": now,
+                "is_superuser": False,
+                "is_deleted": False,
+            }
+            for row in by_uuid.values()
+        ]
+        stmt = insert(User).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["uuid"],
+            set_={
+                **{column: stmt.excluded[column] for column in SYNCED_COLUMNS},
+                "updated_at": now,
+                "is_deleted": False,
+                "deleted_at": None,
+            },
+        )
+        await db.execute(stmt)
+        upserted += len(values)
+    return upserted
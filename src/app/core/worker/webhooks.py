@@ -0,0 +1,214 @@
+"""Clerk webhook inbox: verified deliveries are stored by `svix-id` and processed by the worker in batches."""
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...crud.crud_users import crud_users
+from ...models.user import UserRead, UserUpdateInternal
+from ...models.webhook import WebhookEvent
+from ..config import settings
+from ..db.database import local_session
+from ..logger import logging
+from ..utils import cache
+from .user_sync import clerk_user_values, primary_email, upsert_users
+
+logger = logging.getLogger(__name__)
+
+
+def invalidate_user_cache_on_commit(db: AsyncSession, user_id: str) -> None:
+    """Have everything cached for the user with id `user_id` invalidated once `db` commits.
+
+    Invalidating earlier would let a concurrent request cache the uncommitted state again.
+    """
+    db.info.setdefault("cache_tags", set()).add(f"user_{user_id}")
+
+
+async def flush_cache_invalidations(db: AsyncSession) -> None:
+    """Invalidate the cache tags collected by `invalidate_user_cache_on_commit`; call after committing."""
+    tags = db.info.pop("cache_tags", set())
+    if not tags:
+        return
+    try:
+        await cache.invalidate_tags(*tags)
+    except Exception as e:
+        # Entries expire on their own; a failed invalidation only serves them a little longer.
+        logger.warning(f"Failed to invalidate cache tags {sorted(tags)}: {e!r}")
+
+
+async def process_user_created(event_data: dict, db: AsyncSession) -> None:
+    """Handle user.created event"""
+    user = clerk_user_values(event_data)
+    if user is None:
+        logger.error(f"No primary email found for user {event_data.get('id')}")
+        return
+
+    await upsert_users(db, [user])
+    logger.info(f"User created successfully: {user['email']}")
+
+
+async def process_user_updated(event_data: dict, db: AsyncSession) -> None:
+    """Handle user.updated event"""
+    user_id = event_data.get("id")
+    db_user = await crud_users.get(db=db, schema_to_select=UserRead, uuid=user_id)
+    if db_user is None:
+        # Deliveries can arrive out of order; failing leaves the event in the inbox to be retried.
+        raise LookupError(f"User not found for update: {user_id}")
+
+    update_data = {
+        "name": f"{event_data.get('first_name', '')} {event_data.get('last_name', '')}".strip(),
+    }
+    if event_data.get('profile_image_url'):
+        update_data["profile_image_url"] = event_data["profile_image_url"]
+    email = primary_email(event_data)
+    if email:
+        update_data["email"] = email
+    if event_data.get('username'):
+        update_data["username"] = event_data["username"]
+
+    await crud_users.update(db=db, object=UserUpdateInternal(**update_data), uuid=user_id, commit=False)
+    invalidate_user_cache_on_commit(db, db_user["id"])
+    logger.info(f"User updated successfully: {user_id}")
+
+
+async def process_user_deleted(event_data: dict, db: AsyncSession) -> None:
+    """Handle user.deleted event"""
+    user_id = event_data.get("id")
+    db_user = await crud_users.get(db=db, schema_to_select=UserRead, uuid=user_id)
+    if db_user is None:
+        logger.error(f"User not found for deletion: {user_id}")
+        return
+
+    # Soft delete the user
+    await crud_users.delete(db=db, uuid=user_id, commit=False)
+    invalidate_user_cache_on_commit(db, db_user["id"])
+    logger.info(f"User deleted successfully: {user_id}")
+
+
+EVENT_HANDLERS: dict[str, Callable[[dict, AsyncSession], Awaitable[None]]] = {
+    "user.created": process_user_created,
+    "user.updated": process_user_updated,
+    "user.deleted": process_user_deleted,
+}
+
+
+async def store_webhook_event(db: AsyncSession, svix_id: str, event: dict[str, Any]) -> bool:
+    """Add a verified delivery to the inbox.
+
+    Returns
+    -------
+    bool
+        `False` if a delivery with the same `svix-id` is already in the inbox.
+    """
+    insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = (
+        insert(WebhookEvent)
+        .values(
+            svix_id=svix_id,
+            event_type=str(event.get("type", "")),
+            payload=event,
+            received_at=datetime.now(timezone.utc),
+            attempts=0,
+        )
+        .on_conflict_do_nothing(index_elements=["svix_id"])
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def _bulk_create_users(db: AsyncSession, events: list[WebhookEvent]) -> set[str]:
+    """Apply the batch's `user.created` events with one upsert and return the ids of the events applied.
+
+    Events whose user does not map to a row are left to their handler, as is the whole batch when the
+    upsert fails, e.g. on an email that belongs to another user.
+    """
+    users: dict[str, dict[str, Any]] = {}
+    for event in events:
+        if event.event_type != "user.created":
+            continue
+        try:
+            user = clerk_user_values(event.payload.get("data", {}))
+        except ValueError:
+            continue
+        if user is not None:
+            users[event.svix_id] = user
+    if len(users) < 2:
+        return set()
+    try:
+        async with db.begin_nested():
+            await upsert_users(db, users.values())
+    except Exception as e:
+        logger.warning(f"Bulk upsert of {len(users)} created users failed, applying them one by one: {e!r}")
+        return set()
+    logger.info(f"Created {len(users)} users in bulk")
+    return set(users)
+
+
+async def drain_webhook_inbox(ctx: dict[str, Any], batch_size: int = settings.WEBHOOK_BATCH_SIZE) -> int:
+    """Process pending inbox events, oldest first, `batch_size` per transaction.
+
+    Each event is applied in its own savepoint and marked processed in the same transaction, so an
+    event is applied at most once. The batch's `user.created` events share one upsert ahead of the
+    other events, which only ever follow a user's creation. A failing event is retried by later
+    drains until it has failed `WEBHOOK_MAX_ATTEMPTS` times. Concurrent drains skip each other's rows
+    on databases that support `SKIP LOCKED`.
+
+    Returns
+    -------
+    int
+        The number of events processed successfully.
+    """
+    session_factory = ctx.get("session_factory", local_session)
+    processed = 0
+    failed: set[str] = set()
+    while True:
+        async with session_factory() as db:
+            stmt = (
+                select(WebhookEvent)
+                .where(
+                    WebhookEvent.processed_at.is_(None),
+                    WebhookEvent.attempts < settings.WEBHOOK_MAX_ATTEMPTS,
+                    WebhookEvent.svix_id.not_in(failed),
+                )
+                .order_by(WebhookEvent.received_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = list((await db.execute(stmt)).scalars().all())
+            if not events:
+                return processed
+
+            done = await _bulk_create_users(db, events)
+            for event in events:
+                if event.svix_id in done:
+                    event.processed_at = datetime.now(timezone.utc)
+                    processed += 1
+                    continue
+                handler = EVENT_HANDLERS.get(event.event_type)
+                try:
+                    async with db.begin_nested():
+                        if handler is None:
+                            logger.info(f"Unhandled webhook event type: {event.event_type}")
+                        else:
+                            await handler(event.payload.get("data", {}), db)
+                except Exception as e:
+                    event.attempts += 1
+                    event.last_error = repr(e)[:1000]
+                    failed.add(event.svix_id)
+                    logger.error(
+                        f"Webhook event {event.svix_id} ({event.event_type}) failed, "
+                        f"attempt {event.attempts}/{settings.WEBHOOK_MAX_ATTEMPTS}: {e!r}"
+                    )
+                    continue
+                event.processed_at = datetime.now(timezone.utc)
+                processed += 1
+            await db.commit()
+            await flush_cache_invalidations(db)
+
+        if len(events) < batch_size:
+            return processed
@@ -0,0 +1,15 @@
+from fastcrud import FastCRUD
+
+from ..models.agent_run import (
+    AgentRun,
+    AgentRunCreateInternal,
+    AgentRunDelete,
+    AgentRunRead,
+    AgentRunUpdate,
+    AgentRunUpdateInternal,
+)
+
+CRUDAgentRun = FastCRUD[
+    AgentRun, AgentRunCreateInternal, AgentRunUpdate, AgentRunUpdateInternal, AgentRunDelete, AgentRunRead
+]
+crud_agent_runs = CRUDAgentRun(AgentRun)
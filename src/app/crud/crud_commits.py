@@ -0,0 +1,31 @@
+from fastcrud import FastCRUD
+
+from ..models.commit import (
+    RepoCommit,
+    RepoCommitCreateInternal,
+    RepoCommitDelete,
+    RepoCommitRead,
+    RepoCommitUpdate,
+    RepoCommitUpdateInternal,
+    RepoSyncState,
+    RepoSyncStateCreateInternal,
+    RepoSyncStateDelete,
+    RepoSyncStateRead,
+    RepoSyncStateUpdate,
+    RepoSyncStateUpdateInternal,
+)
+
+CRUDRepoCommit = FastCRUD[
+    RepoCommit, RepoCommitCreateInternal, RepoCommitUpdate, RepoCommitUpdateInternal, RepoCommitDelete, RepoCommitRead
+]
+crud_repo_commits = CRUDRepoCommit(RepoCommit)
+
+CRUDRepoSyncState = FastCRUD[
+    RepoSyncState,
+    RepoSyncStateCreateInternal,
+    RepoSyncStateUpdate,
+    RepoSyncStateUpdateInternal,
+    RepoSyncStateDelete,
+    RepoSyncStateRead,
+]
+crud_repo_sync_states = CRUDRepoSyncState(RepoSyncState)
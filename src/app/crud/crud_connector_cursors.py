@@ -0,0 +1,20 @@
+from fastcrud import FastCRUD
+
+from ..models.connector import (
+    ConnectorCursor,
+    ConnectorCursorCreateInternal,
+    ConnectorCursorDelete,
+    ConnectorCursorRead,
+    ConnectorCursorUpdate,
+    ConnectorCursorUpdateInternal,
+)
+
+CRUDConnectorCursor = FastCRUD[
+    ConnectorCursor,
+    ConnectorCursorCreateInternal,
+    ConnectorCursorUpdate,
+    ConnectorCursorUpdateInternal,
+    ConnectorCursorDelete,
+    ConnectorCursorRead,
+]
+crud_connector_cursors = CRUDConnectorCursor(ConnectorCursor)
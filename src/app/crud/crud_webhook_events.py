@@ -0,0 +1,20 @@
+from fastcrud import FastCRUD
+
+from ..models.webhook import (
+    WebhookEvent,
+    WebhookEventCreateInternal,
+    WebhookEventDelete,
+    WebhookEventRead,
+    WebhookEventUpdate,
+    WebhookEventUpdateInternal,
+)
+
+CRUDWebhookEvent = FastCRUD[
+    WebhookEvent,
+    WebhookEventCreateInternal,
+    WebhookEventUpdate,
+    WebhookEventUpdateInternal,
+    WebhookEventDelete,
+    WebhookEventRead,
+]
+crud_webhook_events = CRUDWebhookEvent(WebhookEvent)
@@ -1,5 +1,17 @@
+from fastapi import FastAPI
+
 from .api import router
 from .core.config import settings
 from .core.setup import create_application
 
-app = create_application(router=router, settings=settings)
+
+def create_app() -> FastAPI:
+    """Build the application without opening any connection.
+
+    The database engine, Redis pools and HTTP clients are created by the lifespan in every worker,
+    so the app can be imported once by a `--preload`ing gunicorn master and forked.
+    """
+    return create_application(router=router, settings=settings)
+
+
+app = create_app()
@@ -0,0 +1,46 @@
+import uuid as uuid_pkg
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.logger import request_id
+
+
+class RequestIdMiddleware:
+    """ASGI middleware that gives every HTTP request and WebSocket connection an id for its logs.
+
+    The id is taken from the `X-Request-ID` header when the client sends one and generated otherwise.
+    It is set in `core.logger.request_id` for as long as the request is handled, so every record
+    logged on its behalf carries it, and returned in the `X-Request-ID` response header.
+
+    Parameters
+    ----------
+    app: ASGIApp
+        The application to wrap.
+    header_name: str, optional
+        Header the id is read from and written to.
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Request-ID") -> None:
+        self.app = app
+        self.header_name = header_name
+        self._header_key = header_name.lower().encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(self._header_key)
+        current_id = incoming.decode("latin-1")[:128] if incoming else uuid_pkg.uuid4().hex
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (self._header_key, current_id.encode("latin-1"))]
+            await send(message)
+
+        token = request_id.set(current_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
@@ -0,0 +1,35 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.utils.tracing import trace_request
+
+
+class TracingMiddleware:
+    """ASGI middleware that traces every HTTP request, see `core.utils.tracing`.
+
+    The trace continues the caller's when the request has a valid W3C `traceparent` header. The
+    request's wall time is observed per method, route template and status once the response is sent.
+    WebSocket connections are not traced, they live for as long as the client stays.
+
+    Parameters
+    ----------
+    app: ASGIApp
+        The application to wrap.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = dict(scope["headers"]).get(b"traceparent")
+        with trace_request(scope["method"], traceparent.decode("latin-1") if traceparent else None) as trace:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    trace.root.attributes["http.status_code"] = message["status"]
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
@@ -1,2 +1,6 @@
 from .user import User
 from .timelog import TimeLog
+from .commit import RepoCommit, RepoSyncState
+from .agent_run import AgentRun
+from .connector import ConnectorCursor
+from .webhook import WebhookEvent
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import JSON, Column, DateTime
+from sqlmodel import Field, SQLModel
+
+
+class AgentRunBase(SQLModel):
+    user_id: Optional[str] = Field(default=None, max_length=255, index=True)
+    session_id: Optional[str] = Field(default=None, max_length=64)
+    source: str = Field(..., max_length=50, schema_extra={"example": "ws"})
+    status: str = Field(..., max_length=20, schema_extra={"example": "completed"})
+    turns: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    duration_ms: int = 0
+    agents: dict[str, Any] = Field(default_factory=dict)
+    tools: dict[str, Any] = Field(default_factory=dict)
+    started_at: datetime
+
+
+class AgentRun(AgentRunBase, table=True):
+    id: str = Field(..., primary_key=True, max_length=32)
+    agents: dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    tools: dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    started_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False, index=True))
+
+
+class AgentRunRead(AgentRunBase):
+    id: str
+
+
+class AgentRunCreateInternal(AgentRunBase):
+    id: str
+
+
+class AgentRunUpdate(SQLModel):
+    status: Optional[str] = None
+
+
+class AgentRunUpdateInternal(AgentRunUpdate):
+    pass
+
+
+class AgentRunDelete(SQLModel):
+    pass
@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Index
+from sqlmodel import SQLModel, Field
+
+
+class RepoCommitBase(SQLModel):
+    repository: str = Field(..., primary_key=True, max_length=255, schema_extra={"example": "octocat/hello-world"})
+    sha: str = Field(..., primary_key=True, max_length=40)
+    message: str
+    author_name: Optional[str] = Field(default=None, max_length=255)
+    author_email: Optional[str] = Field(default=None, max_length=255)
+    authored_at: datetime
+    committed_at: datetime
+    # Position in the order the repository's commits were stored, increasing on every sync.
+    sync_sequence: int = 0
+
+
+class RepoCommit(RepoCommitBase, table=True):
+    __table_args__ = (Index("ix_repocommit_repository_sync_sequence", "repository", "sync_sequence"),)
+
+    authored_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False, index=True))
+    committed_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+
+
+class RepoCommitRead(RepoCommitBase):
+    pass
+
+
+class RepoCommitCreateInternal(RepoCommitBase):
+    pass
+
+
+class RepoCommitUpdate(SQLModel):
+    message: Optional[str] = None
+    author_name: Optional[str] = None
+    author_email: Optional[str] = None
+
+
+class RepoCommitUpdateInternal(RepoCommitUpdate):
+    pass
+
+
+class RepoCommitDelete(SQLModel):
+    pass
+
+
+class RepoSyncStateBase(SQLModel):
+    repository: str = Field(..., primary_key=True, max_length=255)
+    last_committed_at: Optional[datetime] = None
+    last_synced_at: Optional[datetime] = None
+    last_sync_sequence: int = 0
+
+
+class RepoSyncState(RepoSyncStateBase, table=True):
+    last_committed_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    last_synced_at: Optional[datetime] = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True))
+    )
+
+
+class RepoSyncStateRead(RepoSyncStateBase):
+    pass
+
+
+class RepoSyncStateCreateInternal(RepoSyncStateBase):
+    pass
+
+
+class RepoSyncStateUpdate(SQLModel):
+    last_committed_at: Optional[datetime] = None
+    last_synced_at: Optional[datetime] = None
+    last_sync_sequence: Optional[int] = None
+
+
+class RepoSyncStateUpdateInternal(RepoSyncStateUpdate):
+    pass
+
+
+class RepoSyncStateDelete(SQLModel):
+    pass
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime
+from sqlmodel import Field, SQLModel
+
+
+class ConnectorCursorBase(SQLModel):
+    name: str = Field(..., primary_key=True, max_length=255, schema_extra={"example": "github:octocat/hello-world"})
+    cursor: Optional[str] = None
+    synced_at: Optional[datetime] = None
+
+
+class ConnectorCursor(ConnectorCursorBase, table=True):
+    synced_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+
+
+class ConnectorCursorRead(ConnectorCursorBase):
+    pass
+
+
+class ConnectorCursorCreateInternal(ConnectorCursorBase):
+    pass
+
+
+class ConnectorCursorUpdate(SQLModel):
+    cursor: Optional[str] = None
+    synced_at: Optional[datetime] = None
+
+
+class ConnectorCursorUpdateInternal(ConnectorCursorUpdate):
+    pass
+
+
+class ConnectorCursorDelete(SQLModel):
+    pass
@@ -62,7 +62,7 @@ class TimeLogCreate(TimeLogBase):
 
 
 class TimeLogCreateInternal(TimeLogCreate):
-    pass
+    creator_id: str
 
 class TimeLogUpsert(TimeLogCreate):
     id: int | None = None
@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import JSON, Column, DateTime
+from sqlmodel import Field, SQLModel
+
+
+class WebhookEventBase(SQLModel):
+    svix_id: str = Field(..., primary_key=True, max_length=255, schema_extra={"example": "msg_2abc"})
+    event_type: str = Field(..., max_length=100, schema_extra={"example": "user.created"})
+    payload: dict[str, Any] = Field(default_factory=dict)
+    received_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    processed_at: Optional[datetime] = None
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+
+class WebhookEvent(WebhookEventBase, table=True):
+    payload: dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    received_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False, index=True),
+    )
+    processed_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True), index=True))
+
+
+class WebhookEventRead(WebhookEventBase):
+    pass
+
+
+class WebhookEventCreateInternal(WebhookEventBase):
+    pass
+
+
+class WebhookEventUpdate(SQLModel):
+    processed_at: Optional[datetime] = None
+    attempts: Optional[int] = None
+    last_error: Optional[str] = None
+
+
+class WebhookEventUpdateInternal(WebhookEventUpdate):
+    pass
+
+
+class WebhookEventDelete(SQLModel):
+    pass
@@ -0,0 +1,21 @@
+"""Gunicorn configuration for the production image.
+
+The application is imported once in the master (`preload_app`) and forked into the workers, which
+share the master's memory for modules, settings and routes until they write to it. Everything that
+holds a socket is created per worker by the application's lifespan after the fork.
+
+    gunicorn -c python:gunicorn_conf app.main:app
+"""
+import gc
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def pre_fork(server, worker):
+    # Objects the collector tracks are written to whenever it runs; freezing the preloaded ones keeps
+    # the workers from copying the pages they live on.
+    gc.freeze()
@@ -0,0 +1,34 @@
+"""commit sync sequence
+
+Revision ID: f1a8c3d5b270
+Revises: e7b2c5d90a14
+Create Date: 2026-10-19 17:42:36.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a8c3d5b270'
+down_revision: Union[str, None] = 'e7b2c5d90a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('repocommit', sa.Column('sync_sequence', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(
+        'ix_repocommit_repository_sync_sequence', 'repocommit', ['repository', 'sync_sequence'], unique=False
+    )
+    op.add_column('reposyncstate', sa.Column('last_sync_sequence', sa.Integer(), server_default='0', nullable=False))
+    # Stored commits have no sequence yet; the next sync of every repository fetches and numbers them again.
+    op.execute("UPDATE reposyncstate SET last_committed_at = NULL, last_synced_at = NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('reposyncstate', 'last_sync_sequence')
+    op.drop_index('ix_repocommit_repository_sync_sequence', table_name='repocommit')
+    op.drop_column('repocommit', 'sync_sequence')
@@ -0,0 +1,104 @@
+"""Backfill users from a Clerk user export.
+
+The export is either a JSON array of Clerk user objects, as returned by the Backend API's
+`GET /users`, or NDJSON with one user object per line:
+
+    python -m src.scripts.backfill_clerk_users users.ndjson --chunk-size 1000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Iterator
+from itertools import islice
+from pathlib import Path
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+
+from ..app.core.config import settings
+from ..app.core.db.database import AsyncSession, local_session
+from ..app.core.worker.user_sync import clerk_user_values, upsert_users
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def read_clerk_export(path: Path) -> Iterator[dict]:
+    """Yield the user objects of an export; NDJSON is streamed, a JSON array is loaded at once."""
+    with path.open() as f:
+        head = f.read(1)
+        while head.isspace():
+            head = f.read(1)
+        f.seek(0)
+        if head == "[":
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def _upsert_chunk(session: AsyncSession, rows: list[dict], chunk_size: int) -> tuple[int, int]:
+    # Each chunk runs in a savepoint; when a row violates a constraint (e.g. an email already taken by
+    # another user) the chunk is retried one row at a time so only the offending rows are skipped.
+    try:
+        async with session.begin_nested():
+            return await upsert_users(session, rows, chunk_size), 0
+    except IntegrityError as e:
+        logger.warning(f"Chunk of {len(rows)} users failed ({e.orig}), retrying them one at a time")
+    upserted = skipped = 0
+    for row in rows:
+        try:
+            async with session.begin_nested():
+                upserted += await upsert_users(session, [row], chunk_size)
+        except IntegrityError as e:
+            skipped += 1
+            logger.warning(f"Skipping user {row['uuid']}: {e.orig}")
+    return upserted, skipped
+
+
+async def backfill_users(session: AsyncSession, users: Iterator[dict], chunk_size: int) -> tuple[int, int]:
+    """Upsert `users` one committed chunk at a time.
+
+    Returns
+    -------
+    tuple[int, int]
+        The number of users upserted and of users skipped because they could not be mapped or
+        violate a constraint of the `user` table.
+    """
+    upserted = skipped = 0
+    started = time.perf_counter()
+    while chunk := list(islice(users, chunk_size)):
+        rows = []
+        for user in chunk:
+            try:
+                row = clerk_user_values(user)
+            except ValidationError as e:
+                row = None
+                logger.warning(f"Skipping user {user.get('id')}: {e.errors()[0]['msg']}")
+            if row is None:
+                skipped += 1
+            else:
+                rows.append(row)
+        chunk_upserted, chunk_skipped = await _upsert_chunk(session, rows, chunk_size)
+        upserted += chunk_upserted
+        skipped += chunk_skipped
+        await session.commit()
+        elapsed = time.perf_counter() - started
+        logger.info(f"Upserted {upserted} users ({upserted / max(elapsed, 1e-9) * 60:.0f}/min), skipped {skipped}")
+    return upserted, skipped
+
+
+async def main(path: Path, chunk_size: int) -> None:
+    async with local_session() as session:
+        await backfill_users(session, read_clerk_export(path), chunk_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill users from a Clerk user export (JSON or NDJSON).")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=settings.USER_SYNC_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.chunk_size))
@@ -7,7 +7,7 @@ from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, MetaData,
 from sqlalchemy.dialects.postgresql import UUID
 
 from ..app.core.config import settings
-from ..app.core.db.database import AsyncSession, async_engine, local_session
+from ..app.core.db.database import AsyncSession, local_session
 from ..app.core.security import get_password_hash
 from ..app.models.user import User
 
@@ -20,7 +20,7 @@ async def create_first_user(session: AsyncSession) -> None:
         name = settings.ADMIN_NAME
         email = settings.ADMIN_EMAIL
         username = settings.ADMIN_USERNAME
-        hashed_password = get_password_hash(settings.ADMIN_PASSWORD)
+        hashed_password = await get_password_hash(settings.ADMIN_PASSWORD)
 
         user = await session.execute(select(User).filter_by(email=email))
         user = user.scalar_one_or_none()
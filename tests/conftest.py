@@ -1,7 +1,13 @@
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 
-from src.app.main import app
+# Keep the application's log file out of the source tree; set before the logger is imported.
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="app-logs-"))
+
+from src.app.main import app  # noqa: E402
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,196 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from fakeredis import FakeAsyncRedis
+from fastapi import FastAPI, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.api.dependencies import get_current_user
+from src.app.api.v1.time_log import router as time_log_router
+from src.app.core.db.database import async_get_db
+from src.app.core.exceptions.cache_exceptions import CacheIdentificationInferenceError, CacheKeyTemplateError
+from src.app.core.utils import cache
+from src.app.core.worker.webhooks import drain_webhook_inbox, store_webhook_event
+from src.app.models.timelog import TimeLog
+from src.app.models.user import User
+from tests.test_webhooks import _session_factory, _user_event
+
+
+def _cached_app(calls: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/user/{user_id}/time_logs")
+    @cache.cache(
+        "user_{user_id}_time_logs:page_{page}", resource_id_name="user_id", expiration=60, tags=["user_{user_id}"]
+    )
+    async def read_time_logs(request: Request, user_id: str, page: int = 1) -> dict:
+        calls.append((user_id, page))
+        return {"user_id": user_id, "page": page}
+
+    @app.get("/user/{user_id}/time_log/{id}")
+    @cache.cache(key_prefix="user_{user_id}_time_log_cache", resource_id_name="id", tags=["user_{user_id}"])
+    async def read_time_log(request: Request, user_id: str, id: int) -> dict:
+        calls.append((user_id, id))
+        return {"id": id}
+
+    return app
+
+
+def test_deleted_users_cached_pages_become_unreachable(tmp_path, monkeypatch) -> None:
+    session_factory = _session_factory(tmp_path)
+    monkeypatch.setattr(cache, "client", FakeAsyncRedis())
+    calls: list = []
+    app = _cached_app(calls)
+
+    async def run() -> None:
+        async with session_factory() as db:
+            db.add(User(id="id_1", uuid="user_1", name="Jane Doe", username="jane", email="jane@example.com"))
+            db.add(User(id="id_2", uuid="user_2", name="John Doe", username="john", email="john@example.com"))
+            await db.commit()
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            paths = ["/user/id_1/time_logs?page=1", "/user/id_1/time_logs?page=2", "/user/id_1/time_log/7"]
+            for path in [*paths, *paths, "/user/id_2/time_logs?page=1"]:
+                assert (await client.get(path)).status_code == 200
+            assert len(calls) == 4
+
+            async with session_factory() as db:
+                await store_webhook_event(db, "msg_1", {"type": "user.deleted", "data": {"id": "user_1"}})
+            assert await drain_webhook_inbox({"session_factory": session_factory}) == 1
+
+            assert await cache.client.keys("user_id_1_*") == []
+            assert await cache.client.exists("cache_tag:user_id_1") == 0
+            for path in [*paths, "/user/id_2/time_logs?page=1"]:
+                await client.get(path)
+            # Only the deleted user's pages are recomputed.
+            assert len(calls) == 7
+
+    asyncio.run(run())
+
+
+def test_user_updates_invalidate_tagged_entries(tmp_path, monkeypatch) -> None:
+    session_factory = _session_factory(tmp_path)
+    monkeypatch.setattr(cache, "client", FakeAsyncRedis())
+
+    async def run() -> None:
+        async with session_factory() as db:
+            db.add(User(id="id_1", uuid="user_1", name="Jane Doe", username="jane", email="user_1@example.com"))
+            await db.commit()
+            await store_webhook_event(db, "msg_1", _user_event("user.updated", "user_1", first_name="Janet"))
+        await cache.client.set("user_id_1_time_log_cache:7", "{}")
+        await cache.client.sadd("cache_tag:user_id_1", "user_id_1_time_log_cache:7")
+
+        assert await drain_webhook_inbox({"session_factory": session_factory}) == 1
+        assert await cache.client.exists("user_id_1_time_log_cache:7") == 0
+
+    asyncio.run(run())
+
+
+def test_key_templates_are_checked_when_decorating() -> None:
+    async def read_time_log(request: Request, user_id: str, id: int) -> dict:
+        return {}
+
+    with pytest.raises(CacheKeyTemplateError):
+        cache.cache("user_{creator_id}_time_log_cache", resource_id_name="id")(read_time_log)
+    with pytest.raises(CacheKeyTemplateError):
+        cache.cache("user_{user_id}_time_log_cache", tags=["user_{creator}"])(read_time_log)
+    with pytest.raises(CacheIdentificationInferenceError):
+        cache.cache("user_{user_id}_time_log_cache", resource_id_type=float)(read_time_log)
+
+
+def test_writes_invalidate_the_keys_rendered_from_their_templates(monkeypatch) -> None:
+    monkeypatch.setattr(cache, "client", FakeAsyncRedis())
+    app = FastAPI()
+
+    @app.delete("/user/{user_id}/time_log/{id}")
+    @cache.cache(
+        "user_{user_id}_time_log_cache",
+        to_invalidate_extra={"user_{user_id}_summary": "{id:03d}"},
+        pattern_to_invalidate_extra=["user_{user_id}_time_logs:"],
+    )
+    async def erase_time_log(request: Request, user_id: str, id: int) -> dict:
+        return {"id": id}
+
+    async def run() -> None:
+        keys = ["user_id_1_time_log_cache:7", "user_id_1_summary:007", "user_id_1_time_logs:page_1:id_1"]
+        for key in [*keys, "user_id_2_time_log_cache:7"]:
+            await cache.client.set(key, "{}")
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.delete("/user/id_1/time_log/7")).json() == {"id": 7}
+
+        assert await cache.client.exists(*keys) == 0
+        assert await cache.client.keys("*") == [b"user_id_2_time_log_cache:7"]
+
+    asyncio.run(run())
+
+
+def _time_log_app(session_factory, current_user: dict) -> FastAPI:
+    app = FastAPI()
+    app.include_router(time_log_router)
+
+    async def get_db() -> AsyncSession:
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[async_get_db] = get_db
+    app.dependency_overrides[get_current_user] = lambda: current_user
+    return app
+
+
+def test_cached_pages_are_only_served_to_their_owner(tmp_path, monkeypatch) -> None:
+    session_factory = _session_factory(tmp_path)
+    monkeypatch.setattr(cache, "client", FakeAsyncRedis())
+    current_user = {"id": "id_1"}
+    app = _time_log_app(session_factory, current_user)
+
+    async def run() -> None:
+        async with session_factory() as db:
+            start, end = datetime(2025, 1, 6, 9), datetime(2025, 1, 6, 10)
+            db.add(TimeLog(id=7, task="Planning", start_time=start, end_time=end, source="manual", creator_id="id_1"))
+            await db.commit()
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            paths = ["/user/id_1/time_logs", "/user/id_1/time_log/7"]
+            for path in paths:
+                assert (await client.get(path)).status_code == 200
+            assert len(await cache.client.keys("user_id_1_*")) == 2
+
+            current_user["id"] = "id_2"
+            for path in paths:
+                assert (await client.get(path)).status_code == 403
+
+    asyncio.run(run())
+
+
+def test_time_log_writes_invalidate_the_users_cached_reads(tmp_path, monkeypatch) -> None:
+    session_factory = _session_factory(tmp_path)
+    monkeypatch.setattr(cache, "client", FakeAsyncRedis())
+    app = _time_log_app(session_factory, {"id": "id_1"})
+    time_log = {"start_time": "2025-01-06T09:00:00", "end_time": "2025-01-06T10:00:00", "source": "manual"}
+
+    async def run() -> None:
+        async with session_factory() as db:
+            db.add(User(id="id_1", uuid="user_1", name="Jane Doe", username="jane", email="jane@example.com"))
+            await db.commit()
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+
+            async def tasks() -> list[str]:
+                page = (await client.get("/user/id_1/time_logs")).json()
+                return [item["task"] for item in page["data"]]
+
+            assert await tasks() == []
+            assert (await client.post("/user/id_1/time_log", json={**time_log, "task": "Planning"})).status_code == 201
+            assert await tasks() == ["Planning"]
+            batch = {"timelogs": [{**time_log, "task": "Review"}]}
+            assert (await client.post("/user/time_logs/batch", json=batch)).json()["failed_entries"] == []
+            assert await tasks() == ["Planning", "Review"]
+            assert (await client.patch("/user/id_1/time_log/1", json={"task": "Roadmap"})).status_code == 200
+            assert await tasks() == ["Roadmap", "Review"]
+            assert (await client.delete("/user/id_1/time_log/2")).status_code == 200
+            assert await tasks() == ["Roadmap"]
+
+    asyncio.run(run())
@@ -0,0 +1,178 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from autogen_core import CancellationToken
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+
+from src.app.ai.agents import github
+from src.app.ai.stores.commit_store import CommitStore
+from src.app.models.commit import RepoCommit, RepoSyncState
+
+START = datetime(2025, 1, 6, 9, tzinfo=timezone.utc)
+
+
+def _commit(sha: str, date: datetime) -> SimpleNamespace:
+    author = SimpleNamespace(name="Jane Doe", email="jane@example.com", date=date)
+    return SimpleNamespace(sha=sha, commit=SimpleNamespace(message=f"commit {sha}", author=author, committer=author))
+
+
+class FakeCommitList(list):
+    # GitHub lists the newest commits first; `reversed` pages from the oldest, like PyGithub's.
+    @property
+    def reversed(self) -> list[SimpleNamespace]:
+        return self[::-1]
+
+
+class FakeRepo:
+    def __init__(self, commits: list[SimpleNamespace]) -> None:
+        self.commits = commits
+        self.calls: list[datetime | None] = []
+
+    def get_commits(self, since: datetime | None = None) -> FakeCommitList:
+        self.calls.append(since)
+        commits = [c for c in self.commits if since is None or c.commit.committer.date >= since]
+        return FakeCommitList(reversed(commits))
+
+
+class FakeGithub:
+    def __init__(self, repo: FakeRepo) -> None:
+        self.repo = repo
+
+    def get_repo(self, name: str) -> FakeRepo:
+        return self.repo
+
+
+def _session_factory(tmp_path) -> sessionmaker:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'commits.db'}", poolclass=NullPool)
+
+    async def create() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=[RepoCommit.__table__, RepoSyncState.__table__])
+
+    asyncio.run(create())
+    return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_sync_only_fetches_new_commits(tmp_path) -> None:
+    repo = FakeRepo([_commit(f"sha{i}", START + timedelta(hours=i)) for i in range(3)])
+    store = CommitStore(FakeGithub(repo), session_factory=_session_factory(tmp_path), sync_interval=0)
+
+    assert asyncio.run(store.sync("octo/repo")) == 3
+
+    repo.commits.append(_commit("sha3", START + timedelta(hours=3)))
+    # The high-water mark commit is returned again by GitHub and deduplicated by the upsert.
+    assert asyncio.run(store.sync("octo/repo")) == 2
+    assert repo.calls == [None, START + timedelta(hours=2)]
+
+    commits = asyncio.run(store.get_commits("octo/repo"))
+    assert [c.sha for c in commits] == ["sha0", "sha1", "sha2", "sha3"]
+    synced = asyncio.run(store.get_synced_commits("octo/repo", after=3))
+    assert [(c.sha, c.sync_sequence) for c in synced] == [("sha2", 4), ("sha3", 5)]
+
+
+def test_failed_sync_keeps_stored_batches(tmp_path) -> None:
+    repo = FakeRepo([_commit(f"sha{i}", START + timedelta(hours=i)) for i in range(4)])
+    store = CommitStore(FakeGithub(repo), session_factory=_session_factory(tmp_path), sync_interval=3600, batch_size=2)
+    next_batch = store._next_batch
+    batches = 0
+
+    def failing_next_batch(repository, pages):  # type: ignore[no-untyped-def]
+        nonlocal batches
+        batches += 1
+        if batches == 2:
+            raise ConnectionError("GitHub went away")
+        return next_batch(repository, pages)
+
+    store._next_batch = failing_next_batch
+    try:
+        asyncio.run(store.sync("octo/repo"))
+    except ConnectionError:
+        pass
+    assert [c.sha for c in asyncio.run(store.get_commits("octo/repo"))] == ["sha0", "sha1"]
+
+    store._next_batch = next_batch
+    # The failed crawl did not count as a sync, so the interval does not hold the retry back.
+    assert asyncio.run(store.sync("octo/repo")) == 3
+    assert repo.calls[-1] == START + timedelta(hours=1)
+    assert [c.sha for c in asyncio.run(store.get_commits("octo/repo"))] == ["sha0", "sha1", "sha2", "sha3"]
+
+
+def test_get_commits_filters_date_range(tmp_path) -> None:
+    repo = FakeRepo([_commit(f"sha{i}", START + timedelta(days=i)) for i in range(5)])
+    store = CommitStore(FakeGithub(repo), session_factory=_session_factory(tmp_path))
+    asyncio.run(store.sync("octo/repo"))
+
+    commits = asyncio.run(
+        store.get_commits("octo/repo", since=START + timedelta(days=1), until=START + timedelta(days=3))
+    )
+    assert [c.sha for c in commits] == ["sha1", "sha2", "sha3"]
+
+
+def test_sync_respects_interval(tmp_path) -> None:
+    repo = FakeRepo([_commit("sha0", START)])
+    store = CommitStore(FakeGithub(repo), session_factory=_session_factory(tmp_path), sync_interval=3600)
+
+    asyncio.run(store.sync("octo/repo"))
+    assert asyncio.run(store.sync("octo/repo")) == 0
+    assert len(repo.calls) == 1
+
+
+def test_get_commits_author_and_limit(tmp_path) -> None:
+    commits = [_commit(f"sha{i}", START + timedelta(hours=i)) for i in range(4)]
+    commits[1].commit.author = SimpleNamespace(
+        name="John Roe", email="john@example.com", date=START + timedelta(hours=1)
+    )
+    store = CommitStore(FakeGithub(FakeRepo(commits)), session_factory=_session_factory(tmp_path), batch_size=2)
+    asyncio.run(store.sync("octo/repo"))
+
+    assert [c.sha for c in asyncio.run(store.get_commits("octo/repo", author="JOHN ROE"))] == ["sha1"]
+    assert [c.sha for c in asyncio.run(store.get_commits("octo/repo", limit=2))] == ["sha0", "sha1"]
+    assert [c.sha for c in asyncio.run(store.get_commits("octo/repo", limit=2, newest_first=True))] == ["sha3", "sha2"]
+    assert asyncio.run(store.count_commits("octo/repo")) == 4
+    assert asyncio.run(store.count_commits("octo/repo", author="john@example.com")) == 1
+
+
+def test_get_daily_activity(tmp_path) -> None:
+    commits = [_commit(f"sha{i}", START + timedelta(hours=i)) for i in range(3)]
+    commits.append(_commit("sha3", START + timedelta(days=1)))
+    store = CommitStore(FakeGithub(FakeRepo(commits)), session_factory=_session_factory(tmp_path))
+    asyncio.run(store.sync("octo/repo"))
+
+    activity = asyncio.run(store.get_daily_activity("octo/repo"))
+    assert [(str(row["day"]), row["commit_count"]) for row in activity] == [("2025-01-06", 3), ("2025-01-07", 1)]
+    assert activity[0]["first_commit_at"].hour == 9
+    assert activity[0]["last_commit_at"].hour == 11
+
+
+def _github_agent(tmp_path, monkeypatch, commits: list[SimpleNamespace]) -> github.GitHubAgent:
+    model_client = ReplayChatCompletionClient([])
+    model_client._model_info["function_calling"] = True
+    monkeypatch.setattr(github, "get_model_client", lambda *args: model_client)
+    agent = github.GitHubAgent(github_token="token")
+    agent.commit_store = CommitStore(FakeGithub(FakeRepo(commits)), session_factory=_session_factory(tmp_path))
+    return agent
+
+
+async def _run_tool(agent: github.GitHubAgent, name: str, **arguments) -> str:
+    # What the assistant sends the model: the registered tool's result, converted to a string.
+    tool = next(tool for tool in agent.assistant._tools if tool.name == name)
+    result = await tool.run_json(arguments, CancellationToken())
+    return tool.return_value_as_string(result)
+
+
+def test_commit_tools_return_json_to_the_model(tmp_path, monkeypatch) -> None:
+    agent = _github_agent(tmp_path, monkeypatch, [_commit(f"sha{i}", START + timedelta(hours=i)) for i in range(3)])
+
+    commits = json.loads(asyncio.run(_run_tool(agent, "get_commits", repository="octo/repo", max_items=2)))
+    assert [c["hash"] for c in commits["commits"]] == ["sha1", "sha2"]
+    assert (commits["total"], commits["truncated"]) == (3, True)
+    assert commits["commits"][0]["date"].startswith("2025-01-06T10:00:00")
+
+    activity = json.loads(asyncio.run(_run_tool(agent, "get_commit_activity", repository="octo/repo")))
+    assert [(row["day"], row["commit_count"]) for row in activity] == [("2025-01-06", 3)]
@@ -0,0 +1,279 @@
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from autogen_core import CancellationToken
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+
+from src.app.ai.agents import calender
+from src.app.ai.connectors import calendar
+from src.app.ai.connectors.base import TimeEvent, TimeEventPage, TimeSourceConnector
+from src.app.ai.connectors.calendar import CalendarConnector, CalendarPage, GoogleCalendarClient
+from src.app.ai.connectors.collector import TimeEventCollector
+from src.app.ai.connectors.github import GitHubCommitConnector
+from src.app.ai.connectors.manual import ManualEntryConnector
+from src.app.ai.stores.commit_store import CommitStore
+from src.app.models.commit import RepoCommit, RepoSyncState
+from src.app.models.connector import ConnectorCursor
+from src.app.models.timelog import TimeLog
+from src.app.models.user import User
+from tests.test_commit_store import FakeCommitList, FakeGithub, FakeRepo, _commit
+
+START = datetime(2025, 1, 6, 9, tzinfo=timezone.utc)
+
+
+def _session_factory(tmp_path) -> sessionmaker:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'connectors.db'}", poolclass=NullPool)
+    tables = [
+        User.__table__, TimeLog.__table__, RepoCommit.__table__, RepoSyncState.__table__, ConnectorCursor.__table__
+    ]
+
+    async def create() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=tables)
+
+    asyncio.run(create())
+    return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def _event(source: str, external_id: str, title: str, hour: int) -> TimeEvent:
+    return TimeEvent(
+        source=source,
+        external_id=external_id,
+        title=title,
+        start=START + timedelta(hours=hour),
+        end=START + timedelta(hours=hour + 1),
+    )
+
+
+class FixtureConnector(TimeSourceConnector):
+    """Replays fixed events in `[since, until]`, one per page; the cursor is the index of the last event yielded."""
+
+    def __init__(self, name: str, events: list[TimeEvent], delay: float = 0, fail_after: int | None = None) -> None:
+        self.name = name
+        self.fixture = events
+        self.delay = delay
+        self.fail_after = fail_after
+        self.cursors: list[str | None] = []
+
+    async def pages(self, since=None, until=None, cursor=None) -> AsyncIterator[TimeEventPage]:
+        self.cursors.append(cursor)
+        await asyncio.sleep(self.delay)
+        start = int(cursor) + 1 if cursor is not None else 0
+        for index in range(start, len(self.fixture)):
+            if self.fail_after is not None and index >= self.fail_after:
+                raise ConnectionError("source unavailable")
+            event = self.fixture[index]
+            if (since is None or event.end >= since) and (until is None or event.start <= until):
+                yield TimeEventPage(events=[event], cursor=str(index))
+
+
+class FakeCalendarClient:
+    def __init__(self, pages: list[CalendarPage]) -> None:
+        self.pages = pages
+        self.calls: list[tuple[str | None, str | None]] = []
+
+    async def list_events(self, since, until, sync_token=None, page_token=None) -> CalendarPage:
+        self.calls.append((sync_token, page_token))
+        return self.pages[int(page_token or 0)]
+
+
+def test_collector_runs_connectors_concurrently_and_resumes_from_cursors(tmp_path) -> None:
+    session_factory = _session_factory(tmp_path)
+    first = FixtureConnector("first", [_event("a", "1", "Standup", 0), _event("a", "2", "Review", 2)], delay=0.2)
+    second = FixtureConnector("second", [_event("b", "1", "Planning", 4)], delay=0.2)
+    collector = TimeEventCollector([first, second], session_factory=session_factory)
+
+    started = time.perf_counter()
+    result = asyncio.run(collector.collect())
+    assert time.perf_counter() - started < 0.35
+    assert [event.key for event in result.events] == ["a:1", "a:2", "b:1"]
+    assert result.cursors == {"first": "1", "second": "0"}
+
+    first.fixture.append(_event("a", "3", "Retro", 6))
+    result = asyncio.run(collector.collect())
+    assert [event.key for event in result.events] == ["a:3"]
+    assert first.cursors == [None, "1"] and second.cursors == [None, "0"]
+    assert asyncio.run(collector.load_cursors()) == {"first": "2", "second": "0"}
+
+
+def test_only_incremental_collects_of_the_whole_history_use_cursors(tmp_path) -> None:
+    connector = FixtureConnector("first", [_event("a", "1", "Standup", 0), _event("a", "2", "Review", 2)])
+    collector = TimeEventCollector([connector], session_factory=_session_factory(tmp_path))
+    asyncio.run(collector.collect())
+    connector.fixture.append(_event("a", "3", "Retro", 6))
+
+    morning = asyncio.run(collector.collect(until=START + timedelta(hours=1)))
+    later = asyncio.run(collector.collect(since=START + timedelta(hours=2)))
+    everything = asyncio.run(collector.collect(incremental=False))
+    assert [event.key for event in morning.events] == ["a:1"]
+    assert [event.key for event in later.events] == ["a:2", "a:3"]
+    assert len(everything.events) == 3
+    # None of them moved the cursor of the last incremental collect, which resumes where it stopped.
+    assert asyncio.run(collector.load_cursors()) == {"first": "1"}
+    assert [event.key for event in asyncio.run(collector.collect()).events] == ["a:3"]
+    assert connector.cursors == [None, None, None, None, "1"]
+
+
+def test_collector_deduplicates_overlapping_events(tmp_path) -> None:
+    manual = FixtureConnector("manual", [_event("manual", "7", "Sprint  planning", 1)])
+    calendar = FixtureConnector(
+        "calendar",
+        [
+            _event("calendar", "x", "sprint planning", 1),
+            _event("calendar", "y", "1:1", 3),
+            _event("calendar", "y", "1:1", 3),
+        ],
+    )
+    collector = TimeEventCollector([manual, calendar], session_factory=_session_factory(tmp_path))
+
+    result = asyncio.run(collector.collect(incremental=False))
+    # The hand-written entry wins over the calendar event for the same meeting.
+    assert [event.key for event in result.events] == ["manual:7", "calendar:y"]
+    assert result.duplicates == 2
+
+
+def test_failing_and_slow_connectors_do_not_block_others(tmp_path) -> None:
+    flaky = FixtureConnector("flaky", [_event("a", str(i), f"task {i}", i) for i in range(3)], fail_after=2)
+    slow = FixtureConnector("slow", [_event("b", "1", "late", 0)], delay=5)
+    healthy = FixtureConnector("healthy", [_event("c", "1", "fine", 0)])
+    collector = TimeEventCollector([flaky, slow, healthy], session_factory=_session_factory(tmp_path), timeout=0.1)
+
+    result = asyncio.run(collector.collect())
+    assert set(result.errors) == {"flaky", "slow"}
+    assert "timed out" in result.errors["slow"]
+    # The pages the flaky connector completed are kept, and so is its progress.
+    assert [event.key for event in result.events] == ["a:0", "c:1", "a:1"]
+    assert asyncio.run(collector.load_cursors()) == {"flaky": "1", "healthy": "0"}
+
+
+def test_calendar_connector_pages_and_sync_token() -> None:
+    item = {
+        "id": "e1",
+        "summary": "Demo",
+        "start": {"dateTime": "2025-01-06T10:00:00+01:00"},
+        "end": "2025-01-06T10:30:00Z",
+    }
+    client = FakeCalendarClient(
+        [
+            CalendarPage(items=[item], next_page_token="1"),
+            CalendarPage(items=[{**item, "id": "e2", "status": "cancelled"}], next_sync_token="sync-2"),
+        ]
+    )
+    pages = asyncio.run(_collect_pages(CalendarConnector(client), cursor="sync-1"))
+
+    assert [page.cursor for page in pages] == [None, "sync-2"]
+    assert [event.key for page in pages for event in page.events] == ["calendar:e1"]
+    assert pages[0].events[0].start == START
+    assert client.calls == [("sync-1", None), ("sync-1", "1")]
+
+
+def test_google_calendar_client_sends_the_range_or_the_sync_token() -> None:
+    requests: list[httpx.Request] = []
+
+    def calendar_api(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"items": [{"id": "e1"}], "nextSyncToken": "sync-2"})
+
+    async def run() -> list[CalendarPage]:
+        client = GoogleCalendarClient("team@example.com", token="token", transport=httpx.MockTransport(calendar_api))
+        try:
+            return [
+                await client.list_events(START, START + timedelta(days=1)),
+                await client.list_events(START, None, sync_token="sync-1", page_token="2"),
+            ]
+        finally:
+            await client.aclose()
+
+    pages = asyncio.run(run())
+    assert pages[0] == CalendarPage(items=[{"id": "e1"}], next_sync_token="sync-2")
+    assert requests[0].url.raw_path.startswith(b"/calendar/v3/calendars/team%40example.com/events?")
+    assert requests[0].headers["Authorization"] == "Bearer token"
+    assert requests[0].url.params["timeMin"] == START.isoformat()
+    assert requests[0].url.params["singleEvents"] == "true"
+    assert "syncToken" not in requests[0].url.params
+    assert dict(requests[1].url.params) == {
+        "singleEvents": "true", "maxResults": "200", "syncToken": "sync-1", "pageToken": "2"
+    }
+
+
+def test_calendar_agent_reads_the_configured_calendar(monkeypatch) -> None:
+    model_client = ReplayChatCompletionClient([])
+    model_client._model_info["function_calling"] = True
+    monkeypatch.setattr(calender, "get_model_client", lambda *args: model_client)
+    assert calender.calendar_assistant()._tools == []
+
+    item = {"id": "e1", "summary": "Demo", "start": "2025-01-06T09:00:00Z", "end": "2025-01-06T09:30:00Z"}
+    monkeypatch.setattr(calendar, "client", FakeCalendarClient([CalendarPage(items=[item])]))
+    tool = calender.calendar_assistant()._tools[0]
+    result = asyncio.run(tool.run_json({"since": START.isoformat()}, CancellationToken()))
+
+    output = json.loads(tool.return_value_as_string(result))
+    assert [event["title"] for event in output["calendar_events"]] == ["Demo"]
+    assert output["error"] is None
+
+
+def test_github_and_manual_connectors(tmp_path) -> None:
+    session_factory = _session_factory(tmp_path)
+    author = SimpleNamespace(name="Jane Doe", email="jane@example.com", date=START)
+    git_commit = SimpleNamespace(message="Fix login\n\nbody", author=author, committer=author)
+    commit = SimpleNamespace(sha="abc", commit=git_commit)
+    repo = SimpleNamespace(get_commits=lambda since=None: FakeCommitList([commit]))
+    commit_store = CommitStore(SimpleNamespace(get_repo=lambda name: repo), session_factory=session_factory)
+
+    async def add_timelogs() -> None:
+        async with session_factory() as db:
+            for task, source in [("Pairing", "manual"), ("Imported", "jira")]:
+                end_time = START + timedelta(hours=1)
+                db.add(TimeLog(task=task, start_time=START, end_time=end_time, source=source, creator_id="u1"))
+            await db.commit()
+
+    asyncio.run(add_timelogs())
+    collector = TimeEventCollector(
+        [GitHubCommitConnector(commit_store, "octo/repo"), ManualEntryConnector("u1", session_factory=session_factory)],
+        session_factory=session_factory,
+    )
+    result = asyncio.run(collector.collect())
+
+    assert [(event.source, event.title) for event in result.events] == [("github", "Fix login"), ("manual", "Pairing")]
+    assert result.events[0].url == "https://github.com/octo/repo/commit/abc"
+    assert result.cursors["github:octo/repo"] == "1"
+    assert result.cursors["manual:u1"] is not None
+
+
+def test_github_connector_resumes_at_commits_synced_later_with_older_dates(tmp_path) -> None:
+    repo = FakeRepo([_commit(f"sha{i}", START + timedelta(hours=i)) for i in range(3)])
+    commit_store = CommitStore(FakeGithub(repo), session_factory=_session_factory(tmp_path), sync_interval=0)
+    connector = GitHubCommitConnector(commit_store, "octo/repo", page_size=2)
+
+    pages = asyncio.run(_collect_pages(connector))
+    assert [[event.metadata["sha"] for event in page.events] for page in pages] == [["sha0", "sha1"], ["sha2"]]
+
+    # A branch merged later brings a commit dated before the ones already read.
+    late = _commit("late", START - timedelta(days=1))
+    late.commit.committer = SimpleNamespace(name="Jane Doe", email="jane@example.com", date=START + timedelta(hours=5))
+    repo.commits.append(late)
+    pages = asyncio.run(_collect_pages(connector, cursor=pages[-1].cursor))
+    # The high-water mark commit is fetched and stored again, consumers deduplicate it.
+    assert [event.metadata["sha"] for page in pages for event in page.events] == ["sha2", "late"]
+
+
+def test_incomplete_connectors_cannot_be_created() -> None:
+    class NamedConnector(TimeSourceConnector):
+        name = "named"
+
+    with pytest.raises(TypeError, match="pages"):
+        NamedConnector()
+
+
+async def _collect_pages(connector: TimeSourceConnector, **kwargs) -> list[TimeEventPage]:
+    return [page async for page in connector.pages(**kwargs)]
@@ -0,0 +1,162 @@
+import asyncio
+import base64
+import threading
+import time
+
+import httpx
+from langchain_community.utilities.github import GitHubAPIWrapper
+
+from src.app.ai.toolkits.github.toolkit import GitHubToolkit, ReadFile
+from src.app.ai.tools.github_client import AsyncGitHubClient
+from src.app.ai.tools.tool import GitHubAction
+
+
+class FakeWrapper(GitHubAPIWrapper):
+    def run(self, mode: str, query: str) -> str:
+        time.sleep(0.05)
+        return f"{mode}({query}) on {threading.current_thread().name}"
+
+
+def _wrapper() -> FakeWrapper:
+    return FakeWrapper.model_construct(github_repository="octo/repo", active_branch="main")
+
+
+async def _github_api(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(0.1)
+    path = request.url.path
+    if path == "/repos/octo/repo/issues":
+        issues = [
+            {"title": "Bug", "number": 1, "user": {"login": "jane"}},
+            {"title": "PR", "number": 2, "user": {"login": "john"}, "pull_request": {}},
+        ]
+        return httpx.Response(200, json=issues)
+    if path == "/repos/octo/repo/branches":
+        if request.url.params.get("page") == "2":
+            return httpx.Response(200, json=[{"name": "feature"}])
+        link = '<https://api.github.com/repos/octo/repo/branches?page=2>; rel="next"'
+        return httpx.Response(200, json=[{"name": "main"}], headers={"link": link})
+    if path == "/repos/octo/repo/contents/README.md":
+        ref = request.url.params.get("ref", "main")
+        content = b"hello" if ref == "main" else f"hello from {ref}".encode()
+        return httpx.Response(200, json={"content": base64.b64encode(content).decode()})
+    return httpx.Response(404, json={"message": "Not Found"})
+
+
+def _client() -> AsyncGitHubClient:
+    return AsyncGitHubClient("octo/repo", token="token", transport=httpx.MockTransport(_github_api))
+
+
+def test_arun_uses_async_client_and_falls_back_to_a_thread() -> None:
+    async def run() -> None:
+        client = _client()
+        issues = GitHubAction(mode="get_issues", name="Get Issues", api_wrapper=_wrapper(), async_client=client)
+        expected = "Found 1 issues:\n[{'title': 'Bug', 'number': 1, 'opened_by': 'jane'}]"
+        assert await issues.arun({"no_input": ""}) == expected
+
+        branches = GitHubAction(
+            mode="list_branches_in_repo", name="Branches", api_wrapper=_wrapper(), async_client=client
+        )
+        assert await branches.arun("") == "Found 2 branches in the repository:\nmain\nfeature"
+
+        create = GitHubAction(mode="create_branch", name="Create", api_wrapper=_wrapper(), async_client=client)
+        result = await create.arun({"instructions": "fix"})
+        assert result.startswith("create_branch(fix) on ") and threading.current_thread().name not in result
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+def test_query_field_is_resolved_once() -> None:
+    tool = GitHubAction(mode="read_file", name="Read File", api_wrapper=_wrapper(), args_schema=ReadFile)
+    assert tool._query_field == "formatted_filepath"
+    assert tool.run({"formatted_filepath": "README.md"}).startswith("read_file(README.md)")
+
+
+def test_toolkit_runs_read_only_calls_concurrently() -> None:
+    async def run() -> None:
+        client = _client()
+        toolkit = GitHubToolkit.from_github_api_wrapper(_wrapper(), async_client=client, max_concurrency=4)
+        calls = [
+            ("Get Issues", {"no_input": ""}),
+            ("List branches in this repository", {"no_input": ""}),
+            ("Read File", {"formatted_filepath": "README.md"}),
+        ]
+        started = time.perf_counter()
+        results = await toolkit.arun_tools(calls)
+        # Three requests of 0.1s each (the branch listing takes two) overlap instead of adding up.
+        assert time.perf_counter() - started < 0.35
+        assert results[2] == "hello"
+
+        calls.insert(1, ("Set active branch", {"branch_name": "feature"}))
+        results = await toolkit.arun_tools(calls)
+        assert results[1].startswith("set_active_branch(feature)")
+        assert results[3] == "hello"
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+class BranchingWrapper(FakeWrapper):
+    def run(self, mode: str, query: str) -> str:
+        if mode in ("set_active_branch", "create_branch"):
+            self.active_branch = query
+        return super().run(mode, query)
+
+
+def test_async_client_reads_files_from_the_wrappers_active_branch() -> None:
+    async def run() -> None:
+        client = _client()
+        wrapper = BranchingWrapper.model_construct(github_repository="octo/repo", active_branch="main")
+        toolkit = GitHubToolkit.from_github_api_wrapper(wrapper, async_client=client)
+        read_file = toolkit.get_tool("Read File")
+        assert await read_file.arun({"formatted_filepath": "README.md"}) == "hello"
+
+        await toolkit.get_tool("Create a new branch").arun({"branch_name": "fix"})
+        assert await read_file.arun({"formatted_filepath": "README.md"}) == "hello from fix"
+        await toolkit.get_tool("Set active branch").arun({"branch_name": "main"})
+        assert await read_file.arun({"formatted_filepath": "README.md"}) == "hello"
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+class CountingWrapper(FakeWrapper):
+    def run(self, mode: str, query: str) -> str:
+        self.__dict__.setdefault("calls", []).append(mode)
+        return f"{mode}({query}) #{len(self.__dict__['calls'])}"
+
+
+def test_toolkit_builds_tools_lazily_and_only_included_ones() -> None:
+    toolkit = GitHubToolkit.from_github_api_wrapper(_wrapper(), include=["get_issues", "Read File"])
+    assert toolkit.tool_names == ["Get Issues", "Read File"]
+    assert toolkit._built == {}
+
+    tool = toolkit.get_tool("Read File")
+    assert list(toolkit._built) == ["Read File"] and toolkit.get_tool("Read File") is tool
+    assert [tool.name for tool in toolkit.get_tools()] == ["Get Issues", "Read File"]
+
+    every_tool = GitHubToolkit.from_github_api_wrapper(_wrapper()).tool_names
+    assert len(every_tool) == len(set(every_tool))
+    assert [name for name in every_tool if "Files" in name or "files included" in name] == [
+        "Overview of files included in PR"
+    ]
+
+
+def test_read_only_responses_are_cached_until_a_mutation() -> None:
+    wrapper = CountingWrapper.model_construct(github_repository="octo/repo", active_branch="main")
+    toolkit = GitHubToolkit.from_github_api_wrapper(wrapper, cache_ttl=60)
+    read_file = toolkit.get_tool("Read File")
+
+    first = read_file.run({"formatted_filepath": "README.md"})
+    assert read_file.run({"formatted_filepath": "README.md"}) == first
+    assert read_file.run({"formatted_filepath": "setup.py"}) != first
+    assert toolkit.response_cache.hits == 1
+
+    toolkit.get_tool("Set active branch").run({"branch_name": "feature"})
+    assert asyncio.run(read_file.arun({"formatted_filepath": "README.md"})) != first
+    assert wrapper.calls == ["read_file", "read_file", "set_active_branch", "read_file"]
+
+    uncached = GitHubToolkit.from_github_api_wrapper(wrapper, cache_ttl=0).get_tool("Read File")
+    uncached.run({"formatted_filepath": "README.md"})
+    uncached.run({"formatted_filepath": "README.md"})
+    assert wrapper.calls[-2:] == ["read_file", "read_file"]
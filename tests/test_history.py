@@ -0,0 +1,95 @@
+import asyncio
+import json
+from datetime import timedelta
+
+from autogen_core import FunctionCall
+from autogen_core.models import (
+    AssistantMessage,
+    FunctionExecutionResult,
+    FunctionExecutionResultMessage,
+    SystemMessage,
+    UserMessage,
+)
+
+from src.app.ai.history import HistoryLimits, TeamHistoryContext, digest_tool_output
+from tests.test_commit_store import START, _commit, _github_agent, _run_tool
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+def test_window_slides_and_folds_old_messages_into_summary() -> None:
+    async def run() -> None:
+        context = TeamHistoryContext(HistoryLimits(max_tokens=10, summary_tokens=100), counter=words)
+        for i in range(5):
+            await context.add_message(UserMessage(content=f"message {i} with four", source="user"))
+
+        messages = await context.get_messages()
+        assert isinstance(messages[0], SystemMessage)
+        assert "user: message 2 with four" in messages[0].content
+        assert [m.content for m in messages[1:]] == ["message 3 with four", "message 4 with four"]
+        assert context.tokens <= 10 + words(messages[0].content)
+
+    asyncio.run(run())
+
+
+def test_tool_results_never_lead_the_window() -> None:
+    async def run() -> None:
+        context = TeamHistoryContext(HistoryLimits(max_tokens=20), counter=words)
+        call = FunctionCall(id="1", name="get_commits", arguments='{"repository": "octo/repo"}')
+        await context.add_message(UserMessage(content="list commits " * 5, source="user"))
+        await context.add_message(AssistantMessage(content=[call], source="github"))
+        await context.add_message(
+            FunctionExecutionResultMessage(content=[FunctionExecutionResult(content="sha " * 12, call_id="1")])
+        )
+        await context.add_message(UserMessage(content="thanks " * 10, source="user"))
+
+        messages = await context.get_messages()
+        assert not isinstance(messages[1], FunctionExecutionResultMessage)
+        assert "github: called get_commits" in messages[0].content
+
+    asyncio.run(run())
+
+
+def test_large_tool_outputs_are_digested() -> None:
+    commits = [{"sha": f"sha{i}", "message": f"commit number {i}"} for i in range(100)]
+
+    digest = json.loads(digest_tool_output(json.dumps(commits), max_tokens=50, counter=words))
+    assert digest["total_items"] == 100
+    assert digest["omitted_items"] == 100 - len(digest["items"])
+    assert digest["items"][0] == commits[0]
+
+    text = digest_tool_output("line " * 1000, max_tokens=50, counter=words)
+    assert "tokens omitted" in text
+    assert words(text) < 100
+
+
+def test_commit_tool_results_are_digested_inside_the_team_history(tmp_path, monkeypatch) -> None:
+    agent = _github_agent(tmp_path, monkeypatch, [_commit(f"sha{i}", START + timedelta(hours=i)) for i in range(100)])
+    output = asyncio.run(_run_tool(agent, "get_commits", repository="octo/repo", max_items=100))
+
+    async def run() -> list:
+        context = TeamHistoryContext(HistoryLimits(tool_output_tokens=200), counter=words)
+        result = FunctionExecutionResult(content=output, call_id="1")
+        await context.add_message(FunctionExecutionResultMessage(content=[result]))
+        return await context.get_messages()
+
+    digest = json.loads(asyncio.run(run())[0].content[0].content)
+    assert words(json.dumps(digest)) <= 200
+    assert (digest["total"], digest["truncated"]) == (100, False)
+    assert 0 < len(digest["commits"]) < 100
+    assert digest["omitted_items"] == {"commits": 100 - len(digest["commits"])}
+    assert digest["commits"][0]["hash"] == "sha0"
+
+
+def test_state_round_trip_keeps_summary() -> None:
+    async def run() -> None:
+        context = TeamHistoryContext(HistoryLimits(max_tokens=5), counter=words)
+        for i in range(3):
+            await context.add_message(UserMessage(content=f"hello there {i}", source="user"))
+        restored = TeamHistoryContext(HistoryLimits(max_tokens=5), counter=words)
+        await restored.load_state(await context.save_state())
+        assert await restored.get_messages() == await context.get_messages()
+
+    asyncio.run(run())
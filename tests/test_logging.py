@@ -0,0 +1,72 @@
+import asyncio
+import json
+import logging
+import queue
+import sys
+
+import httpx
+from fastapi import FastAPI
+
+from src.app.core.logger import JsonFormatter, RequestIdFilter, SamplingFilter, _QueueHandler
+from src.app.middleware.request_id_middleware import RequestIdMiddleware
+
+
+def _capture(name: str) -> tuple[logging.Logger, queue.SimpleQueue]:
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(RequestIdFilter())
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.handlers = [handler]
+    return logger, records
+
+
+def test_records_carry_the_request_id_as_json() -> None:
+    logger, records = _capture("tests.logging.request_id")
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/")
+    async def index() -> dict:
+        logger.info("Handled %s", "index", extra={"status": 200})
+        return {}
+
+    async def run() -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.get("/", headers={"X-Request-ID": "req-1"}), await client.get("/")]
+
+    given, generated = asyncio.run(run())
+
+    assert given.headers["X-Request-ID"] == "req-1"
+    entries = [json.loads(JsonFormatter().format(records.get_nowait())) for _ in range(2)]
+    assert entries[0]["message"] == "Handled index"
+    assert (entries[0]["request_id"], entries[0]["status"]) == ("req-1", 200)
+    assert entries[1]["request_id"] == generated.headers["X-Request-ID"]
+    assert entries[1]["request_id"] != "req-1"
+
+
+def test_tracebacks_are_formatted_before_the_record_is_queued() -> None:
+    logger, records = _capture("tests.logging.traceback")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed")
+
+    record = records.get_nowait()
+    assert record.exc_info is None
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "ERROR"
+    assert "ValueError: boom" in entry["exc_info"]
+    assert entry["request_id"] is None
+
+
+def test_sampling_keeps_warnings() -> None:
+    sampling = SamplingFilter(rate=0.0)
+    info = logging.LogRecord("x", logging.INFO, __file__, 1, "info", None, None)
+    warning = logging.LogRecord("x", logging.WARNING, __file__, 1, "warning", None, sys.exc_info())
+
+    assert not sampling.filter(info)
+    assert sampling.filter(warning)
+    assert SamplingFilter(rate=1.0).filter(info)
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+import time
+
+import anyio.to_thread
+from prometheus_client import REGISTRY
+
+from src.app.core.utils.loop_monitor import LoopMonitor
+
+
+def test_blocking_calls_are_logged_with_their_stack(caplog) -> None:
+    def hash_password_inline() -> None:
+        time.sleep(0.3)
+
+    async def run() -> None:
+        monitor = LoopMonitor(interval=0.02, blocked_threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        hash_password_inline()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    blocked = REGISTRY.get_sample_value("event_loop_blocked_total") or 0
+    with caplog.at_level(logging.WARNING, logger="src.app.core.utils.loop_monitor"):
+        asyncio.run(run())
+
+    warnings = [r.getMessage() for r in caplog.records if r.name == "src.app.core.utils.loop_monitor"]
+    assert len(warnings) == 1
+    assert "Event loop blocked" in warnings[0]
+    assert "in hash_password_inline" in warnings[0]
+    assert REGISTRY.get_sample_value("event_loop_blocked_total") == blocked + 1
+
+
+def test_thread_limiter_usage_is_sampled() -> None:
+    async def run() -> None:
+        monitor = LoopMonitor(interval=0.01, blocked_threshold=1.0)
+        monitor.start()
+        sleepers = [asyncio.create_task(anyio.to_thread.run_sync(time.sleep, 0.3)) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        assert REGISTRY.get_sample_value("thread_limiter_borrowed_tokens") == 3
+        assert REGISTRY.get_sample_value("event_loop_tasks") >= 4
+        await asyncio.gather(*sleepers)
+        await monitor.stop()
+
+    asyncio.run(run())
+    assert REGISTRY.get_sample_value("event_loop_lag_seconds_count") > 0
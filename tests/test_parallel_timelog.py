@@ -0,0 +1,84 @@
+import asyncio
+import json
+import time
+
+import pytest
+from autogen_agentchat.agents import AssistantAgent
+from autogen_ext.models.replay import ReplayChatCompletionClient
+
+from src.app.ai.teams import time_log
+from src.app.ai.teams.time_log import TimeLogTeam, gather_sources
+from src.app.core.config import settings
+
+
+class SlowReplayClient(ReplayChatCompletionClient):
+    def __init__(self, chat_completions: list[str], delay: float) -> None:
+        super().__init__(chat_completions)
+        self.delay = delay
+
+    async def create(self, *args, **kwargs):  # type: ignore[no-untyped-def]
+        await asyncio.sleep(self.delay)
+        return await super().create(*args, **kwargs)
+
+
+def _source(name: str, answer: str, delay: float) -> AssistantAgent:
+    return AssistantAgent(name, model_client=SlowReplayClient([answer], delay))
+
+
+def test_sources_run_concurrently_with_per_source_timeouts(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "TIMELOG_SOURCE_TIMEOUTS", {"calendar": 0.05})
+
+    async def run() -> None:
+        started = time.perf_counter()
+        results = await gather_sources(
+            [_source("github", "3 commits", 0.2), _source("calendar", "never", 5), _source("jira", "1 issue", 0.2)],
+            "Collect time logs",
+        )
+        assert time.perf_counter() - started < 0.35
+
+        by_source = {result.source: result for result in results}
+        assert by_source["github"].ok and by_source["github"].content == "3 commits"
+        assert by_source["jira"].ok
+        assert not by_source["calendar"].ok and "timed out" in by_source["calendar"].error
+
+    asyncio.run(run())
+
+
+def test_parallel_team_aggregates_once(monkeypatch) -> None:
+    answer = json.dumps({"thoughts": "combined", "response": []})
+    aggregator_client = ReplayChatCompletionClient([answer])
+    monkeypatch.setattr(time_log, "model_client", lambda: aggregator_client)
+
+    async def run() -> None:
+        team = TimeLogTeam(_source("github", "3 commits", 0), _source("calendar", "1 meeting", 0), mode="parallel")
+        result = await team.run("Jane Doe")
+        assert result.messages[-1].source == "timelog"
+        assert json.loads(result.messages[-1].content) == {"thoughts": "combined", "response": []}
+        combined = json.loads(result.messages[0].content)
+        assert [source["content"] for source in combined["sources"]] == ["3 commits", "1 meeting"]
+
+    asyncio.run(run())
+    # One aggregator call, however many sources there are.
+    assert aggregator_client.provided_message_count == 1
+
+
+def test_every_parallel_run_starts_from_an_empty_context(monkeypatch) -> None:
+    answer = json.dumps({"thoughts": "combined", "response": []})
+    monkeypatch.setattr(time_log, "model_client", lambda: ReplayChatCompletionClient([answer]))
+    github = AssistantAgent("github", model_client=ReplayChatCompletionClient(["3 commits", "5 commits"]))
+    calendar = AssistantAgent("calendar", model_client=ReplayChatCompletionClient(["1 meeting", "2 meetings"]))
+
+    async def run() -> None:
+        team = TimeLogTeam(github, calendar, mode="parallel")
+        await team.run("Jane Doe")
+        await team.run("John Doe")
+        messages = await github._model_context.get_messages()
+        assert [message.content for message in messages][1:] == ["5 commits"]
+        assert "John Doe" in messages[0].content
+
+    asyncio.run(run())
+
+
+def test_round_robin_team_needs_a_user_input_func() -> None:
+    with pytest.raises(ValueError, match="user_input_func"):
+        TimeLogTeam(_source("github", "3 commits", 0), _source("calendar", "1 meeting", 0), mode="round_robin")
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+from autogen_core.models import UserMessage
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from fakeredis import FakeAsyncRedis
+from pydantic import BaseModel
+
+from src.app.ai.stores.response_cache import (
+    CachedChatCompletionClient,
+    DiskResponseCacheStore,
+    RedisResponseCacheStore,
+    ResponseCacheStore,
+)
+
+
+class SlowReplayClient(ReplayChatCompletionClient):
+    def __init__(self, chat_completions: list[str]) -> None:
+        super().__init__(chat_completions)
+        self.set_cached_bool_value(False)
+
+    async def create(self, *args, **kwargs):  # type: ignore[no-untyped-def]
+        await asyncio.sleep(0.2)
+        return await super().create(*args, **kwargs)
+
+
+def _messages(text: str) -> list[UserMessage]:
+    return [UserMessage(content=text, source="user")]
+
+
+def test_identical_requests_are_served_from_cache(tmp_path) -> None:
+    async def run() -> None:
+        replay = SlowReplayClient(["first answer", "second answer"])
+        client = CachedChatCompletionClient(replay, store=DiskResponseCacheStore(str(tmp_path)))
+
+        miss = await client.create(_messages("Summarise my week"))
+        started = time.perf_counter()
+        hit = await client.create(_messages("Summarise my week"))
+        assert time.perf_counter() - started < 0.05
+
+        assert (miss.content, miss.cached) == ("first answer", False)
+        assert (hit.content, hit.cached) == ("first answer", True)
+        assert (await client.create(_messages("Summarise my month"))).content == "second answer"
+        assert (client.stats.hits, client.stats.misses) == (1, 2)
+
+    asyncio.run(run())
+
+
+def test_key_covers_model_tools_and_response_format() -> None:
+    class Answer(BaseModel):
+        text: str
+
+    client = CachedChatCompletionClient(SlowReplayClient([]), store=RedisResponseCacheStore(FakeAsyncRedis()))
+    tool = {"name": "get_commits", "description": "List commits", "parameters": {}}
+    base = client.cache_key(_messages("hi"), [], None, {})
+
+    assert client.cache_key(_messages("hi"), [], None, {}) == base
+    assert client.cache_key(_messages("hi"), [tool], None, {}) != base
+    assert client.cache_key(_messages("hi"), [], None, {"response_format": Answer}) != base
+
+    client._client_args = {"model": "gpt-4o-mini"}
+    assert client.cache_key(_messages("hi"), [], None, {}) != base
+
+
+def test_redis_store_expires_entries() -> None:
+    async def run() -> None:
+        redis = FakeAsyncRedis()
+        store = RedisResponseCacheStore(redis, ttl=60)
+        client = CachedChatCompletionClient(ReplayChatCompletionClient(["answer"]), store=store)
+
+        await client.create(_messages("hi"))
+        keys = await redis.keys("llm_cache:*")
+        assert len(keys) == 1
+        assert 0 < await redis.ttl(keys[0]) <= 60
+        assert (await client.create(_messages("hi"))).cached
+
+    asyncio.run(run())
+
+
+def test_incomplete_stores_cannot_be_created() -> None:
+    class ReadOnlyStore(ResponseCacheStore):
+        async def get(self, key: str) -> None:
+            return None
+
+    with pytest.raises(TypeError, match="set"):
+        ReadOnlyStore()
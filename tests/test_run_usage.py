@@ -0,0 +1,81 @@
+import asyncio
+
+from autogen_agentchat.agents import AssistantAgent
+from autogen_core import FunctionCall
+from autogen_core.models import CreateResult, RequestUsage
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+
+from src.app.ai.run_usage import RunUsageTracker
+from src.app.crud.crud_agent_runs import crud_agent_runs
+from src.app.models.agent_run import AgentRun, AgentRunRead
+
+
+def _session_factory(tmp_path) -> sessionmaker:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'runs.db'}", poolclass=NullPool)
+
+    async def create() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=[AgentRun.__table__])
+
+    asyncio.run(create())
+    return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_commits(repository: str) -> list[str]:
+    """List commits of a repository."""
+    await asyncio.sleep(0.05)
+    return ["sha0"]
+
+
+def _agent() -> AssistantAgent:
+    tool_call = CreateResult(
+        finish_reason="function_calls",
+        content=[FunctionCall(id="call-1", name="get_commits", arguments='{"repository": "octo/repo"}')],
+        usage=RequestUsage(prompt_tokens=100, completion_tokens=10),
+        cached=False,
+    )
+    model_client = ReplayChatCompletionClient([tool_call])
+    model_client._model_info["function_calling"] = True
+    return AssistantAgent("github", model_client=model_client, tools=[get_commits])
+
+
+def test_tracks_tokens_turns_and_tool_latency(tmp_path) -> None:
+    session_factory = _session_factory(tmp_path)
+
+    async def run() -> AgentRunRead:
+        async with RunUsageTracker("ws", user_id="user-1", session_factory=session_factory) as usage:
+            async for message in _agent().run_stream(task="List commits"):
+                usage.observe(message)
+        async with session_factory() as db:
+            return await crud_agent_runs.get(db=db, schema_to_select=AgentRunRead, id=usage.run_id)
+
+    summary = asyncio.run(run())
+    assert summary["status"] == "completed"
+    assert (summary["prompt_tokens"], summary["completion_tokens"]) == (100, 10)
+    # The task message from the user and the agent's tool call summary.
+    assert summary["turns"] == 2
+    assert summary["agents"]["github"]["calls"] == 1
+    assert summary["tools"]["get_commits"]["calls"] == 1
+    assert summary["tools"]["get_commits"]["latency_ms"] >= 50
+
+
+def test_failed_and_cancelled_runs_are_recorded(tmp_path) -> None:
+    session_factory = _session_factory(tmp_path)
+
+    async def run(error: BaseException) -> str:
+        tracker = RunUsageTracker("timelog", session_factory=session_factory)
+        try:
+            async with tracker:
+                raise error
+        except BaseException:
+            pass
+        async with session_factory() as db:
+            run = await crud_agent_runs.get(db=db, id=tracker.run_id)
+        return run["status"]
+
+    assert asyncio.run(run(ValueError("bad model output"))) == "failed"
+    assert asyncio.run(run(TimeoutError())) == "cancelled"
@@ -0,0 +1,62 @@
+import asyncio
+import base64
+import time
+from types import SimpleNamespace
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+
+from src.app.core import security
+from src.app.core.security import TokenHelper, get_password_hash, verify_password, verify_token
+
+
+def test_password_hashing_does_not_block_the_loop() -> None:
+    async def run() -> tuple[bool, bool, float]:
+        hashed = await get_password_hash("secret")
+        ticks = []
+
+        async def ticker() -> None:
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.005)
+                ticks.append(time.perf_counter() - started)
+
+        task = asyncio.create_task(ticker())
+        correct, wrong = await asyncio.gather(verify_password("secret", hashed), verify_password("wrong", hashed))
+        task.cancel()
+        return correct, wrong, max(ticks)
+
+    correct, wrong, slowest_tick = asyncio.run(run())
+
+    assert (correct, wrong) == (True, False)
+    # A bcrypt check with the default 12 rounds takes about 200ms; on the loop it would stall the ticker that long.
+    assert slowest_tick < 0.1
+
+
+def _b64(number: int) -> str:
+    return base64.urlsafe_b64encode(number.to_bytes((number.bit_length() + 7) // 8, "big")).decode().rstrip("=")
+
+
+def test_clerk_keys_are_parsed_once() -> None:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    numbers = private_key.public_key().public_numbers()
+    jwk = SimpleNamespace(n=_b64(numbers.n), e=_b64(numbers.e))
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    token = jwt.encode({"id": "user_1", "email": "jane@example.com"}, pem.decode(), algorithm="RS256")
+
+    TokenHelper.public_key.cache_clear()
+    assert TokenHelper.decode_jwt(token, jwk)["id"] == "user_1"
+    assert TokenHelper.decode_jwt(token, jwk)["email"] == "jane@example.com"
+    assert TokenHelper.public_key.cache_info().misses == 1
+
+
+def test_unverifiable_tokens_are_rejected(monkeypatch) -> None:
+    async def failed_claim(token: str) -> None:
+        return None
+
+    monkeypatch.setattr(security, "jwt_claim", failed_claim)
+
+    assert asyncio.run(verify_token("not-a-token", db=None)) is None
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from fakeredis import FakeAsyncRedis
+
+from src.app.ai.agents import calender
+from src.app.ai.stores.session_store import MemoryTeamSessionStore, RedisTeamSessionStore, TeamSessionStore
+
+
+def _stores() -> list[TeamSessionStore]:
+    return [
+        RedisTeamSessionStore(FakeAsyncRedis(), ttl=60, max_history=3),
+        MemoryTeamSessionStore(ttl=60, max_history=3),
+    ]
+
+
+@pytest.mark.parametrize("store", _stores(), ids=["redis", "memory"])
+def test_sessions_are_isolated_per_user_and_session(store: TeamSessionStore) -> None:
+    async def run() -> None:
+        await store.save_state("alice", "s1", {"type": "TeamState", "turn": 1})
+        await store.append_history("alice", "s1", {"content": "hello"})
+        await store.append_history("bob", "s1", {"content": "hi"})
+
+        assert await store.load_state("alice", "s1") == {"type": "TeamState", "turn": 1}
+        assert await store.load_state("bob", "s1") is None
+        assert await store.load_state("alice", "s2") is None
+        assert await store.get_history("alice", "s1") == [{"content": "hello"}]
+        assert await store.get_history("bob", "s1") == [{"content": "hi"}]
+
+        await store.delete("alice", "s1")
+        assert await store.get_history("alice", "s1") == []
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("store", _stores(), ids=["redis", "memory"])
+def test_history_is_appended_and_compacted(store: TeamSessionStore) -> None:
+    async def run() -> None:
+        for i in range(3):
+            await store.append_history("alice", "s1", {"n": i})
+        await store.append_history("alice", "s1", {"n": 3}, {"n": 4})
+
+        assert await store.get_history("alice", "s1") == [{"n": 2}, {"n": 3}, {"n": 4}]
+        assert await store.get_history("alice", "s1", last=1) == [{"n": 4}]
+
+    asyncio.run(run())
+
+
+def test_redis_session_keys_expire() -> None:
+    async def run() -> None:
+        client = FakeAsyncRedis()
+        store = RedisTeamSessionStore(client, ttl=60)
+        await store.append_history("alice", "s1", {"n": 0})
+        await store.save_state("alice", "s1", {})
+
+        assert 0 < await client.ttl("timelog_session:alice:s1:history") <= 60
+        assert 0 < await client.ttl("timelog_session:alice:s1:state") <= 60
+
+    asyncio.run(run())
+
+
+def test_incomplete_stores_cannot_be_created() -> None:
+    class StateOnlyStore(TeamSessionStore):
+        async def load_state(self, user_id: str, session_id: str) -> None:
+            return None
+
+    with pytest.raises(TypeError, match="save_state"):
+        StateOnlyStore()
+
+
+def test_every_team_restores_into_its_own_calendar_agent(monkeypatch) -> None:
+    monkeypatch.setattr(calender, "get_model_client", lambda *args: ReplayChatCompletionClient([]))
+
+    async def run() -> None:
+        alice, bob = calender.calendar_assistant(), calender.calendar_assistant()
+        assert alice is not bob
+        state = await alice.save_state()
+        state["llm_context"]["messages"] = [{"content": "alice's meetings", "source": "user", "type": "UserMessage"}]
+        await alice.load_state(state)
+
+        assert (await bob.save_state())["llm_context"]["messages"] == []
+
+    asyncio.run(run())
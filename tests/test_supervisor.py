@@ -0,0 +1,191 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from autogen_agentchat.messages import TextMessage
+from fastapi import FastAPI
+
+from src.app.ai import run_usage, supervisor
+from src.app.ai.agents import calender, github
+from src.app.ai.supervisor import RunSupervisor
+from src.app.ai.teams import time_log
+from src.app.api.dependencies import get_websocket_user
+from src.app.api.v1.time_log import router as time_log_router
+from src.app.core.exceptions.run_exceptions import RunLimitExceededError
+from src.app.core.schemas import TokenData
+
+
+def test_per_user_limit_rejects_when_queue_times_out() -> None:
+    async def run() -> None:
+        supervisor = RunSupervisor(max_concurrent=10, max_per_user=1, queue_timeout=0.05, run_timeout=10)
+        async with supervisor.run("alice"):
+            with pytest.raises(RunLimitExceededError):
+                async with supervisor.run("alice"):
+                    pass
+            # Other users are not affected by alice's limit.
+            async with supervisor.run("bob"):
+                assert [run.user_id for run in supervisor.active_runs()] == ["alice", "bob"]
+        assert supervisor.active_runs() == []
+
+    asyncio.run(run())
+
+
+def test_global_limit_queues_until_a_slot_frees() -> None:
+    async def run() -> None:
+        supervisor = RunSupervisor(max_concurrent=1, max_per_user=5, queue_timeout=1, run_timeout=10)
+        order = []
+
+        async def work(user_id: str) -> None:
+            async with supervisor.run(user_id):
+                order.append(f"{user_id}:start")
+                await asyncio.sleep(0.05)
+                order.append(f"{user_id}:end")
+
+        first = asyncio.create_task(work("alice"))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(work("bob"))
+        await asyncio.sleep(0.01)
+        assert [(r.user_id, r.status) for r in supervisor.active_runs()] == [("alice", "running"), ("bob", "queued")]
+        await asyncio.gather(first, second)
+        assert order == ["alice:start", "alice:end", "bob:start", "bob:end"]
+
+    asyncio.run(run())
+
+
+def test_token_is_cancelled_when_the_run_is_abandoned() -> None:
+    async def run() -> None:
+        supervisor = RunSupervisor(max_concurrent=1, max_per_user=1, queue_timeout=0, run_timeout=10)
+        with pytest.raises(ConnectionError):
+            async with supervisor.run("alice") as run:
+                raise ConnectionError("client went away")
+        assert run.token.is_cancelled()
+        # The slot was released along with the failed run.
+        async with supervisor.run("alice") as run:
+            assert not run.token.is_cancelled()
+
+    asyncio.run(run())
+
+
+def test_run_timeout_cancels_the_run() -> None:
+    async def run() -> None:
+        supervisor = RunSupervisor(max_concurrent=1, max_per_user=1, queue_timeout=0, run_timeout=0.05)
+        with pytest.raises(TimeoutError):
+            async with supervisor.run("alice") as run:
+                await asyncio.sleep(10)
+        assert run.token.is_cancelled()
+        assert supervisor.active_runs() == []
+
+    asyncio.run(run())
+
+
+def test_waiting_holds_no_slot_and_no_budget() -> None:
+    async def run() -> None:
+        supervisor = RunSupervisor(max_concurrent=1, max_per_user=1, queue_timeout=0, run_timeout=0.1)
+        async with supervisor.run("alice") as alice:
+            async with alice.waiting():
+                assert [r.status for r in supervisor.active_runs()] == ["waiting"]
+                # The slot is free for another run while alice's user types, for longer than her budget.
+                async with supervisor.run("bob"):
+                    pass
+                await asyncio.sleep(0.15)
+            assert [r.status for r in supervisor.active_runs()] == ["running"]
+            await asyncio.sleep(0.05)
+        assert not supervisor.active_runs()
+
+    asyncio.run(run())
+
+
+def test_waiting_fails_when_no_slot_frees_up() -> None:
+    async def run() -> None:
+        supervisor = RunSupervisor(max_concurrent=1, max_per_user=1, queue_timeout=0.05, run_timeout=10)
+
+        async def bob() -> None:
+            async with supervisor.run("bob"):
+                await asyncio.sleep(0.2)
+
+        async with supervisor.run("alice") as alice:
+            with pytest.raises(RunLimitExceededError):
+                async with alice.waiting():
+                    # Bob takes the slot alice gave back and keeps it past her queue timeout.
+                    bob_run = asyncio.create_task(bob())
+                    await asyncio.sleep(0.01)
+        await bob_run
+        assert supervisor.active_runs() == []
+
+    asyncio.run(run())
+
+
+class FakeTeam:
+    """Asks the user one question, then makes a model call that only ends when the run is cancelled."""
+
+    def __init__(self, user_input) -> None:  # type: ignore[no-untyped-def]
+        self.user_input = user_input
+        self.tokens: list = []
+
+    async def load_state(self, state: dict) -> None:
+        pass
+
+    async def save_state(self) -> dict:
+        return {}
+
+    async def run_stream(self, task, cancellation_token):  # type: ignore[no-untyped-def]
+        self.tokens.append(cancellation_token)
+        yield TextMessage(content="Which repository?", source="timelog")
+        answer = await self.user_input("Which repository?", cancellation_token)
+        yield TextMessage(content=f"Reading {answer}", source="timelog")
+        model_call = asyncio.get_running_loop().create_future()
+        cancellation_token.link_future(model_call)
+        await model_call
+
+
+def test_chat_runs_wait_for_the_user_without_a_slot_and_stop_when_the_client_leaves(monkeypatch) -> None:
+    run_supervisor = RunSupervisor(max_concurrent=1, max_per_user=1, queue_timeout=0, run_timeout=0.2)
+    teams: list[FakeTeam] = []
+
+    async def get_timelog_team(user_input, **agents):  # type: ignore[no-untyped-def]
+        teams.append(FakeTeam(user_input))
+        return teams[-1]
+
+    async def finish(self, status: str) -> None:  # type: ignore[no-untyped-def]
+        pass
+
+    monkeypatch.setattr(supervisor, "run_supervisor", run_supervisor)
+    monkeypatch.setattr(time_log, "get_timelog_team", get_timelog_team)
+    monkeypatch.setattr(github, "GitHubAgent", lambda github_token: SimpleNamespace(assistant=None))
+    monkeypatch.setattr(calender, "calendar_assistant", lambda: None)
+    monkeypatch.setattr(run_usage.RunUsageTracker, "finish", finish)
+    app = FastAPI()
+    app.include_router(time_log_router)
+    app.dependency_overrides[get_websocket_user] = lambda: TokenData(username_or_email="jane", id="id_1")
+
+    async def run() -> None:
+        incoming: asyncio.Queue = asyncio.Queue()
+        outgoing: asyncio.Queue = asyncio.Queue()
+        scope = {"type": "websocket", "path": "/ws", "query_string": b"session_id=s1", "headers": []}
+        handler = asyncio.create_task(app(scope, incoming.get, outgoing.put))
+
+        async def receive_json() -> dict:
+            while (event := await outgoing.get())["type"] != "websocket.send":
+                pass
+            return json.loads(event["text"])
+
+        def send_json(data: dict) -> None:
+            incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(data)})
+
+        incoming.put_nowait({"type": "websocket.connect"})
+        send_json({"content": "Log my week", "source": "user"})
+        assert (await receive_json())["content"] == "Which repository?"
+        # The user takes longer than the run's budget to answer; the run keeps no slot meanwhile.
+        await asyncio.sleep(0.3)
+        assert [run.status for run in run_supervisor.active_runs()] == ["waiting"]
+        send_json({"content": "octo/repo", "source": "user"})
+        assert (await receive_json())["content"] == "Reading octo/repo"
+
+        # The client leaves during the model call, which is cancelled rather than left to its budget.
+        incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(handler, 0.1)
+        assert teams[0].tokens[0].is_cancelled()
+        assert run_supervisor.active_runs() == []
+
+    asyncio.run(run())
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from fastapi import FastAPI
+
+from src.app.ai.teams import time_log
+from src.app.ai.teams.time_log_estimator import CalendarInput, CommitInput, estimate_time_logs
+from src.app.api.dependencies import get_current_user
+from src.app.api.v1.time_log import router as time_log_router
+from src.app.core.config import settings
+
+DAY = datetime(2025, 1, 6, tzinfo=timezone.utc)
+
+
+def _commits(*hours: float) -> list[CommitInput]:
+    return [CommitInput(date=DAY + timedelta(hours=hour), message=f"commit at {hour}") for hour in hours]
+
+
+def test_commits_are_clustered_into_sessions() -> None:
+    estimate = estimate_time_logs(_commits(10, 11, 11.5, 15, 16))
+
+    assert not estimate.needs_review
+    assert [(log.start_date, log.end_date) for log in estimate.timelogs] == [
+        ("2025-01-06T09:30:00+00:00", "2025-01-06T11:30:00+00:00"),
+        ("2025-01-06T14:30:00+00:00", "2025-01-06T16:00:00+00:00"),
+    ]
+    assert estimate.timelogs[0].task == "commit at 11.5 (+2 commits)"
+
+
+def test_sessions_are_clipped_to_working_hours() -> None:
+    estimate = estimate_time_logs(_commits(8.75, 10, 17.5, 18.25))
+
+    assert [(log.start_date, log.end_date) for log in estimate.timelogs] == [
+        ("2025-01-06T09:00:00+00:00", "2025-01-06T10:00:00+00:00"),
+        ("2025-01-06T17:00:00+00:00", "2025-01-06T18:00:00+00:00"),
+    ]
+
+
+def test_calendar_events_take_precedence() -> None:
+    meeting = CalendarInput(title="Standup", start_date=DAY + timedelta(hours=10), end_date=DAY + timedelta(hours=11))
+    estimate = estimate_time_logs(_commits(9.5, 10.5, 12), [meeting])
+
+    assert [(log.source, log.start_date, log.end_date) for log in estimate.timelogs] == [
+        ("github", "2025-01-06T09:00:00+00:00", "2025-01-06T10:00:00+00:00"),
+        ("calendar", "2025-01-06T10:00:00+00:00", "2025-01-06T11:00:00+00:00"),
+        ("github", "2025-01-06T11:00:00+00:00", "2025-01-06T12:00:00+00:00"),
+    ]
+
+
+def test_sessions_outside_working_hours_need_review() -> None:
+    estimate = estimate_time_logs(_commits(21, 22))
+
+    assert estimate.timelogs == []
+    assert estimate.needs_review
+    assert estimate.ambiguous[0].start_date == "2025-01-06T20:30:00+00:00"
+
+
+def test_unusable_reviews_fall_back_to_the_estimate(monkeypatch) -> None:
+    estimate = estimate_time_logs(_commits(10, 11, 21, 23))
+    assert estimate.needs_review
+
+    monkeypatch.setattr(time_log, "model_client", lambda: ReplayChatCompletionClient(["Sorry, I cannot help."]))
+    response = asyncio.run(time_log.review_timelogs(estimate.timelogs, estimate.ambiguous))
+
+    assert response.response == estimate.timelogs
+    assert "1 ambiguous sessions" in response.thoughts
+
+
+def test_timelog_only_syncs_allowed_repositories_for_signed_in_users(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "TIMELOG_REPOSITORIES", ["octo/repo"])
+    app = FastAPI()
+    app.include_router(time_log_router)
+
+    async def run() -> list[int]:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            statuses = [(await client.get("/timelog", params={"repository": "octo/repo"})).status_code]
+            app.dependency_overrides[get_current_user] = lambda: {"id": "id_1"}
+            statuses.append((await client.get("/timelog", params={"repository": "someone/else"})).status_code)
+        return statuses
+
+    assert asyncio.run(run()) == [401, 403]
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+from fastapi import APIRouter, FastAPI
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.app.api.dependencies import get_current_user
+from src.app.core import logger as app_logger
+from src.app.core.utils import profiler, tracing
+from src.app.core.utils.tracing import SpanExporter, TracedRoute, instrument_engine, span
+from src.app.middleware.tracing_middleware import TracingMiddleware
+
+
+def test_requests_are_broken_down_into_exported_spans(tmp_path, monkeypatch) -> None:
+    exporter = SpanExporter("file", str(tmp_path / "traces.jsonl"), "", interval=0.01)
+    monkeypatch.setattr(tracing, "span_exporter", exporter)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tracing.db'}", poolclass=NullPool)
+    instrument_engine(engine)
+    logged_trace_ids = []
+
+    router = APIRouter(route_class=TracedRoute)
+
+    @router.get("/items/{item_id}")
+    async def read_item(item_id: int) -> dict:
+        with span("cache.get"):
+            await asyncio.sleep(0)
+        async with engine.connect() as conn:
+            await conn.execute(text("select 1"))
+        logged_trace_ids.append(app_logger.trace_id.get())
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(TracingMiddleware)
+    parent_trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    async def run() -> httpx.Response:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/missing")
+            return await client.get("/items/1", headers={"traceparent": f"00-{parent_trace_id}-00f067aa0ba902b7-01"})
+
+    response = asyncio.run(run())
+    exporter.shutdown()
+
+    assert response.json() == {"id": 1}
+    assert logged_trace_ids == [parent_trace_id]
+    exported = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    spans = [s for batch in exported for s in batch["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    traced = {s["name"]: s for s in spans if s["traceId"] == parent_trace_id}
+    assert set(traced) == {"GET /items/{item_id}", "endpoint", "cache.get", "db.query", "serialization"}
+    root = traced["GET /items/{item_id}"]
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+    assert traced["endpoint"]["parentSpanId"] == root["spanId"]
+    assert traced["cache.get"]["parentSpanId"] == traced["endpoint"]["spanId"]
+    assert traced["db.query"]["parentSpanId"] == traced["endpoint"]["spanId"]
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    assert REGISTRY.get_sample_value("http_request_seconds_count", labels) >= 1
+    assert REGISTRY.get_sample_value("http_request_seconds_count", {**labels, "route": "unmatched", "status": "404"})
+    phase = {"route": "/items/{item_id}", "phase": "db.query"}
+    assert REGISTRY.get_sample_value("http_request_phase_seconds_count", phase) >= 1
+
+
+def test_spans_outside_requests_record_nothing() -> None:
+    with span("cache.get") as current:
+        assert current is None
+
+
+def test_profiler_samples_another_thread() -> None:
+    stop = threading.Event()
+
+    def busy_loop() -> None:
+        while not stop.is_set():
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=busy_loop)
+    thread.start()
+    try:
+        stacks = profiler.sample_stacks(thread.ident, seconds=0.1, interval=0.005)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert sum(stacks.values()) > 5
+    assert all("busy_loop (test_tracing.py:" in stack for stack in stacks)
+    assert profiler.folded(stacks).splitlines()[0].endswith(str(stacks.most_common(1)[0][1]))
+
+
+def test_metrics_are_only_served_to_superusers() -> None:
+    from src.app.main import app
+
+    async def run() -> list[int]:
+        transport = httpx.ASGITransport(app=app)
+        statuses = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            statuses.append((await client.get("/metrics")).status_code)
+            for is_superuser in (False, True):
+                app.dependency_overrides[get_current_user] = lambda: {"id": "id_1", "is_superuser": is_superuser}
+                statuses.append((await client.get("/metrics")).status_code)
+        return statuses
+
+    try:
+        assert asyncio.run(run()) == [401, 403, 200]
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
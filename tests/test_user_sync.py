@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+
+from src.app.models.user import User
+from src.scripts.backfill_clerk_users import backfill_users, read_clerk_export
+
+
+def _clerk_user(user_id: str, first_name: str = "Jane", username: str | None = None) -> dict:
+    return {
+        "id": user_id,
+        "first_name": first_name,
+        "last_name": "Doe",
+        "username": username,
+        "primary_email_address_id": "e1",
+        "email_addresses": [{"id": "e1", "email_address": f"{user_id.replace('_', '')}@example.com"}],
+    }
+
+
+def test_backfill_upserts_users_in_chunks(tmp_path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'users.db'}", poolclass=NullPool)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    users = [_clerk_user(f"user_{i}") for i in range(25)]
+    users[3] = _clerk_user("user_3", username="a" * 40)
+    users[4]["email_addresses"] = []
+
+    ndjson = tmp_path / "users.ndjson"
+    ndjson.write_text("\n".join(json.dumps(user) for user in users) + "\n")
+    array = tmp_path / "users.json"
+    array.write_text(json.dumps([_clerk_user("user_0", first_name="Janet"), _clerk_user("user_99")]))
+
+    async def run() -> dict[str, User]:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=[User.__table__])
+        async with session_factory() as db:
+            assert await backfill_users(db, read_clerk_export(ndjson), chunk_size=10) == (23, 2)
+            user = (await db.execute(select(User).where(User.uuid == "user_0"))).scalar_one()
+            user.is_deleted = True
+            original_id = user.id
+            await db.commit()
+            # A second export updates existing users in place and restores deleted ones.
+            assert await backfill_users(db, read_clerk_export(array), chunk_size=10) == (2, 0)
+        async with session_factory() as db:
+            rows = {user.uuid: user for user in (await db.execute(select(User))).scalars().all()}
+        assert rows["user_0"].id == original_id and rows["user_0"].updated_at is not None
+        return rows
+
+    rows = asyncio.run(run())
+    assert len(rows) == 24 and "user_3" not in rows and "user_4" not in rows
+    assert (rows["user_0"].name, rows["user_0"].is_deleted) == ("Janet Doe", False)
+    assert rows["user_7"].username == "user7"
+
+
+def test_backfill_skips_rows_that_violate_constraints(tmp_path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'users.db'}", poolclass=NullPool)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    users = [_clerk_user(f"user_{i}") for i in range(12)]
+    # Another Clerk user with user_5's email, the `user` table keeps emails unique.
+    users[6]["email_addresses"] = [{"id": "e1", "email_address": "user5@example.com"}]
+    ndjson = tmp_path / "users.ndjson"
+    ndjson.write_text("\n".join(json.dumps(user) for user in users) + "\n")
+
+    async def run() -> set[str]:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all, tables=[User.__table__])
+        async with session_factory() as db:
+            assert await backfill_users(db, read_clerk_export(ndjson), chunk_size=5) == (11, 1)
+        async with session_factory() as db:
+            return set((await db.execute(select(User.uuid))).scalars().all())
+
+    assert asyncio.run(run()) == {f"user_{i}" for i in range(12)} - {"user_6"}
@@ -0,0 +1,42 @@
+import asyncio
+
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from src.app.core.utils.dedupe import DeliveryDeduplicator
+
+
+def test_deliveries_are_remembered_across_workers() -> None:
+    async def run() -> None:
+        server = FakeServer()
+        first = DeliveryDeduplicator(client=FakeAsyncRedis(server=server))
+        second = DeliveryDeduplicator(client=FakeAsyncRedis(server=server))
+
+        assert not await first.seen("msg_1")
+        await first.mark("msg_1")
+        assert await first.seen("msg_1")
+        # Another worker only finds it in Redis, then keeps it in its own LRU.
+        assert await second.seen("msg_1")
+        assert await second.seen("msg_1")
+        assert not await second.seen("msg_2")
+
+        assert first.stats.memory_duplicates == 1
+        assert (second.stats.redis_duplicates, second.stats.memory_duplicates) == (1, 1)
+        assert 0 < await second.client.ttl("webhook_seen:msg_1") <= first.ttl
+
+    asyncio.run(run())
+
+
+def test_local_entries_expire_and_are_evicted() -> None:
+    async def run() -> None:
+        now = [0.0]
+        deduplicator = DeliveryDeduplicator(ttl=10, max_local=2, clock=lambda: now[0])
+        for delivery_id in ["msg_1", "msg_2", "msg_3"]:
+            await deduplicator.mark(delivery_id)
+
+        assert not await deduplicator.seen("msg_1")
+        assert await deduplicator.seen("msg_3")
+        now[0] = 11.0
+        assert not await deduplicator.seen("msg_3")
+        assert deduplicator.stats.duplicates == 1
+
+    asyncio.run(run())
@@ -0,0 +1,163 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+from svix.webhooks import Webhook
+
+from src.app.api.v1 import webhook
+from src.app.core.config import settings
+from src.app.core.db.database import async_get_db
+from src.app.core.utils.dedupe import DeliveryDeduplicator
+from src.app.core.worker.webhooks import drain_webhook_inbox
+from src.app.models.timelog import TimeLog
+from src.app.models.user import User
+from src.app.models.webhook import WebhookEvent
+
+
+def _session_factory(tmp_path) -> sessionmaker:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'webhooks.db'}", poolclass=NullPool)
+
+    async def create() -> None:
+        async with engine.begin() as conn:
+            tables = [User.__table__, TimeLog.__table__, WebhookEvent.__table__]
+            await conn.run_sync(SQLModel.metadata.create_all, tables=tables)
+
+    asyncio.run(create())
+    return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def _user_event(event_type: str, user_id: str, first_name: str = "Jane") -> dict:
+    data = {
+        "id": user_id,
+        "first_name": first_name,
+        "last_name": "Doe",
+        "username": None,
+        "primary_email_address_id": "e1",
+        "email_addresses": [{"id": "e1", "email_address": f"{user_id}@example.com"}],
+    }
+    return {"type": event_type, "data": data}
+
+
+def _deliver(app: FastAPI, svix_id: str, event: dict, secret: str = settings.CLERK_SIGNING_SECRET) -> httpx.Response:
+    body = json.dumps(event)
+    now = datetime.now(timezone.utc)
+    headers = {
+        "svix-id": svix_id,
+        "svix-timestamp": str(int(now.timestamp())),
+        "svix-signature": Webhook(secret).sign(svix_id, now, body),
+    }
+
+    async def post() -> httpx.Response:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/webhooks/clerk", content=body, headers=headers)
+
+    return asyncio.run(post())
+
+
+def _rows(session_factory, model):
+    async def read():
+        async with session_factory() as db:
+            return list((await db.execute(select(model))).scalars().all())
+
+    return asyncio.run(read())
+
+
+def _app(session_factory, monkeypatch, scheduled: list) -> FastAPI:
+    async def get_db():
+        async with session_factory() as db:
+            yield db
+
+    async def schedule(background_tasks) -> None:
+        scheduled.append(True)
+
+    monkeypatch.setattr(webhook, "schedule_webhook_drain", schedule)
+    monkeypatch.setattr(webhook, "webhook_deduplicator", DeliveryDeduplicator())
+    app = FastAPI()
+    app.include_router(webhook.router)
+    app.dependency_overrides[async_get_db] = get_db
+    return app
+
+
+def test_deliveries_are_acknowledged_into_the_inbox_once(tmp_path, monkeypatch) -> None:
+    session_factory = _session_factory(tmp_path)
+    scheduled: list = []
+    app = _app(session_factory, monkeypatch, scheduled)
+
+    event = _user_event("user.created", "user_1")
+    assert _deliver(app, "msg_1", event).status_code == 200
+    # Clerk retries a delivery with the same svix-id.
+    assert _deliver(app, "msg_1", event).status_code == 200
+    assert _deliver(app, "msg_2", event, secret="whsec_" + "A" * 32).status_code == 400
+
+    assert [row.svix_id for row in _rows(session_factory, WebhookEvent)] == ["msg_1"]
+    assert _rows(session_factory, User) == []
+    assert scheduled == [True]
+
+
+def test_redeliveries_skip_the_inbox(tmp_path, monkeypatch) -> None:
+    session_factory = _session_factory(tmp_path)
+    app = _app(session_factory, monkeypatch, [])
+    event = _user_event("user.created", "user_1")
+    assert _deliver(app, "msg_1", event).status_code == 200
+
+    stored: list = []
+    monkeypatch.setattr(webhook, "store_webhook_event", lambda *args: stored.append(args))
+    assert _deliver(app, "msg_1", event).status_code == 200
+    assert stored == []
+    assert webhook.webhook_deduplicator.stats.memory_duplicates == 1
+
+
+def test_drain_processes_batches_and_retries_failures(tmp_path, monkeypatch) -> None:
+    session_factory = _session_factory(tmp_path)
+    app = _app(session_factory, monkeypatch, [])
+    deliveries = [
+        ("msg_1", _user_event("user.updated", "user_2", first_name="Early")),
+        ("msg_2", _user_event("user.created", "user_1")),
+        ("msg_3", _user_event("user.updated", "user_1", first_name="Janet")),
+        ("msg_4", {"type": "session.created", "data": {}}),
+        ("msg_5", _user_event("user.created", "user_2")),
+    ]
+    for svix_id, event in deliveries:
+        _deliver(app, svix_id, event)
+
+    ctx = {"session_factory": session_factory}
+    assert asyncio.run(drain_webhook_inbox(ctx, batch_size=2)) == 4
+    events = {row.svix_id: row for row in _rows(session_factory, WebhookEvent)}
+    # The update for user_2 arrived before the user existed; it fails once and is retried by the next drain.
+    assert events["msg_1"].processed_at is None and events["msg_1"].attempts == 1
+    assert all(events[svix_id].processed_at is not None for svix_id in ["msg_2", "msg_3", "msg_4", "msg_5"])
+    assert {user.uuid: user.name for user in _rows(session_factory, User)} == {
+        "user_1": "Janet Doe",
+        "user_2": "Jane Doe",
+    }
+
+    assert asyncio.run(drain_webhook_inbox(ctx)) == 1
+    assert {user.uuid: user.name for user in _rows(session_factory, User)}["user_2"] == "Early Doe"
+    assert asyncio.run(drain_webhook_inbox(ctx)) == 0
+
+
+def test_drain_creates_queued_users_in_bulk(tmp_path, monkeypatch) -> None:
+    session_factory = _session_factory(tmp_path)
+    app = _app(session_factory, monkeypatch, [])
+    for i in range(3):
+        _deliver(app, f"msg_{i}", _user_event("user.created", f"user_{i}"))
+    _deliver(app, "msg_3", _user_event("user.updated", "user_0", first_name="Janet"))
+    ctx = {"session_factory": session_factory}
+    assert asyncio.run(drain_webhook_inbox(ctx)) == 4
+    assert {user.uuid: user.name for user in _rows(session_factory, User)}["user_0"] == "Janet Doe"
+
+    # An email taken by another user fails the bulk upsert; the batch falls back to one event at a time.
+    taken = _user_event("user.created", "user_4")
+    taken["data"]["email_addresses"][0]["email_address"] = "user_1@example.com"
+    _deliver(app, "msg_4", taken)
+    _deliver(app, "msg_5", _user_event("user.created", "user_5"))
+    assert asyncio.run(drain_webhook_inbox(ctx)) == 1
+    assert len(_rows(session_factory, User)) == 4
+    assert {row.svix_id: row.attempts for row in _rows(session_factory, WebhookEvent)}["msg_4"] == 1
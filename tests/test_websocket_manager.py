@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+from fakeredis import FakeAsyncRedis, FakeServer
+from starlette.websockets import WebSocketState
+
+from src.app.api.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0, fail: bool = False) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.client_state = WebSocketState.CONNECTING
+        self.received: list[str] = []
+
+    async def accept(self) -> None:
+        self.client_state = WebSocketState.CONNECTED
+
+    async def send_text(self, message: str) -> None:
+        if self.fail:
+            raise RuntimeError("connection reset")
+        await asyncio.sleep(self.delay)
+        self.received.append(message)
+
+    async def close(self) -> None:
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+def test_user_and_room_indexes() -> None:
+    async def run() -> None:
+        manager = ConnectionManager()
+        alice_1, alice_2, bob = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(alice_1, user_id="alice", rooms=["team"])
+        await manager.connect(alice_2, user_id="alice")
+        await manager.connect(bob, user_id="bob", rooms=["team"])
+
+        assert await manager.send_to_user("alice", "hi alice") == 2
+        assert await manager.send_to_room("team", "hi team") == 2
+        assert alice_1.received == ["hi alice", "hi team"]
+        assert alice_2.received == ["hi alice"]
+        assert bob.received == ["hi team"]
+
+        manager.disconnect(alice_1)
+        manager.disconnect(alice_2)
+        assert "alice" not in manager.user_connections
+        assert manager.room_connections == {"team": {bob}}
+
+    asyncio.run(run())
+
+
+def test_slow_and_dead_sockets_are_dropped_without_stalling_others() -> None:
+    async def run() -> None:
+        manager = ConnectionManager(send_timeout=0.05)
+        healthy = [FakeWebSocket() for _ in range(10)]
+        slow, dead = FakeWebSocket(delay=10), FakeWebSocket(fail=True)
+        for websocket in [*healthy, slow, dead]:
+            await manager.connect(websocket, user_id="user")
+
+        started = time.perf_counter()
+        assert await manager.broadcast("ping") == 10
+        assert time.perf_counter() - started < 1
+
+        assert all(websocket.received == ["ping"] for websocket in healthy)
+        assert slow not in manager.active_connections and dead not in manager.active_connections
+        assert manager.user_connections["user"] == set(healthy)
+        assert slow.client_state == WebSocketState.DISCONNECTED
+
+    asyncio.run(run())
+
+
+def test_messages_fan_out_across_workers() -> None:
+    async def run() -> None:
+        server = FakeServer()
+        worker_1, worker_2 = ConnectionManager(), ConnectionManager()
+        await worker_1.start(FakeAsyncRedis(server=server))
+        await worker_2.start(FakeAsyncRedis(server=server))
+        local, remote = FakeWebSocket(), FakeWebSocket()
+        await worker_1.connect(local, user_id="alice")
+        await worker_2.connect(remote, user_id="alice", rooms=["team"])
+
+        await worker_1.send_to_user("alice", "hello")
+        await worker_1.send_to_room("team", "standup")
+        for _ in range(100):
+            if len(remote.received) == 2:
+                break
+            await asyncio.sleep(0.01)
+
+        # The sending worker delivers locally and ignores its own message coming back from Redis.
+        assert local.received == ["hello"]
+        assert remote.received == ["hello", "standup"]
+
+        await worker_1.stop()
+        await worker_2.stop()
+
+    asyncio.run(run())
+
+
+def test_lost_subscriptions_are_resubscribed() -> None:
+    async def run() -> None:
+        server = FakeServer()
+        worker_1 = ConnectionManager()
+        worker_2 = ConnectionManager(reconnect_delay=0.01)
+        await worker_1.start(FakeAsyncRedis(server=server))
+        await worker_2.start(FakeAsyncRedis(server=server))
+        remote = FakeWebSocket()
+        await worker_2.connect(remote, user_id="alice")
+
+        server.connected = False
+        await asyncio.sleep(0.05)
+        server.connected = True
+        for _ in range(100):
+            await worker_1.send_to_user("alice", "hello")
+            if remote.received:
+                break
+            await asyncio.sleep(0.01)
+
+        assert remote.received[:1] == ["hello"]
+        await worker_1.stop()
+        await worker_2.stop()
+
+    asyncio.run(run())
+
+
+def test_broadcast_to_thousands_of_clients() -> None:
+    async def run() -> None:
+        manager = ConnectionManager(send_timeout=1)
+        clients = [FakeWebSocket(delay=0.01) for _ in range(5_000)]
+        for i, websocket in enumerate(clients):
+            await manager.connect(websocket, user_id=f"user{i % 1000}")
+        stalled = [FakeWebSocket(delay=10) for _ in range(50)]
+        for websocket in stalled:
+            await manager.connect(websocket)
+
+        started = time.perf_counter()
+        assert await manager.broadcast("tick") == len(clients)
+        # Sends overlap, so the broadcast costs about one timeout, not the sum of every client's latency.
+        assert time.perf_counter() - started < 5
+        assert len(manager.active_connections) == len(clients)
+
+    asyncio.run(run())